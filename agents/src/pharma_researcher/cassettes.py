@@ -0,0 +1,288 @@
+"""
+Record/replay of the research tools' upstream API traffic.
+
+In record mode every response the tools' HTTP client (tools.http) gets
+from openFDA, ClinicalTrials.gov, NCBI, ChEMBL, Open Targets, PatentsView
+or Comtrade is written to a cassette, one JSON file per source. In replay
+mode requests never leave the process: they are answered from the
+cassettes, optionally with the latency and errors of a profile, so tools
+can be run, tested and benchmarked offline. Requests without a recording
+fail with CassetteMiss, a requests ConnectionError.
+
+Recordings are keyed like the response cache (method, URL, sorted
+parameters, normalized body) and credentials are neither part of the key
+nor stored. Cassette files carry a format version and are meant to be
+committed; point HTTP_CASSETTE_DIR at another directory to keep several
+recorded sets. While recording or replaying, the response cache is
+bypassed, and replayed requests skip the rate limiter.
+
+Settings (environment):
+    HTTP_CASSETTE_MODE: "off" (default), "record" or "replay"
+    HTTP_CASSETTE_DIR: cassette directory (default agents/cassettes)
+    HTTP_CASSETTE_PROFILE: replay profile, a name of PROFILES or
+        "latency=ms,jitter=ms,errors=rate,status=code,timeouts=rate"
+        (default none)
+    HTTP_CASSETTE_SEED: seed of the profile's random latency and errors
+
+List the recorded cassettes with:
+    python -m pharma_researcher.cassettes list
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from pharma_researcher.response_cache import CREDENTIAL_PARAMS, DROPPED_HEADERS, cache_key
+
+FORMAT_VERSION = 1
+DEFAULT_CASSETTE_DIR = Path(__file__).resolve().parents[2] / "cassettes"
+MODES = ("off", "record", "replay")
+
+# Cassette of each upstream host; other hosts are recorded under their host name
+SOURCES: Dict[str, str] = {
+    "api.fda.gov": "openfda",
+    "clinicaltrials.gov": "clinicaltrials",
+    "eutils.ncbi.nlm.nih.gov": "ncbi",
+    "www.ebi.ac.uk": "chembl",
+    "api.platform.opentargets.org": "opentargets",
+    "search.patentsview.org": "patentsview",
+    "comtradeapi.un.org": "comtrade",
+}
+
+# Response headers that are specific to one response or the client
+SKIPPED_HEADERS = DROPPED_HEADERS | {"date", "set-cookie", "age", "expires", "x-request-id"}
+
+@dataclass(frozen=True)
+class Profile:
+    """
+    Latency and failures injected into replayed responses.
+    """
+    latency: float = 0.0  # seconds per request
+    jitter: float = 0.0  # uniform +/- seconds around the latency
+    error_rate: float = 0.0  # share of requests answered with error_status
+    error_status: int = 503
+    timeout_rate: float = 0.0  # share of requests failing with a read timeout
+
+PROFILES: Dict[str, Profile] = {
+    "none": Profile(),
+    "lan": Profile(latency=0.005, jitter=0.002),
+    "typical": Profile(latency=0.25, jitter=0.1, error_rate=0.01),
+    "slow": Profile(latency=1.2, jitter=0.5, error_rate=0.05),
+    "flaky": Profile(latency=0.3, jitter=0.15, error_rate=0.2, error_status=503, timeout_rate=0.05),
+}
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """
+    Raised in replay mode for a request that was never recorded.
+    """
+
+def parse_profile(spec: str) -> Profile:
+    """
+    A profile by name, or from "latency=ms,jitter=ms,errors=rate,status=code,timeouts=rate".
+    """
+    spec = spec.strip()
+    if spec in PROFILES:
+        return PROFILES[spec]
+    values: Dict[str, Any] = {}
+    names = {"latency": "latency", "jitter": "jitter", "errors": "error_rate", "status": "error_status", "timeouts": "timeout_rate"}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        field = names.get(name.strip())
+        if field is None:
+            raise ValueError(f"Unknown cassette profile '{spec}', expected one of {', '.join(PROFILES)} or {', '.join(names)}=value,...")
+        if field in ("latency", "jitter"):
+            values[field] = float(value) / 1000
+        elif field == "error_status":
+            values[field] = int(value)
+        else:
+            values[field] = float(value)
+    return Profile(**values)
+
+def source_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return SOURCES.get(host, host)
+
+def _public_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name.lower() not in CREDENTIAL_PARAMS]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+def _request_key(method: str, url: str, kwargs: Dict[str, Any]) -> Tuple[requests.PreparedRequest, str]:
+    prepared = requests.Request(
+        method, url,
+        params=kwargs.get("params"),
+        data=kwargs.get("data"),
+        json=kwargs.get("json")
+    ).prepare()
+    return prepared, cache_key(prepared)
+
+class CassetteLibrary:
+    """
+    The cassettes of one directory, recording or replaying. Safe to share
+    between threads and event loops.
+    """
+
+    def __init__(self, directory: Union[str, Path], mode: str, profile: Optional[Profile] = None, seed: Optional[int] = None):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected 'record' or 'replay'")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.profile = profile or Profile()
+        self._random = random.Random(seed)
+        self._cassettes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def path(self, source: str) -> Path:
+        return self.directory / f"{source}.json"
+
+    def replay(self, method: str, url: str, **kwargs: Any) -> Tuple[float, Union[requests.Response, Exception]]:
+        """
+        The recorded outcome of a request and the delay the profile puts before it.
+        The caller waits for the delay, then returns the response or raises the exception.
+        """
+        prepared, key = _request_key(method, url, kwargs)
+        source = source_of(url)
+        with self._lock:
+            interaction = self._load(source)["interactions"].get(key)
+            delay = max(0.0, self.profile.latency + self._random.uniform(-self.profile.jitter, self.profile.jitter))
+            roll = self._random.random()
+
+        if interaction is None:
+            return 0.0, CassetteMiss(f"No recorded response for {method} {_public_url(prepared.url)} in {self.path(source)}")
+        if roll < self.profile.timeout_rate:
+            return delay, requests.exceptions.ReadTimeout(f"Injected timeout for {method} {_public_url(prepared.url)}")
+        if roll < self.profile.timeout_rate + self.profile.error_rate:
+            body = json.dumps({"error": "Injected error"}).encode("utf-8")
+            return delay, _response(prepared, self.profile.error_status, {"Content-Type": "application/json"}, body)
+
+        if interaction["encoding"] == "base64":
+            body = base64.b64decode(interaction["body"])
+        else:
+            body = interaction["body"].encode("utf-8")
+        return delay, _response(prepared, interaction["status"], interaction["headers"], body)
+
+    def record(self, method: str, url: str, kwargs: Dict[str, Any], response: requests.Response) -> None:
+        """
+        Add a live response to its source's cassette and save it.
+        """
+        _, key = _request_key(method, url, kwargs)
+        body = response.content
+        try:
+            encoding, stored = "utf-8", body.decode("utf-8")
+        except UnicodeDecodeError:
+            encoding, stored = "base64", base64.b64encode(body).decode("ascii")
+
+        source = source_of(url)
+        with self._lock:
+            cassette = self._load(source)
+            cassette["interactions"][key] = {
+                "method": method.upper(),
+                "url": _public_url(response.request.url if response.request else url),
+                "status": response.status_code,
+                "headers": {name: value for name, value in response.headers.items() if name.lower() not in SKIPPED_HEADERS},
+                "encoding": encoding,
+                "body": stored,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+            }
+            self._save(source, cassette)
+
+    def _load(self, source: str) -> Dict[str, Any]:
+        cassette = self._cassettes.get(source)
+        if cassette is None:
+            path = self.path(source)
+            if path.exists():
+                cassette = json.loads(path.read_text(encoding="utf-8"))
+                if cassette.get("format_version") != FORMAT_VERSION:
+                    raise ValueError(f"Cassette {path} has format version {cassette.get('format_version')}, expected {FORMAT_VERSION}; record it again")
+            else:
+                cassette = {"format_version": FORMAT_VERSION, "source": source, "interactions": {}}
+            self._cassettes[source] = cassette
+        return cassette
+
+    def _save(self, source: str, cassette: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first so an interrupted recording never leaves a broken cassette
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            json.dump(cassette, f, indent=1, sort_keys=True, ensure_ascii=False)
+        os.replace(temp_path, self.path(source))
+
+def _response(prepared: requests.PreparedRequest, status: int, headers: Dict[str, str], body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.url = prepared.url
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.request = prepared
+    response._content = body
+    response._content_consumed = True  # no connection to release on close()
+    response.from_cache = False
+    return response
+
+_library: Optional[CassetteLibrary] = None
+_configured = False
+_library_lock = threading.Lock()
+
+def get_cassettes() -> Optional[CassetteLibrary]:
+    """
+    Process-wide cassettes configured from the environment, None when off.
+    """
+    global _library, _configured
+    with _library_lock:
+        if not _configured:
+            mode = os.getenv("HTTP_CASSETTE_MODE", "off").strip().lower()
+            if mode not in MODES:
+                raise ValueError(f"Unknown HTTP_CASSETTE_MODE '{mode}', expected one of {', '.join(MODES)}")
+            if mode != "off":
+                seed = os.getenv("HTTP_CASSETTE_SEED")
+                _library = CassetteLibrary(
+                    os.getenv("HTTP_CASSETTE_DIR", str(DEFAULT_CASSETTE_DIR)),
+                    mode,
+                    profile=parse_profile(os.getenv("HTTP_CASSETTE_PROFILE", "none")),
+                    seed=int(seed) if seed else None
+                )
+            _configured = True
+        return _library
+
+def use_cassettes(library: Optional[CassetteLibrary]) -> None:
+    """
+    Replace the process-wide cassettes, e.g. to switch profiles in a benchmark.
+    """
+    global _library, _configured
+    with _library_lock:
+        _library = library
+        _configured = True
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect recorded API cassettes")
+    parser.add_argument("command", choices=["list"])
+    parser.add_argument("--dir", default=os.getenv("HTTP_CASSETTE_DIR", str(DEFAULT_CASSETTE_DIR)))
+    args = parser.parse_args()
+
+    paths = sorted(Path(args.dir).glob("*.json"))
+    if not paths:
+        print(f"No cassettes in {args.dir}")
+        return
+    print(f"{'source':<20} {'interactions':>12} {'size':>10}  last recorded")
+    for path in paths:
+        cassette = json.loads(path.read_text(encoding="utf-8"))
+        interactions = cassette.get("interactions", {})
+        recorded = max((item.get("recorded_at", "") for item in interactions.values()), default="")
+        print(f"{path.stem:<20} {len(interactions):>12} {path.stat().st_size / 1024:>8.0f}KB  {recorded}")
+
+if __name__ == "__main__":
+    main()
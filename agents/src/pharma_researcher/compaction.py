@@ -0,0 +1,188 @@
+"""
+Token-budgeted compaction of tool outputs.
+
+Research tools return whole API payloads (full label sections, complete
+ClinicalTrials.gov studies, raw XML next to its parsed form), and all of it
+lands in the agent's context. Before a tool result is handed to the agent
+it is compacted to the tool's token budget:
+
+1. Raw duplicates (e.g. xml_raw next to parsed articles) are dropped.
+2. Lists of records are projected to the fields the agent asked for.
+3. Long lists are cut to their first items, with a count of the rest, and
+   long strings are truncated. Limits are tightened step by step until the
+   output fits the budget.
+
+The full output of a compacted call is kept in a bounded in-memory store
+and can be fetched back with the tool_output_lookup tool by its handle.
+
+Settings (environment):
+    TOOL_OUTPUT_BUDGET_DEFAULT: token budget of tools without their own (default 2000)
+    TOOL_OUTPUT_BUDGETS: per-tool overrides, "tool_name=tokens,...";
+        0 disables compaction for a tool
+    TOOL_OUTPUT_HANDLES_MAX: full outputs kept for lookup (default 256)
+"""
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_BUDGET = 2000
+DEFAULT_HANDLES_MAX = 256
+CHARS_PER_TOKEN = 4  # rough average for English text and JSON
+
+# Budgets of tools whose outputs are worth more context than the default
+TOOL_OUTPUT_BUDGETS: Dict[str, int] = {
+    "fda_product_label_tool": 3000,
+    "clinical_trials_api_tool": 3000,
+    "ncbi_entrez_tool": 2500,
+    "patents_view_api_tool": 2500,
+    "tool_output_lookup": 4000,
+    "batch_tool_call": 8000,  # holds several outputs, each compacted to its own budget
+}
+
+# Keys holding an unparsed copy of data the output also contains parsed
+RAW_KEYS = ("xml_raw", "raw_xml", "raw_response")
+
+# Successively tighter limits: (list items kept, characters per string)
+COMPACTION_STEPS: List[Tuple[int, int]] = [(20, 2000), (10, 1000), (5, 500), (3, 250), (1, 120)]
+
+NOTE_KEY = "_compaction"
+
+def estimate_tokens(value: Any) -> int:
+    return len(to_text(value)) // CHARS_PER_TOKEN
+
+def to_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, ensure_ascii=False)
+
+def get_budget(tool_name: str) -> int:
+    budgets = dict(TOOL_OUTPUT_BUDGETS)
+    for item in filter(None, (part.strip() for part in os.getenv("TOOL_OUTPUT_BUDGETS", "").split(","))):
+        name, _, tokens = item.partition("=")
+        budgets[name.strip()] = int(tokens)
+    return budgets.get(tool_name, int(os.getenv("TOOL_OUTPUT_BUDGET_DEFAULT", DEFAULT_BUDGET)))
+
+class HandleStore:
+    """
+    Bounded LRU store of full tool outputs, shared by every crew of the process.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, tool_name: str, value: Any) -> str:
+        handle = f"{tool_name}:{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self._entries[handle] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[Any]:
+        with self._lock:
+            value = self._entries.get(handle)
+            if value is not None:
+                self._entries.move_to_end(handle)
+            return value
+
+handle_store = HandleStore(int(os.getenv("TOOL_OUTPUT_HANDLES_MAX", DEFAULT_HANDLES_MAX)))
+
+def drop_raw_duplicates(value: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop raw payload keys when the output has parsed records or sections
+    as well.
+    """
+    parsed = [key for key, item in value.items() if key not in RAW_KEYS and isinstance(item, (dict, list))]
+    if not parsed:
+        return value
+    return {key: item for key, item in value.items() if key not in RAW_KEYS}
+
+def _lookup(item: Dict[str, Any], field: str) -> Tuple[bool, Any]:
+    if field in item:
+        return True, item[field]
+    value: Any = item
+    for part in field.split("."):
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+def project_records(records: List[Any], fields: List[str]) -> List[Any]:
+    """
+    Keep only the requested fields (names or dotted paths) of each record.
+    Records are left whole when none of the fields exist in them.
+    """
+    projected = []
+    for record in records:
+        if not isinstance(record, dict):
+            return records
+        kept = {}
+        for field in fields:
+            found, value = _lookup(record, field)
+            if found:
+                kept[field] = value
+        projected.append(kept)
+    return projected if any(projected) else records
+
+def _shrink(value: Any, max_items: int, max_chars: int, depth: int = 0) -> Any:
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return value[:max_chars] + f"... [truncated {len(value) - max_chars} chars]"
+        return value
+    if isinstance(value, dict):
+        return {key: item if key == NOTE_KEY else _shrink(item, max_items, max_chars, depth + 1) for key, item in value.items()}
+    if isinstance(value, list):
+        # Nested lists are less likely to be what the agent is after
+        keep = max_items if depth <= 1 else max(1, max_items // 2)
+        shrunk = [_shrink(item, max_items, max_chars, depth + 1) for item in value[:keep]]
+        if len(value) > keep:
+            shrunk.append(f"... {len(value) - keep} more of {len(value)} items")
+        return shrunk
+    return value
+
+def compact_output(tool_name: str, output: Any, fields: Optional[List[str]] = None, budget: Optional[int] = None, store: bool = True) -> Any:
+    """
+    Compact a tool output to the tool's token budget.
+    Outputs within budget are returned unchanged.
+    """
+    budget = get_budget(tool_name) if budget is None else budget
+    if budget <= 0 or estimate_tokens(output) <= budget:
+        return output
+
+    if isinstance(output, str):
+        compacted: Any = _shrink(output, 0, budget * CHARS_PER_TOKEN)
+    else:
+        compacted = output
+        if isinstance(compacted, dict):
+            compacted = drop_raw_duplicates(compacted)
+            if fields:
+                compacted = {
+                    key: project_records(item, fields) if isinstance(item, list) else item
+                    for key, item in compacted.items()
+                }
+        if estimate_tokens(compacted) > budget:
+            base = compacted
+            for max_items, max_chars in COMPACTION_STEPS:
+                compacted = _shrink(base, max_items, max_chars)
+                if estimate_tokens(compacted) <= budget:
+                    break
+
+    note = {
+        "original_tokens": estimate_tokens(output),
+        "compacted_tokens": estimate_tokens(compacted),
+    }
+    if store:
+        note["full_output_handle"] = handle_store.put(tool_name, output)
+        note["hint"] = "Call tool_output_lookup with this handle for the omitted data"
+
+    if isinstance(compacted, dict):
+        # Never add the note to the stored full output
+        return {**compacted, NOTE_KEY: note}
+    return {"output": compacted, NOTE_KEY: note}
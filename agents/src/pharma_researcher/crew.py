@@ -1,8 +1,20 @@
+import os
+import uuid
+from datetime import datetime
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai_tools import SerperDevTool, CodeInterpreterTool
-from typing import List
+from typing import Dict, List, Optional, Type
+from crewai.tasks.task_output import TaskOutput
+from crewai.tools import BaseTool
+from crewai.utilities.constants import NOT_SPECIFIED
 from pharma_researcher import schemas
+from pharma_researcher.instrumentation import InstrumentedLLM
+from pharma_researcher.llm_cache import CachedLLM, get_llm_cache, is_llm_cache_enabled
+from pharma_researcher.llms import DelegatingLLM
+from pharma_researcher.routing import RoutingDecision
+from pharma_researcher.run_control import ControlledLLM
+from pharma_researcher.scheduling import ScheduledTask, assign_slots, get_process_mode, schedule_tasks, task_context
 from .tools.FDAAdverseEventsTool import FDAAdverseEventsTool
 from .tools.FDADrugsFDATool import FDADrugsFDATool
 from .tools.FDAEnforcementTool import FDAEnforcementTool
@@ -17,6 +29,125 @@ from .tools.EXIMTool import EXIMTool
 from .tools.ChEMBLTool import ChEMBLTool
 from .tools.OpenTargetsTool import OpenTargetsTool
 from .tools.OpenTargetsDrugIndicationTool import OpenTargetsDrugIndicationTool
+from .tools.ToolOutputLookupTool import ToolOutputLookupTool
+from .tools.BatchToolCallTool import BatchToolCallTool
+
+# Tools hold no per-run state, so one instance of each is shared by every agent and crew
+_shared_tools: Dict[Type[BaseTool], BaseTool] = {}
+
+def shared_tool(tool_class: Type[BaseTool]) -> BaseTool:
+    tool = _shared_tools.get(tool_class)
+    if tool is None:
+        tool = _shared_tools.setdefault(tool_class, tool_class())
+    return tool
+
+def research_tools(*tool_classes: Type[BaseTool]) -> List[BaseTool]:
+    """
+    Shared instances of a research agent's tools, with tool_output_lookup and
+    a batch_tool_call that runs several calls of them at once.
+    """
+    tools = [shared_tool(tool_class) for tool_class in tool_classes] + [shared_tool(ToolOutputLookupTool)]
+    return tools + [BatchToolCallTool(tools=tools)]
+
+def assign_output_files(tasks: List[Task]) -> None:
+    """
+    Write task outputs to a directory of their own for this run, if
+    CREW_OUTPUT_DIR is set. By default outputs are only kept in memory
+    and handed to the caller through the crew's task callback.
+    """
+    output_dir = os.getenv("CREW_OUTPUT_DIR")
+    if not output_dir:
+        return
+
+    run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+    for task in tasks:
+        task.output_file = os.path.join(output_dir, run_id, f"{task.name}.md")
+
+def new_run(
+    template: Crew,
+    routing: Optional[RoutingDecision] = None,
+    completed: Optional[Dict[str, str]] = None
+) -> Crew:
+    """
+    Copy a crew built by PharmaResearcher().crew() for a new run.
+
+    Agents and tasks are cloned, tools are shared and per-run state
+    (concurrency slots, output directory) is fresh. With a routing
+    decision, research tasks it leaves out are dropped along with their
+    agents and removed from the context of the remaining tasks. With the
+    outputs of tasks completed by an earlier run of the same query, the
+    run resumes after them (see resume_tasks). The template itself must
+    never be kicked off.
+    """
+    crew = template.copy()
+    if routing is not None and not routing.full:
+        prune_tasks(crew, routing)
+    if completed:
+        resume_tasks(crew, completed)
+    assign_output_files(crew.tasks)
+    assign_slots(crew.tasks)
+    return crew
+
+def prune_tasks(crew: Crew, routing: RoutingDecision) -> None:
+    tasks = [task for task in crew.tasks if routing.includes(task.name)]
+    for task in tasks:
+        context = task_context(task)
+        if context:
+            task.context = [dependency for dependency in context if dependency in tasks]
+
+    agents = []
+    for task in tasks:
+        if task.agent is not None and task.agent not in agents:
+            agents.append(task.agent)
+
+    crew.tasks = tasks
+    crew.agents = agents
+
+def resume_tasks(crew: Crew, completed: Dict[str, str]) -> List[str]:
+    """
+    Skip the tasks that already completed in an earlier run.
+
+    Each completed task gets its stored output back and is removed from the
+    crew, so the tasks that take it as context read the stored output. The
+    remaining tasks are scheduled again. The last task always runs, so the
+    crew still ends with the final report. Returns the names of the skipped
+    tasks.
+    """
+    done = [task for task in crew.tasks[:-1] if task.name in completed]
+    if not done:
+        return []
+
+    for task in done:
+        task.output = TaskOutput(
+            name=task.name,
+            description=task.description,
+            expected_output=task.expected_output,
+            raw=completed[task.name],
+            agent=task.agent.role if task.agent else ""
+        )
+
+    remaining = [task for task in crew.tasks if task not in done]
+    for index, task in enumerate(crew.tasks):
+        # Without declared context a sync task reads the outputs produced
+        # earlier in the same run, which would leave out the restored ones.
+        # Async tasks read no earlier outputs and must stay unconnected, or
+        # they would be scheduled one after another.
+        if (
+            task in remaining
+            and not task.async_execution
+            and task.context is NOT_SPECIFIED
+            and any(previous in done for previous in crew.tasks[:index])
+        ):
+            task.context = crew.tasks[:index]
+
+    agents = []
+    for task in remaining:
+        if task.agent is not None and task.agent not in agents:
+            agents.append(task.agent)
+
+    crew.tasks = schedule_tasks(remaining)
+    crew.agents = agents
+    return [task.name for task in done]
 
 
 @CrewBase
@@ -33,56 +164,56 @@ class PharmaResearcher():
         return Agent(
             config=self.agents_config['market_insights_agent'], 
             verbose = True, 
-            tools=[SerperDevTool(), FDAAdverseEventsTool(), FDADrugsFDATool(), FDAEnforcementTool(), FDANDCTool(), FDAProductLabelTool(), EMAMedicinesTool(), EMAMedicineShortagesTool()])
+            tools=research_tools(SerperDevTool, FDAAdverseEventsTool, FDADrugsFDATool, FDAEnforcementTool, FDANDCTool, FDAProductLabelTool, EMAMedicinesTool, EMAMedicineShortagesTool))
     
     @agent
     def exim_trends_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['exim_trends_agent'], 
             verbose = True, 
-            tools=[EXIMTool(), SerperDevTool()])
+            tools=research_tools(EXIMTool, SerperDevTool))
     
     @agent
     def patent_landscape_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['patent_landscape_agent'], 
             verbose = True, 
-            tools=[PatentsViewTool(), SerperDevTool()])
+            tools=research_tools(PatentsViewTool, SerperDevTool))
     
     @agent
     def clinical_trials_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['clinical_trials_agent'], 
             verbose = True, 
-            tools=[ClinicalTrialsTool(), SerperDevTool()])
+            tools=research_tools(ClinicalTrialsTool, SerperDevTool))
     
     @agent
     def web_intelligence_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['web_intelligence_agent'], 
             verbose = True, 
-            tools=[SerperDevTool(), NCBIEntrezTool()])
+            tools=research_tools(SerperDevTool, NCBIEntrezTool))
     
     @agent
     def chembl_insights_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['chembl_insights_agent'],
             verbose=True,
-            tools=[ChEMBLTool(), SerperDevTool()])
+            tools=research_tools(ChEMBLTool, SerperDevTool))
     
     @agent
     def open_targets_research_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['open_targets_research_agent'],
             verbose=True,
-            tools=[OpenTargetsTool(), SerperDevTool()])
+            tools=research_tools(OpenTargetsTool, SerperDevTool))
     
     @agent
     def open_targets_drug_indication_agent(self) -> Agent:
         return Agent(
             config=self.agents_config['open_targets_drug_indication_agent'],
             verbose=True,
-            tools=[OpenTargetsDrugIndicationTool(), SerperDevTool()])
+            tools=research_tools(OpenTargetsDrugIndicationTool, SerperDevTool))
     
     @agent
     def report_title_generator_agent(self) -> Agent:
@@ -119,79 +250,79 @@ class PharmaResearcher():
 
     @task
     def market_insights_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['market_insights_task'], # type: ignore[index]
         )
     
     @task
     def exim_trade_analysis_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['exim_trade_analysis_task'], # type: ignore[index]
         )
     
     @task
     def patent_landscape_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['patent_landscape_task'], # type: ignore[index]
         )
     
     @task
     def clinical_trials_pipeline_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['clinical_trials_pipeline_task'], # type: ignore[index]
         )
     
     @task
     def web_intelligence_scan_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['web_intelligence_scan_task'], # type: ignore[index]
         )
     
     @task
     def chembl_insights_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['chembl_insights_task'] # type: ignore[index]
         )
     
     @task
     def open_targets_research_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['open_targets_research_task'] # type: ignore[index]
         )
     
     @task
     def open_targets_drug_indication_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['open_targets_drug_indication_task'] # type: ignore[index]
         )
     
     @task
     def generate_report_title_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['generate_report_title_task'] # type: ignore[index]
         )
     
     @task
     def generate_report_abstract_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['generate_report_abstract_task'] # type: ignore[index]
         )
     
     @task
     def generate_report_body_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['generate_report_body_task'] # type: ignore[index]
         )
     
     @task
     def generate_visualizations_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['generate_visualizations_task'] # type: ignore[index]
         )
     
     @task
     def generate_final_report_task(self) -> Task:
-        return Task(
+        return ScheduledTask(
             config=self.tasks_config['generate_final_report_task'], # type: ignore[index]
         )
 
@@ -200,10 +331,28 @@ class PharmaResearcher():
     def crew(self) -> Crew:
         """Creates the PharmaResearcher crew"""
         
+        assign_output_files(self.tasks)
+        self._wrap_llms()
+        
+        # In DAG mode independent tasks run concurrently, see scheduling.py
         return Crew(
             agents=self.agents,
-            tasks=self.tasks,
+            tasks=schedule_tasks(self.tasks, get_process_mode()),
             process=Process.sequential,
             max_retry_limit=2,  # Prevent infinite retry loops
             verbose=True
         )
+
+    def _wrap_llms(self) -> None:
+        """
+        Instrument every agent's LLM, make it stop with its run (see
+        run_control) and, if enabled, answer repeated prompts from the LLM
+        completion cache.
+        """
+        cache = get_llm_cache() if is_llm_cache_enabled() else None
+        for name in self.agents_config:
+            agent = getattr(self, name)()
+            if isinstance(agent.llm, DelegatingLLM):
+                continue
+            llm = CachedLLM(agent.llm, cache, name) if cache else agent.llm
+            agent.llm = InstrumentedLLM(ControlledLLM(llm), name)
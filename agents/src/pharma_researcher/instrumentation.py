@@ -0,0 +1,242 @@
+"""
+Timing, token and cost instrumentation of crew runs.
+
+Every LLM call and tool call of a run is turned into a Span and handed to
+the sink given to instrument_crew():
+
+- LLM calls are timed by an InstrumentedLLM wrapped around each agent's
+  LLM. Token counts come from the provider's usage report, and the cost
+  is estimated from MODEL_PRICES.
+- Tool calls are taken from crewai's tool usage events, which carry the
+  call's timing, retry count and whether it was answered from the
+  agent's tool cache.
+
+Runs that are not instrumented (no sink) pay only for the wrapper call.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from crewai import Crew, Task
+from crewai.events import crewai_event_bus
+from crewai.events.types.tool_usage_events import (
+    ToolUsageErrorEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageStartedEvent,
+)
+from crewai.llms.base_llm import BaseLLM
+from pharma_researcher.llms import DelegatingLLM
+
+logger = logging.getLogger(__name__)
+
+# USD per million prompt and completion tokens
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+}
+
+@dataclass
+class Span:
+    kind: str  # "llm" or "tool"
+    name: str  # model or tool name
+    task_name: Optional[str]
+    agent: Optional[str]
+    started_at: datetime  # UTC
+    duration_ms: float
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    cost_usd: Optional[float] = None
+    attempts: int = 1
+    response_size: Optional[int] = None  # characters returned
+    cached: bool = False
+    error: Optional[str] = None
+
+SpanSink = Callable[[Span], None]
+
+def estimate_cost(model: str, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> Optional[float]:
+    prices = MODEL_PRICES.get(model.rsplit("/", 1)[-1])
+    if prices is None or prompt_tokens is None or completion_tokens is None:
+        return None
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+def _innermost(llm: BaseLLM) -> BaseLLM:
+    while isinstance(llm, DelegatingLLM):
+        llm = llm.llm
+    return llm
+
+class InstrumentedLLM(DelegatingLLM):
+    """
+    LLM that reports a Span for every call to its sink, if it has one.
+    """
+
+    def __init__(self, llm: BaseLLM, agent_name: str):
+        super().__init__(llm)
+        self.agent_name = agent_name
+        self.sink: Optional[SpanSink] = None
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        if self.sink is None:
+            return super().call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+
+        usage = getattr(_innermost(self.llm), "_token_usage", None)
+        before = dict(usage) if isinstance(usage, dict) else None
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = super().call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+            return response
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            self._report(from_task, started_at, time.perf_counter() - started, before, usage, response, error)
+
+    def _report(self, task, started_at, elapsed, before, usage, response, error) -> None:
+        prompt_tokens = completion_tokens = None
+        if before is not None:
+            prompt_tokens = usage.get("prompt_tokens", 0) - before.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0) - before.get("completion_tokens", 0)
+
+        span = Span(
+            kind="llm",
+            name=self.model,
+            task_name=getattr(task, "name", None),
+            agent=self.agent_name,
+            started_at=started_at,
+            duration_ms=elapsed * 1000,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cost_usd=estimate_cost(self.model, prompt_tokens, completion_tokens),
+            response_size=len(response) if isinstance(response, str) else None,
+            cached=bool(getattr(self.llm, "last_call_cached", False)),
+            error=error
+        )
+        try:
+            self.sink(span)
+        except Exception as e:
+            logger.warning(f"Failed to record LLM span: {e}")
+
+class ToolSpanCollector:
+    """
+    Turns crewai tool usage events of registered tasks into spans for
+    their run's sink. The event bus is process-wide, so runs are told
+    apart by the ids of their (copied) tasks.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Tuple[SpanSink, str, Optional[str]]] = {}  # task id -> (sink, task, agent)
+        self._started: Dict[str, datetime] = {}  # task id -> start of its current tool call
+        self._lock = threading.Lock()
+        self._subscribed = False
+
+    def register(self, tasks: Iterable[Task], sink: SpanSink) -> None:
+        with self._lock:
+            if not self._subscribed:
+                crewai_event_bus.on(ToolUsageStartedEvent)(self._on_started)
+                crewai_event_bus.on(ToolUsageFinishedEvent)(self._on_finished)
+                crewai_event_bus.on(ToolUsageErrorEvent)(self._on_error)
+                self._subscribed = True
+            for task in tasks:
+                agent_name = getattr(task.agent.llm, "agent_name", task.agent.role) if task.agent else None
+                self._tasks[str(task.id)] = (sink, task.name, agent_name)
+
+    def unregister(self, tasks: Iterable[Task]) -> None:
+        with self._lock:
+            for task in tasks:
+                self._tasks.pop(str(task.id), None)
+                self._started.pop(str(task.id), None)
+
+    def _on_started(self, source, event: ToolUsageStartedEvent) -> None:
+        with self._lock:
+            if event.task_id in self._tasks:
+                self._started[event.task_id] = datetime.utcnow()
+
+    def _on_finished(self, source, event: ToolUsageFinishedEvent) -> None:
+        with self._lock:
+            target = self._tasks.get(event.task_id)
+            self._started.pop(event.task_id, None)
+        if target is None:
+            return
+
+        # Event times are local, only their difference matters
+        elapsed = event.finished_at - event.started_at
+        output = event.output if isinstance(event.output, str) else str(event.output)
+        self._emit(target, Span(
+            kind="tool",
+            name=event.tool_name,
+            task_name=target[1],
+            agent=target[2],
+            started_at=datetime.utcnow() - elapsed,
+            duration_ms=elapsed.total_seconds() * 1000,
+            attempts=event.run_attempts or 1,
+            response_size=len(output),
+            cached=event.from_cache
+        ))
+
+    def _on_error(self, source, event: ToolUsageErrorEvent) -> None:
+        with self._lock:
+            target = self._tasks.get(event.task_id)
+            started_at = self._started.pop(event.task_id, None)
+        if target is None:
+            return
+
+        now = datetime.utcnow()
+        started_at = started_at or now
+        self._emit(target, Span(
+            kind="tool",
+            name=event.tool_name,
+            task_name=target[1],
+            agent=target[2],
+            started_at=started_at,
+            duration_ms=(now - started_at) / timedelta(milliseconds=1),
+            attempts=event.run_attempts or 1,
+            error=str(event.error)
+        ))
+
+    @staticmethod
+    def _emit(target, span: Span) -> None:
+        try:
+            target[0](span)
+        except Exception as e:
+            logger.warning(f"Failed to record tool span: {e}")
+
+tool_spans = ToolSpanCollector()
+
+def instrument_crew(crew: Crew, sink: SpanSink) -> None:
+    """
+    Report the LLM and tool calls of a crew run to sink.
+    The crew must be a per-run copy, see crew.new_run().
+    """
+    for agent in crew.agents:
+        if isinstance(agent.llm, InstrumentedLLM):
+            agent.llm.sink = sink
+    tool_spans.register(crew.tasks, sink)
+
+def release_crew(crew: Crew) -> None:
+    """
+    Stop reporting for a crew instrumented with instrument_crew().
+    """
+    for agent in crew.agents:
+        if isinstance(agent.llm, InstrumentedLLM):
+            agent.llm.sink = None
+    tool_spans.unregister(crew.tasks)
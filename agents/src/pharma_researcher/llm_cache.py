@@ -0,0 +1,263 @@
+"""
+Persistent cache of LLM completions for the crew's agents.
+
+Agents resend byte-identical prompts when a failed run is retried, a run is
+replayed or a near-identical question comes in. With the cache enabled each
+agent's LLM is wrapped in a CachedLLM that answers those prompts from a
+local SQLite file instead of calling the model again.
+
+Entries are keyed by model, messages, tool schemas, response model, stop
+words and temperature. When the file grows past its size limit the least
+recently used entries are evicted. Hit and miss counters are kept per
+agent in the same file.
+
+Settings (environment):
+    LLM_CACHE_ENABLED: "true" to enable the cache (default off)
+    LLM_CACHE_PATH: SQLite file (default .cache/llm_cache.sqlite3)
+    LLM_CACHE_MAX_MB: size limit of the cached responses (default 256)
+
+Inspect or clear the cache with:
+    python -m pharma_researcher.llm_cache stats
+    python -m pharma_researcher.llm_cache clear
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from crewai.llms.base_llm import BaseLLM
+from pharma_researcher.llms import DelegatingLLM
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+DEFAULT_MAX_MB = 256
+
+def is_llm_cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+class LLMCache:
+    """
+    Size-bounded SQLite store of completions, safe to share between threads
+    and worker processes.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS completions (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_completions_accessed_at ON completions (accessed_at)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS agent_stats (
+                agent TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM completions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE completions SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return row[0]
+
+    def set(self, key: str, model: str, response: str) -> None:
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO completions (key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM completions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until the store fits again
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM completions ORDER BY accessed_at"):
+            doomed.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM completions WHERE key = ?", doomed)
+
+    def record(self, agent: str, hit: bool) -> None:
+        column = "hits" if hit else "misses"
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO agent_stats (agent, {column}) VALUES (?, 1) "
+                f"ON CONFLICT(agent) DO UPDATE SET {column} = {column} + 1",
+                (agent,)
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM completions").fetchone()
+            agents = {
+                agent: {"hits": hits, "misses": misses}
+                for agent, hits, misses in self._conn.execute("SELECT agent, hits, misses FROM agent_stats ORDER BY agent")
+            }
+        return {"entries": entries, "size_bytes": size, "max_bytes": self.max_bytes, "agents": agents}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM completions")
+            self._conn.execute("DELETE FROM agent_stats")
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMCache:
+    """
+    Process-wide cache configured from the environment.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            path = os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH)
+            max_mb = float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            _cache = LLMCache(path, int(max_mb * 1024 * 1024))
+        return _cache
+
+def _schema(model: Any) -> Any:
+    if model is None:
+        return None
+    if hasattr(model, "model_json_schema"):
+        return model.model_json_schema()
+    return repr(model)
+
+def cache_key(
+    model: str,
+    messages: Any,
+    tools: Optional[List[dict]] = None,
+    response_model: Any = None,
+    stop: Optional[List[str]] = None,
+    temperature: Optional[float] = None
+) -> str:
+    tools_hash = hashlib.sha256(json.dumps(tools or [], sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    payload = {
+        "model": model,
+        "messages": messages,
+        "tools": tools_hash,
+        "response_model": _schema(response_model),
+        "stop": sorted(stop or []),
+        "temperature": temperature
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class CachedLLM(DelegatingLLM):
+    """
+    LLM that answers repeated prompts from an LLMCache and delegates
+    everything else to the wrapped LLM.
+
+    Calls that let the model execute functions directly are never cached,
+    since replaying them would skip the function's side effects.
+    """
+
+    def __init__(self, llm: BaseLLM, cache: LLMCache, agent_name: str):
+        super().__init__(llm)
+        self.cache = cache
+        self.agent_name = agent_name
+        self.last_call_cached = False  # whether the latest call was answered from the cache
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        self.last_call_cached = False
+        if available_functions or getattr(self.llm, "stream", False):
+            return super().call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                from_task=from_task, from_agent=from_agent, response_model=response_model
+            )
+
+        key = cache_key(self.llm.model, messages, tools, response_model, self.llm.stop, self.llm.temperature)
+        try:
+            cached = self.cache.get(key)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache lookup failed: {e}")
+            cached = None
+
+        if cached is not None:
+            self._record(hit=True)
+            self.last_call_cached = True
+            return cached
+
+        self._record(hit=False)
+        response = super().call(
+            messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+            from_task=from_task, from_agent=from_agent, response_model=response_model
+        )
+        if isinstance(response, str) and response:
+            try:
+                self.cache.set(key, self.llm.model, response)
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache write failed: {e}")
+        return response
+
+    def _record(self, hit: bool) -> None:
+        try:
+            self.cache.record(self.agent_name, hit)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache stats update failed: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the LLM completion cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+
+    cache = get_llm_cache()
+    if args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+        return
+
+    stats = cache.stats()
+    print(f"{cache.path}: {stats['entries']} entries, {stats['size_bytes'] / 1024 / 1024:.1f} of "
+          f"{stats['max_bytes'] / 1024 / 1024:.0f} MB")
+    print(f"\n{'agent':<40} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+    for agent, counts in stats["agents"].items():
+        total = counts["hits"] + counts["misses"]
+        rate = counts["hits"] / total if total else 0
+        print(f"{agent:<40} {counts['hits']:>8} {counts['misses']:>8} {rate:>8.0%}")
+
+if __name__ == "__main__":
+    main()
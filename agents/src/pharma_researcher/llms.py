@@ -0,0 +1,86 @@
+"""
+Base for LLM wrappers that add behaviour around the LLM crewai builds for
+an agent (native provider client or litellm).
+"""
+import copy
+from typing import Any, List, Optional, Type, TypeVar
+from crewai.llms.base_llm import BaseLLM
+
+LLMType = TypeVar("LLMType", bound=BaseLLM)
+
+class DelegatingLLM(BaseLLM):
+    """
+    LLM that forwards everything to a wrapped LLM. Subclasses override
+    call() to add behaviour around it.
+    """
+
+    def __init__(self, llm: BaseLLM):
+        self.llm = llm
+        super().__init__(
+            model=llm.model,
+            temperature=llm.temperature,
+            provider=getattr(llm, "provider", None),
+            stop=llm.stop
+        )
+
+    @property
+    def stop(self) -> List[str]:
+        return self.llm.stop
+
+    @stop.setter
+    def stop(self, value: List[str]) -> None:
+        # Agents set their stop words on the LLM they are given
+        self.llm.stop = value
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes not found on the wrapper itself
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    def __copy__(self) -> "DelegatingLLM":
+        # Agent copies get their own underlying LLM, with its own stop
+        # words and token usage counters
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.llm = copy.copy(self.llm)
+        if not isinstance(clone.llm, DelegatingLLM) and isinstance(getattr(clone.llm, "_token_usage", None), dict):
+            clone.llm._token_usage = {key: 0 for key in clone.llm._token_usage}
+        return clone
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        return self.llm.call(
+            messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+            from_task=from_task, from_agent=from_agent, response_model=response_model
+        )
+
+    def supports_function_calling(self) -> bool:
+        return self.llm.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.llm.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.llm.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.llm.get_token_usage_summary()
+
+def find_llm(llm: BaseLLM, llm_class: Type[LLMType]) -> Optional[LLMType]:
+    """
+    The first LLM of the given class in a chain of wrappers, if any.
+    """
+    while not isinstance(llm, llm_class):
+        if not isinstance(llm, DelegatingLLM):
+            return None
+        llm = llm.llm
+    return llm
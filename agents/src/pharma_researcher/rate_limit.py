@@ -0,0 +1,223 @@
+"""
+Shared per-host rate limiting for the upstream APIs called by the tools.
+
+crewai's max_rpm only limits one agent of one crew, so concurrent crews
+multiply the request rate seen by each API. Every HTTP request made through
+pharma_researcher.tools.http first takes a slot from the token bucket of
+its host. Buckets are shared by all crews of the process, or by all
+processes on the host with the SQLite backend.
+
+Requests over the rate queue (first come, first served) instead of
+failing. A request only fails when its wait would exceed
+RATE_LIMIT_MAX_WAIT_SECONDS.
+
+Settings (environment):
+    RATE_LIMITS: per-host overrides, "host=rate[:burst],..." in requests per
+        second, e.g. "api.fda.gov=2,comtradeapi.un.org=0.5:1"
+    RATE_LIMIT_DEFAULT: requests per second for hosts without a limit (default 5)
+    RATE_LIMIT_MAX_WAIT_SECONDS: longest a request queues (default 60)
+    RATE_LIMIT_BACKEND: "memory" (default) or "sqlite" to share buckets
+        between processes
+    RATE_LIMIT_DB_PATH: SQLite file for the sqlite backend
+        (default .cache/rate_limits.sqlite3)
+"""
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = 5.0
+DEFAULT_MAX_WAIT_SECONDS = 60.0
+DEFAULT_DB_PATH = os.path.join(".cache", "rate_limits.sqlite3")
+
+@dataclass(frozen=True)
+class Limit:
+    rate: float  # requests per second
+    burst: int = 1  # requests allowed back to back
+
+# Published limits of the upstream APIs, for clients without an API key
+DEFAULT_LIMITS: Dict[str, Limit] = {
+    "api.fda.gov": Limit(4, 4),  # 240 requests per minute
+    "comtradeapi.un.org": Limit(1, 1),  # 1 request per second
+    "eutils.ncbi.nlm.nih.gov": Limit(3, 3),  # 3 per second, 10 with an API key
+    "search.patentsview.org": Limit(0.75, 1),  # 45 requests per minute
+    "clinicaltrials.gov": Limit(5, 5),
+    "www.ebi.ac.uk": Limit(5, 5),
+    "api.platform.opentargets.org": Limit(5, 5),
+}
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request would have to queue longer than allowed.
+    """
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    """
+    Parse "host=rate[:burst],..." into limits per host.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        host, _, value = item.partition("=")
+        rate, _, burst = value.partition(":")
+        try:
+            limits[host.strip().lower()] = Limit(float(rate), int(burst) if burst else 1)
+        except ValueError:
+            raise ValueError(f"Invalid RATE_LIMITS entry '{item}', expected host=rate[:burst]")
+    return limits
+
+def configured_limits() -> Dict[str, Limit]:
+    limits = dict(DEFAULT_LIMITS)
+    if os.getenv("ENTREZ_API_KEY"):
+        limits["eutils.ncbi.nlm.nih.gov"] = Limit(10, 10)
+    limits.update(parse_limits(os.getenv("RATE_LIMITS", "")))
+    return limits
+
+class MemoryBackend:
+    """
+    Bucket state of this process. Each host keeps its theoretical arrival
+    time (GCRA): the moment the bucket will be empty again.
+    """
+
+    def __init__(self):
+        self._arrivals: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, host: str, limit: Limit, max_wait: float) -> float:
+        """
+        Reserve the next slot for host and return how long to wait for it.
+        Raises RateLimitExceeded, without reserving, if that is over max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait, arrival = _next_slot(self._arrivals.get(host, now), now, limit)
+            if wait > max_wait:
+                raise RateLimitExceeded(f"Rate limit for {host} would delay the request by {wait:.1f}s")
+            self._arrivals[host] = arrival
+            return wait
+
+class SQLiteBackend:
+    """
+    Bucket state shared by every process using the same SQLite file.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS buckets (host TEXT PRIMARY KEY, arrival REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, host: str, limit: Limit, max_wait: float) -> float:
+        conn = self._connect()
+        # Wall clock, since monotonic clocks are not comparable across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            row = conn.execute("SELECT arrival FROM buckets WHERE host = ?", (host,)).fetchone()
+            wait, arrival = _next_slot(row[0] if row else now, now, limit)
+            if wait > max_wait:
+                raise RateLimitExceeded(f"Rate limit for {host} would delay the request by {wait:.1f}s")
+            conn.execute("INSERT OR REPLACE INTO buckets (host, arrival) VALUES (?, ?)", (host, arrival))
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+def _next_slot(arrival: float, now: float, limit: Limit) -> tuple:
+    """
+    Wait before the next request may go out, and the bucket's new arrival time.
+    """
+    interval = 1.0 / limit.rate
+    arrival = max(arrival, now)
+    wait = max(0.0, arrival - (limit.burst - 1) * interval - now)
+    return wait, arrival + interval
+
+class RateLimiter:
+    """
+    Token buckets keyed by upstream host.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Limit]] = None,
+        default: Optional[Limit] = None,
+        backend=None,
+        max_wait: float = DEFAULT_MAX_WAIT_SECONDS
+    ):
+        self.limits = limits if limits is not None else configured_limits()
+        self.default = default or Limit(DEFAULT_RATE, int(DEFAULT_RATE))
+        self.backend = backend or MemoryBackend()
+        self.max_wait = max_wait
+
+    def limit_for(self, host: str) -> Optional[Limit]:
+        limit = self.limits.get(host, self.default)
+        return limit if limit.rate > 0 else None
+
+    def reserve(self, url_or_host: str) -> float:
+        """
+        Reserve the next slot for the URL's host and return how long to wait for it.
+        """
+        host = (urlsplit(url_or_host).hostname or url_or_host).lower()
+        limit = self.limit_for(host)
+        if limit is None:
+            return 0.0
+        return self.backend.reserve(host, limit, self.max_wait)
+
+    def acquire(self, url_or_host: str) -> float:
+        """
+        Block until a request to the URL's host may be sent.
+        Returns the time waited in seconds.
+        """
+        wait = self.reserve(url_or_host)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, url_or_host: str) -> float:
+        """
+        acquire() for coroutines: waits without blocking the event loop.
+        """
+        wait = self.reserve(url_or_host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Process-wide limiter configured from the environment.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            backend_name = os.getenv("RATE_LIMIT_BACKEND", "memory").strip().lower()
+            if backend_name == "sqlite":
+                backend = SQLiteBackend(os.getenv("RATE_LIMIT_DB_PATH", DEFAULT_DB_PATH))
+            elif backend_name == "memory":
+                backend = MemoryBackend()
+            else:
+                raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend_name}', expected 'memory' or 'sqlite'")
+
+            default_rate = float(os.getenv("RATE_LIMIT_DEFAULT", DEFAULT_RATE))
+            _limiter = RateLimiter(
+                default=Limit(default_rate, max(1, int(default_rate))),
+                backend=backend,
+                max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", DEFAULT_MAX_WAIT_SECONDS))
+            )
+        return _limiter
@@ -0,0 +1,321 @@
+"""
+Persistent cache of upstream API responses for the research tools.
+
+The same lookups (a brand on Drugs@FDA, a ChEMBL molecule, an Open Targets
+disease) are fetched again by every user and every run. Successful
+responses of the tools' HTTP client (pharma_researcher.tools.http) are kept
+in a local SQLite file and served from there until they expire.
+
+Entries are keyed by method, URL, sorted query parameters and the
+normalized request body; credentials such as api_key are left out of the
+key. How long a response stays fresh depends on its source, matched on
+host and path prefix (SOURCE_TTLS): hours for adverse event counts, days
+for ChEMBL and Open Targets, weeks for patents. Sources without a TTL are
+not cached. When the file grows past its size limit the least recently
+used entries are evicted. Hit and miss counters are kept per source.
+
+Settings (environment):
+    TOOL_CACHE_ENABLED: "false" to disable the cache (default on)
+    TOOL_CACHE_PATH: SQLite file (default .cache/tool_cache.sqlite3)
+    TOOL_CACHE_MAX_MB: size limit of the cached responses (default 512)
+    TOOL_CACHE_TTLS: per-source overrides, "host[/path]=duration,..." with
+        durations like 30m, 6h, 7d or 2w; 0 disables caching for a source
+
+Inspect or clear the cache with:
+    python -m pharma_researcher.response_cache stats
+    python -m pharma_researcher.response_cache clear
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "tool_cache.sqlite3")
+DEFAULT_MAX_MB = 512
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+
+# Freshness of each source, by host and optional path prefix (longest match wins)
+SOURCE_TTLS: Dict[str, float] = {
+    "api.fda.gov/drug/event": 6 * HOUR,  # FAERS counts change with every quarterly load
+    "api.fda.gov/drug/enforcement": DAY,
+    "api.fda.gov/drug/drugsfda": WEEK,
+    "api.fda.gov/drug/label": WEEK,
+    "api.fda.gov/drug/ndc": WEEK,
+    "clinicaltrials.gov": DAY,
+    "eutils.ncbi.nlm.nih.gov": DAY,
+    "www.ebi.ac.uk/chembl": WEEK,
+    "api.platform.opentargets.org": WEEK,
+    "search.patentsview.org": 4 * WEEK,
+    "comtradeapi.un.org": WEEK,
+}
+
+# Request parameters that identify the caller rather than the query
+CREDENTIAL_PARAMS = frozenset({"api_key", "apikey", "subscription-key", "email", "tool"})
+
+# Response headers that no longer apply to the decoded, stored body
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"})
+
+_DURATION = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "s": 1, "m": 60, "h": HOUR, "d": DAY, "w": WEEK}
+
+def is_tool_cache_enabled() -> bool:
+    return os.getenv("TOOL_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+def parse_duration(value: str) -> float:
+    match = _DURATION.match(value)
+    if not match:
+        raise ValueError(f"Invalid duration '{value}', expected e.g. 30m, 6h, 7d or 2w")
+    return float(match.group(1)) * _UNITS[match.group(2).lower()]
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """
+    Parse "host[/path]=duration,..." into TTLs per source.
+    """
+    ttls = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        source, _, duration = item.partition("=")
+        ttls[source.strip().lower().rstrip("/")] = parse_duration(duration)
+    return ttls
+
+def configured_ttls() -> Dict[str, float]:
+    ttls = dict(SOURCE_TTLS)
+    ttls.update(parse_ttls(os.getenv("TOOL_CACHE_TTLS", "")))
+    return ttls
+
+def match_source(url: str, ttls: Dict[str, float]) -> Tuple[Optional[str], float]:
+    """
+    The source of a URL and its TTL; (None, 0) when the URL has no TTL.
+    """
+    parts = urlsplit(url)
+    target = f"{(parts.hostname or '').lower()}{parts.path}"
+    best = None
+    for source in ttls:
+        if (target == source or target.startswith(source + "/")) and (best is None or len(source) > len(best)):
+            best = source
+    return (best, ttls[best]) if best else (None, 0.0)
+
+def cache_key(prepared: requests.PreparedRequest) -> str:
+    parts = urlsplit(prepared.url)
+    params = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in CREDENTIAL_PARAMS
+    )
+    body = prepared.body or b""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    try:
+        # JSON bodies (GraphQL) are compared independent of key order
+        body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+    except ValueError:
+        pass
+
+    payload = {
+        "method": prepared.method,
+        "url": f"{parts.scheme}://{(parts.hostname or '').lower()}{parts.path}",
+        "params": params,
+        "body": hashlib.sha256(body).hexdigest()
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Size-bounded SQLite store of API responses, safe to share between
+    threads and worker processes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, ttls: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = ttls if ttls is not None else configured_ttls()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_accessed_at ON responses (accessed_at)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS source_stats (
+                source TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+    def lookup(self, method: str, url: str, **kwargs: Any) -> Tuple[Optional[str], Optional[requests.Response]]:
+        """
+        Cache key of a request and its cached response, if fresh.
+        The key is None for requests that are not cached.
+        """
+        source, ttl = match_source(url, self.ttls)
+        if source is None or ttl <= 0:
+            return None, None
+
+        prepared = requests.Request(
+            method, url,
+            params=kwargs.get("params"),
+            data=kwargs.get("data"),
+            json=kwargs.get("json")
+        ).prepare()
+        key = cache_key(prepared)
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, status, headers, body, created_at, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[5] <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._record(source, hit=row is not None)
+
+        if row is None:
+            return key, None
+        return key, self._response(*row[:5])
+
+    def store(self, key: str, response: requests.Response) -> None:
+        """
+        Keep a successful response fetched for a key returned by lookup().
+        """
+        if response.status_code != 200:
+            return
+        source, ttl = match_source(response.request.url if response.request else response.url, self.ttls)
+        if source is None or ttl <= 0:
+            return
+
+        body = response.content
+        if len(body) > self.max_bytes:
+            return
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in DROPPED_HEADERS}
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, source, url, status, headers, body, size, created_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, source, response.url, response.status_code, json.dumps(headers), body, len(body), now, now + ttl, now)
+            )
+            self._evict()
+
+    @staticmethod
+    def _response(url: str, status: int, headers: str, body: bytes, created_at: float) -> requests.Response:
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(json.loads(headers))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = body
+        response.from_cache = True
+        response.cached_at = created_at
+        return response
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Expired entries go first, then the least recently used ones
+        freed = 0
+        doomed = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY expires_at > ?, accessed_at", (time.time(),)
+        ):
+            doomed.append((key,))
+            freed += size
+            if total - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def _record(self, source: str, hit: bool) -> None:
+        column = "hits" if hit else "misses"
+        self._conn.execute(
+            f"INSERT INTO source_stats (source, {column}) VALUES (?, 1) "
+            f"ON CONFLICT(source) DO UPDATE SET {column} = {column} + 1",
+            (source,)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            sources = {
+                source: {"hits": hits, "misses": misses}
+                for source, hits, misses in self._conn.execute("SELECT source, hits, misses FROM source_stats ORDER BY source")
+            }
+        return {"entries": entries, "size_bytes": size, "max_bytes": self.max_bytes, "sources": sources}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM source_stats")
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """
+    Process-wide cache configured from the environment.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            path = os.getenv("TOOL_CACHE_PATH", DEFAULT_CACHE_PATH)
+            max_mb = float(os.getenv("TOOL_CACHE_MAX_MB", DEFAULT_MAX_MB))
+            _cache = ResponseCache(path, int(max_mb * 1024 * 1024))
+        return _cache
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the tool response cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+
+    cache = get_response_cache()
+    if args.command == "clear":
+        cache.clear()
+        print(f"Cleared {cache.path}")
+        return
+
+    stats = cache.stats()
+    print(f"{cache.path}: {stats['entries']} entries, {stats['size_bytes'] / 1024 / 1024:.1f} of "
+          f"{stats['max_bytes'] / 1024 / 1024:.0f} MB")
+    print(f"\n{'source':<40} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+    for source, counts in stats["sources"].items():
+        total = counts["hits"] + counts["misses"]
+        rate = counts["hits"] / total if total else 0
+        print(f"{source:<40} {counts['hits']:>8} {counts['misses']:>8} {rate:>8.0%}")
+
+if __name__ == "__main__":
+    main()
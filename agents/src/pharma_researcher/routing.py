@@ -0,0 +1,105 @@
+"""
+Query-aware routing of the research tasks.
+
+Every research task covers one kind of question (market and regulatory,
+trade, patents, trials, news, chemistry, target biology, indications).
+Before a run the query is matched against the terms of each task and only
+the tasks it mentions are kept; the report-writing tasks always run and
+only receive the context of the kept tasks.
+
+A query that matches no rule, or that asks for a "full report", runs
+every research task.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+FULL_REPORT_PATTERN = re.compile(r"\b(full|complete|comprehensive)\s+(report|analysis|landscape)\b", re.IGNORECASE)
+
+# Research task -> terms that make it relevant (matched on word starts, case-insensitive)
+RESEARCH_TASK_TERMS: Dict[str, Tuple[str, ...]] = {
+    "market_insights_task": (
+        "market", "sales", "revenue", "competit", "commercial", "pricing", "price",
+        "brand", "fda", "ema", "approv", "label", "regulator", "safety", "adverse",
+        "side effect", "recall", "enforcement", "shortage", "ndc",
+    ),
+    "exim_trade_analysis_task": (
+        "export", "import", "trade", "exim", "comtrade", "tariff", "shipment",
+        "supply chain", "sourcing", "api manufactur", "customs",
+    ),
+    "patent_landscape_task": (
+        "patent", "intellectual property", "exclusivity", "generic entry", "biosimilar",
+        "loss of exclusivity", "expir", "freedom to operate", "ip landscape",
+    ),
+    "clinical_trials_pipeline_task": (
+        "trial", "phase", "pipeline", "clinical", "study", "studies", "efficacy",
+        "endpoint", "recruit", "enrol", "sponsor",
+    ),
+    "web_intelligence_scan_task": (
+        "news", "latest", "recent", "announce", "deal", "acquisition", "partnership",
+        "licens", "guideline", "launch", "press",
+    ),
+    "chembl_insights_task": (
+        "mechanism", "moa", "target", "binding", "potency", "ic50", "molecule",
+        "compound", "chemical", "chemistry", "structure", "bioactivity", "selectiv",
+        "pharmacolog", "agonist", "antagonist", "inhibitor",
+    ),
+    "open_targets_research_task": (
+        "target", "gene", "genetic", "association", "pathway", "biology", "biomarker",
+        "mechanism", "moa", "tractab",
+    ),
+    "open_targets_drug_indication_task": (
+        "indication", "repurpos", "reposition", "treat", "therapeutic area",
+        "disease", "approved for", "used for",
+    ),
+}
+
+RESEARCH_TASKS: Tuple[str, ...] = tuple(RESEARCH_TASK_TERMS)
+
+_TERM_PATTERNS = {
+    task: re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")", re.IGNORECASE)
+    for task, terms in RESEARCH_TASK_TERMS.items()
+}
+
+@dataclass
+class RoutingDecision:
+    research_tasks: List[str]  # research tasks to run, in crew order
+    full: bool  # whether every research task runs
+    reason: str
+    matches: Dict[str, List[str]] = field(default_factory=dict)  # task -> terms found in the query
+
+    def includes(self, task_name: str) -> bool:
+        """
+        Whether a task of the crew runs. Tasks other than research tasks always do.
+        """
+        return task_name not in RESEARCH_TASK_TERMS or task_name in self.research_tasks
+
+def full_routing(reason: str) -> RoutingDecision:
+    return RoutingDecision(research_tasks=list(RESEARCH_TASKS), full=True, reason=reason)
+
+def route_query(query: str, full_report: bool = False) -> RoutingDecision:
+    """
+    Pick the research tasks relevant to a query.
+    """
+    if full_report:
+        return full_routing("full report requested")
+    if FULL_REPORT_PATTERN.search(query):
+        return full_routing("query asks for a full report")
+
+    matches = {}
+    for task, pattern in _TERM_PATTERNS.items():
+        found = sorted({match.group(0).lower() for match in pattern.finditer(query)})
+        if found:
+            matches[task] = found
+
+    if not matches:
+        return full_routing("no specific topic detected")
+    if len(matches) == len(RESEARCH_TASKS):
+        return RoutingDecision(research_tasks=list(RESEARCH_TASKS), full=True, reason="all topics detected", matches=matches)
+
+    return RoutingDecision(
+        research_tasks=[task for task in RESEARCH_TASKS if task in matches],
+        full=False,
+        reason="matched " + ", ".join(f"{task} ({', '.join(terms)})" for task, terms in matches.items()),
+        matches=matches
+    )
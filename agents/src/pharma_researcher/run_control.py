@@ -0,0 +1,126 @@
+"""
+Deadlines and cancellation of crew runs.
+
+A RunControl is attached to a per-run crew copy with control_crew(). The
+run is checked before every task starts and before every LLM call of its
+agents; once the run is cancelled or past a deadline, that check raises
+and the crew stops at the next task or agent step:
+
+- Run deadline: the whole run must finish within run_timeout seconds.
+- Task deadline: each task must finish within task_timeout seconds of
+  starting. A task past its deadline stops the whole run.
+- Cancellation: cancel() may be called from any thread.
+
+A call already waiting on the LLM provider or an upstream API is not
+interrupted, so a run stops within one call of its deadline.
+"""
+import threading
+import time
+from typing import Dict, Optional
+from crewai import Crew
+from crewai.llms.base_llm import BaseLLM
+from pharma_researcher.llms import DelegatingLLM, find_llm
+
+class RunStopped(TimeoutError):
+    """
+    Raised inside a run that was cancelled or passed a deadline.
+    Subclasses TimeoutError, which crewai agents raise without retrying.
+    """
+
+class RunCancelled(RunStopped):
+    pass
+
+class DeadlineExceeded(RunStopped):
+    pass
+
+class RunControl:
+    """
+    Deadlines and cancellation state of one crew run.
+    """
+
+    def __init__(self, run_timeout: Optional[float] = None, task_timeout: Optional[float] = None):
+        self.started = time.monotonic()
+        self.deadline = self.started + run_timeout if run_timeout else None
+        self.task_timeout = task_timeout or None
+        self._task_started: Dict[str, float] = {}
+        self._stopped: Optional[RunStopped] = None
+        self._lock = threading.Lock()
+
+    @property
+    def stopped(self) -> Optional[RunStopped]:
+        """
+        Why the run stopped, or None while it may continue.
+        """
+        return self._stopped
+
+    @property
+    def cancelled(self) -> bool:
+        return isinstance(self._stopped, RunCancelled)
+
+    def cancel(self, reason: str = "Cancelled by user") -> None:
+        self._stop(RunCancelled(reason))
+
+    def task_started(self, task_name: str) -> None:
+        self.check()
+        with self._lock:
+            self._task_started[task_name] = time.monotonic()
+
+    def check(self, task_name: Optional[str] = None) -> None:
+        """
+        Raise if the run, or the given task, must stop.
+        """
+        if self._stopped is None:
+            now = time.monotonic()
+            if self.deadline is not None and now > self.deadline:
+                self._stop(DeadlineExceeded(f"Run exceeded its deadline of {self.deadline - self.started:.0f}s"))
+            elif self.task_timeout and task_name in self._task_started and now - self._task_started[task_name] > self.task_timeout:
+                self._stop(DeadlineExceeded(f"Task {task_name} exceeded its deadline of {self.task_timeout:.0f}s"))
+        stopped = self._stopped
+        if stopped is not None:
+            # A fresh exception per raise, checks run in several threads
+            raise type(stopped)(str(stopped))
+
+    def _stop(self, reason: RunStopped) -> None:
+        with self._lock:
+            # The first reason wins, later checks report the same one
+            if self._stopped is None:
+                self._stopped = reason
+
+class ControlledLLM(DelegatingLLM):
+    """
+    LLM that checks its run's control before every call, if it has one.
+    """
+
+    def __init__(self, llm: BaseLLM):
+        super().__init__(llm)
+        self.control: Optional[RunControl] = None
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ):
+        if self.control is not None:
+            self.control.check(getattr(from_task, "name", None))
+        return super().call(
+            messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+            from_task=from_task, from_agent=from_agent, response_model=response_model
+        )
+
+def control_crew(crew: Crew, control: Optional[RunControl]) -> None:
+    """
+    Enforce control on a crew run, or stop enforcing it with None.
+    The crew must be a per-run copy, see crew.new_run().
+    """
+    for agent in crew.agents:
+        llm = find_llm(agent.llm, ControlledLLM)
+        if llm is not None:
+            llm.control = control
+    for task in crew.tasks:
+        if hasattr(task, "set_control"):
+            task.set_control(control)
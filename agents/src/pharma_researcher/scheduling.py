@@ -0,0 +1,163 @@
+"""
+DAG scheduling for the PharmaResearcher crew.
+
+CrewAI's sequential process runs async tasks in the background until it
+reaches the next synchronous task, which waits for all of them first. DAG
+mode uses that to run the crew as a dependency graph:
+
+- Tasks are grouped into levels from their declared `context`, each task
+  as late as possible (so a cheap task with no inputs, like the report
+  title, is scheduled right before the task that needs it).
+- The first task of every level after the first is synchronous and acts as
+  the barrier for the level before it; every other task runs async.
+- A per-run semaphore caps how many tasks execute at once.
+
+Settings (environment):
+    CREW_PROCESS_MODE: "dag" (default) or "sequential"
+    CREW_MAX_PARALLEL_TASKS: maximum tasks running at once in DAG mode (default 4)
+"""
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+from crewai import Task
+from pydantic import PrivateAttr
+from pharma_researcher.run_control import RunControl
+
+DEFAULT_MAX_PARALLEL_TASKS = 4
+
+def get_process_mode() -> str:
+    mode = os.getenv("CREW_PROCESS_MODE", "dag").strip().lower()
+    if mode not in ("dag", "sequential"):
+        raise ValueError(f"Unknown CREW_PROCESS_MODE '{mode}', expected 'dag' or 'sequential'")
+    return mode
+
+def get_max_parallel_tasks() -> int:
+    return max(1, int(os.getenv("CREW_MAX_PARALLEL_TASKS", DEFAULT_MAX_PARALLEL_TASKS)))
+
+class ScheduledTask(Task):
+    """
+    Task that can share a concurrency limit with the rest of its crew,
+    report when it actually starts running and stop with its run (see
+    run_control).
+    """
+
+    _slots: Optional[threading.Semaphore] = PrivateAttr(default=None)
+    _on_start: Optional[Callable[["ScheduledTask"], None]] = PrivateAttr(default=None)
+    _control: Optional[RunControl] = PrivateAttr(default=None)
+
+    def set_slots(self, slots: Optional[threading.Semaphore]):
+        self._slots = slots
+
+    def set_start_callback(self, callback: Optional[Callable[["ScheduledTask"], None]]):
+        self._on_start = callback
+
+    def set_control(self, control: Optional[RunControl]):
+        self._control = control
+
+    def _execute_core(self, agent, context, tools):
+        with self._slots or nullcontext():
+            if self._control:
+                self._control.task_started(self.name)
+            if self._on_start:
+                self._on_start(self)
+            return super()._execute_core(agent, context, tools)
+
+    def _execute_task_async(self, agent, context, tools, future: Future) -> None:
+        # Task leaves the future unresolved when the task raises, which
+        # would hang the crew at the next barrier
+        try:
+            result = self._execute_core(agent, context, tools)
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        future.set_result(result)
+
+def task_context(task: Task) -> List[Task]:
+    """
+    Tasks this task explicitly takes as context (empty when none are declared).
+    """
+    return task.context if isinstance(task.context, list) else []
+
+def compute_levels(tasks: List[Task]) -> Dict[int, int]:
+    """
+    Level of every task (keyed by id()) in the context graph, as late as possible.
+    Sinks get the deepest level; every other task sits one level before its
+    earliest consumer.
+    """
+    position = {id(task): index for index, task in enumerate(tasks)}
+    consumers: Dict[int, List[Task]] = {id(task): [] for task in tasks}
+    for task in tasks:
+        for dependency in task_context(task):
+            if isinstance(dependency, Task) and id(dependency) in consumers:
+                consumers[id(dependency)].append(task)
+
+    # Longest path to any sink, so consumers are always placed after producers
+    height: Dict[int, int] = {}
+    for task in sorted(tasks, key=lambda t: position[id(t)], reverse=True):
+        height[id(task)] = max((height[id(c)] + 1 for c in consumers[id(task)]), default=0)
+    depth = max(height.values(), default=0)
+
+    levels: Dict[int, int] = {}
+    for task in sorted(tasks, key=lambda t: position[id(t)], reverse=True):
+        if consumers[id(task)]:
+            levels[id(task)] = min(levels[id(c)] for c in consumers[id(task)]) - 1
+        else:
+            levels[id(task)] = depth
+    return levels
+
+def schedule_tasks(tasks: List[Task], mode: Optional[str] = None, max_parallel: Optional[int] = None) -> List[Task]:
+    """
+    Order and configure the crew's tasks for the given process mode.
+    Returns the tasks in the order they must be given to the Crew.
+    """
+    mode = mode or get_process_mode()
+    if mode == "sequential":
+        for task in tasks:
+            task.async_execution = False
+            if isinstance(task, ScheduledTask):
+                task.set_slots(None)
+        return list(tasks)
+
+    levels = compute_levels(tasks)
+    position = {id(task): index for index, task in enumerate(tasks)}
+    by_level: Dict[int, List[Task]] = {}
+    for task in tasks:
+        by_level.setdefault(levels[id(task)], []).append(task)
+
+    ordered: List[Task] = []
+    level_numbers = sorted(by_level)
+    for level in level_numbers:
+        members = by_level[level]
+        if level != level_numbers[0]:
+            # The barrier runs alone, so prefer the task with the fewest inputs
+            barrier = min(members, key=lambda t: (len(task_context(t)), position[id(t)]))
+            members = [barrier] + [t for t in members if t is not barrier]
+        for index, task in enumerate(members):
+            task.async_execution = not (index == 0 and level != level_numbers[0])
+        ordered.extend(members)
+
+    # A crew may end with at most one async task
+    trailing = 0
+    for task in reversed(ordered):
+        if not task.async_execution:
+            break
+        trailing += 1
+    if trailing > 1:
+        ordered[-1].async_execution = False
+
+    assign_slots(ordered, max_parallel)
+    return ordered
+
+def assign_slots(tasks: List[Task], max_parallel: Optional[int] = None) -> None:
+    """
+    Give the async tasks of one run a fresh shared concurrency limit.
+    Must be called again for every copy of a scheduled crew.
+    """
+    if not any(task.async_execution for task in tasks):
+        return
+    slots = threading.Semaphore(max_parallel or get_max_parallel_tasks())
+    for task in tasks:
+        if isinstance(task, ScheduledTask):
+            task.set_slots(slots)
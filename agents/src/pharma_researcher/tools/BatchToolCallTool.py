@@ -0,0 +1,88 @@
+"""
+Meta-tool running several independent calls of an agent's tools in one step.
+
+Every call otherwise costs a full LLM round trip before the next one is
+issued. The calls of a batch run concurrently on the tool I/O loop (see
+tools.http) under the shared per-host rate limits; each call's output is
+compacted to its own tool's budget and returned under its key.
+
+Settings (environment):
+    BATCH_TOOL_MAX_CALLS: most calls accepted in one batch (default 10)
+    BATCH_TOOL_CONCURRENCY: calls of one batch in flight at once (default 5)
+"""
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Type
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from .base import PharmaTool
+from .http import run_on_io_loop
+
+DEFAULT_MAX_CALLS = 10
+DEFAULT_CONCURRENCY = 5
+
+
+class ToolCall(BaseModel):
+    """One call of a batch."""
+    tool: str = Field(..., description="Name of the tool to call, e.g. 'fda_drugsfda_tool'")
+    args: Dict[str, Any] = Field(default_factory=dict, description="Arguments of the call, as for calling the tool directly")
+    key: Optional[str] = Field(None, description="Key of this call's result; defaults to '<tool>#<position>'")
+
+
+class BatchToolCallToolInput(BaseModel):
+    """Input schema for BatchToolCallTool."""
+    calls: List[ToolCall] = Field(..., description="Independent tool calls to run together")
+
+
+class BatchToolCallTool(PharmaTool):
+    name: str = "batch_tool_call"
+    description: str = (
+        "Run several independent calls of your other tools at once and get all their results in one step. "
+        "Pass 'calls', a list of {'tool': <tool name>, 'args': {...}, 'key': <optional result key>}. "
+        "Use it whenever you need more than one lookup whose arguments do not depend on each other's "
+        "results, e.g. Drugs@FDA, FAERS and EMA for the same drug, or several query types of one API."
+    )
+    args_schema: Type[BaseModel] = BatchToolCallToolInput
+    # The calls' full outputs are already kept by their own tools
+    store_full_output: bool = False
+    tools: List[BaseTool] = Field(default_factory=list, exclude=True)
+
+    def _run(self, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return run_on_io_loop(self._arun(calls))
+
+    async def _arun(self, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        max_calls = int(os.getenv("BATCH_TOOL_MAX_CALLS", DEFAULT_MAX_CALLS))
+        if len(calls) > max_calls:
+            return {"error": f"At most {max_calls} calls per batch, got {len(calls)}. Split them into several batches."}
+
+        tools = {tool.name: tool for tool in self.tools}
+        semaphore = asyncio.Semaphore(int(os.getenv("BATCH_TOOL_CONCURRENCY", DEFAULT_CONCURRENCY)))
+
+        async def run_call(call: Dict[str, Any]) -> Any:
+            tool = tools.get(call.get("tool"))
+            if tool is None:
+                return {"error": f"Unknown tool '{call.get('tool')}'", "available_tools": list(tools)}
+            try:
+                # Validated like a direct call of the tool
+                args = tool.args_schema.model_validate(call.get("args") or {}).model_dump()
+            except ValueError as e:
+                return {"error": f"Invalid arguments for {tool.name}: {e}"}
+            async with semaphore:
+                try:
+                    if isinstance(tool, PharmaTool):
+                        return await tool.arun(**args)
+                    return await asyncio.to_thread(tool.run, **args)
+                except Exception as e:
+                    return {"error": f"{tool.name} failed: {e}"}
+
+        keys = _result_keys(calls)
+        outputs = await asyncio.gather(*(run_call(call) for call in calls))
+        return {"results": dict(zip(keys, outputs))}
+
+def _result_keys(calls: List[Dict[str, Any]]) -> List[str]:
+    keys = []
+    for position, call in enumerate(calls):
+        key = call.get("key") or f"{call.get('tool')}#{position}"
+        # Keep every result when keys repeat
+        keys.append(key if key not in keys else f"{key}#{position}")
+    return keys
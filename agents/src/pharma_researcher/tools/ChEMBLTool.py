@@ -1,8 +1,8 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, Dict, Any, List, Union
 from pydantic import BaseModel, Field
 import requests
 import urllib.parse
+from .base import ApiTool, Query
 
 
 class ChEMBLToolInput(BaseModel):
@@ -71,7 +71,7 @@ class ChEMBLToolInput(BaseModel):
     )
 
 
-class ChEMBLTool(BaseTool):
+class ChEMBLTool(ApiTool):
     name: str = "chembl_api_tool"
     description: str = (
         "Search and retrieve data from the ChEMBL database - a comprehensive bioactivity database. "
@@ -87,7 +87,7 @@ class ChEMBLTool(BaseTool):
     )
     args_schema: Type[BaseModel] = ChEMBLToolInput
 
-    def _run(
+    def _query(
         self,
         resource: str,
         chembl_id: Optional[str] = None,
@@ -100,7 +100,7 @@ class ChEMBLTool(BaseTool):
         offset: Optional[int] = 0,
         order_by: Optional[str] = None,
         only: Optional[List[str]] = None
-    ) -> Union[Dict[str, Any], str]:
+    ) -> Query:
         """
         Query the ChEMBL API for pharmaceutical and bioactivity data.
         
@@ -170,7 +170,7 @@ class ChEMBLTool(BaseTool):
                 "Accept": self._get_accept_header(format)
             }
             
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", url, params=params, headers=headers)
             response.raise_for_status()
             
             # Handle different response formats
@@ -185,6 +185,7 @@ class ChEMBLTool(BaseTool):
                 return {
                     "data": data,
                     "_query_metadata": {
+                        "cache_hit": getattr(response, "from_cache", False),
                         "resource": resource,
                         "chembl_id": chembl_id,
                         "filters": filters,
@@ -1,7 +1,7 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import requests
+from .base import ApiTool, Query
 
 
 class ClinicalTrialsToolInput(BaseModel):
@@ -18,12 +18,12 @@ class ClinicalTrialsToolInput(BaseModel):
     sort: Optional[List[str]] = None
 
 
-class ClinicalTrialsTool(BaseTool):
+class ClinicalTrialsTool(ApiTool):
     name: str = "clinical_trials_api_tool"
     description: str = "Search ClinicalTrials.gov API v2 for trial data."
     args_schema: Type[BaseModel] = ClinicalTrialsToolInput
 
-    def _run(
+    def _query(
         self,
         condition: Optional[str] = None,
         intervention: Optional[str] = None,
@@ -36,7 +36,7 @@ class ClinicalTrialsTool(BaseTool):
         page_size: Optional[int] = 20,
         page_token: Optional[str] = None,
         sort: Optional[List[str]] = None
-    ) -> Dict[str, Any]:
+    ) -> Query:
 
         url = "https://clinicaltrials.gov/api/v2/studies"
 
@@ -101,12 +101,13 @@ class ClinicalTrialsTool(BaseTool):
         # Execute request
         # -----------------------------
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", url, params=params, headers=headers)
             response.raise_for_status()
             data = response.json()
 
             result = {
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "condition": condition,
                     "intervention": intervention,
                     "phase": phase,
@@ -1,10 +1,10 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import pandas as pd
 import os
 from pathlib import Path
 from datetime import datetime
+from .base import PharmaTool
 
 
 class EMAMedicineShortagesToolInput(BaseModel):
@@ -63,7 +63,7 @@ class EMAMedicineShortagesToolInput(BaseModel):
     )
 
 
-class EMAMedicineShortagesTool(BaseTool):
+class EMAMedicineShortagesTool(PharmaTool):
     name: str = "ema_medicine_shortages_tool"
     description: str = """
     Search European Medicines Agency (EMA) medicine supply shortages database.
@@ -1,9 +1,9 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import pandas as pd
 import os
 from pathlib import Path
+from .base import PharmaTool
 
 
 class EMAMedicinesToolInput(BaseModel):
@@ -55,7 +55,7 @@ class EMAMedicinesToolInput(BaseModel):
     )
 
 
-class EMAMedicinesTool(BaseTool):
+class EMAMedicinesTool(PharmaTool):
     name: str = "ema_medicines_tool"
     description: str = """
     Search European Medicines Agency (EMA) authorized medicines database.
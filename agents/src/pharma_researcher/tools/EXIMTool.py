@@ -1,8 +1,8 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, Dict, Any, List
 from pydantic import BaseModel, Field
 import requests
 from datetime import date
+from .base import ApiTool, Query
 
 
 class EXIMToolInput(BaseModel):
@@ -13,7 +13,7 @@ class EXIMToolInput(BaseModel):
     max_records: Optional[int] = 500
 
 
-class EXIMTool(BaseTool):
+class EXIMTool(ApiTool):
     name: str = "un_comtrade_exim_tool"
     description: str =  """Fetch EXIM trade data using the UN Comtrade API v1. Supports HS codes, imports/exports, partners, reporters.
     Use these HS Codes for researching
@@ -44,14 +44,14 @@ class EXIMTool(BaseTool):
 
     args_schema: Type[BaseModel] = EXIMToolInput
 
-    def _run(
+    def _query(
         self,
         hs_code: str,
         year: Optional[int] = date.today().year,
         flow_code: Optional[str] = None,
         frequency: Optional[str] = "A",
         max_records: Optional[int] = 500
-    ) -> Dict[str, Any]:
+    ) -> Query:
 
         base_url = "https://comtradeapi.un.org/public/v1/getDA/{typeCode}/{freqCode}/{clCode}"
 
@@ -79,7 +79,7 @@ class EXIMTool(BaseTool):
 
         try:
             headers = {"User-Agent": "pharma-researcher/1.0"}
-            response = requests.get(base_url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", base_url, params=params, headers=headers)
 
             # Fix: handle rate limit
             if response.status_code == 429:
@@ -108,6 +108,7 @@ class EXIMTool(BaseTool):
                 "results": records,
                 "top_partners": self._top_partners(records),
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "hs_code": hs_code,
                     "reporter": reporter_code,
                     "partner": partner_code,
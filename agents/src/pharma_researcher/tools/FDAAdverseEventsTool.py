@@ -1,9 +1,9 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any, Union
 from pydantic import BaseModel, Field
 import requests
 from datetime import datetime
 from urllib.parse import quote
+from .base import ApiTool, Query
 
 
 class FDAAdverseEventsToolInput(BaseModel):
@@ -66,7 +66,7 @@ class FDAAdverseEventsToolInput(BaseModel):
     )
 
 
-class FDAAdverseEventsTool(BaseTool):
+class FDAAdverseEventsTool(ApiTool):
     name: str = "fda_adverse_events_tool"
     description: str = """
     Search FDA Adverse Event Reporting System (FAERS) database for drug safety signals.
@@ -86,7 +86,7 @@ class FDAAdverseEventsTool(BaseTool):
     """
     args_schema: Type[BaseModel] = FDAAdverseEventsToolInput
 
-    def _run(
+    def _query(
         self,
         search_query: Optional[str] = None,
         count: Optional[str] = None,
@@ -96,7 +96,7 @@ class FDAAdverseEventsTool(BaseTool):
         limit: Optional[int] = 100,
         skip: Optional[int] = 0,
         extract_fields: Optional[bool] = True
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Execute FDA Adverse Events search.
         
@@ -143,13 +143,14 @@ class FDAAdverseEventsTool(BaseTool):
                 params["skip"] = skip
         
         try:
-            response = requests.get(url, params=params, timeout=30)
+            response = yield requests.Request("GET", url, params=params)
             response.raise_for_status()
             data = response.json()
             
             # Add metadata
             result = {
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "query": final_query,
                     "count_field": count,
                     "limit": limit,
@@ -1,8 +1,8 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import requests
 from urllib.parse import quote
+from .base import ApiTool, Query
 
 
 class FDADrugsFDAToolInput(BaseModel):
@@ -65,7 +65,7 @@ class FDADrugsFDAToolInput(BaseModel):
     )
 
 
-class FDADrugsFDATool(BaseTool):
+class FDADrugsFDATool(ApiTool):
     name: str = "fda_drugsfda_tool"
     description: str = """
     Search FDA Drugs@FDA database for drug approval information and regulatory history.
@@ -85,7 +85,7 @@ class FDADrugsFDATool(BaseTool):
     """
     args_schema: Type[BaseModel] = FDADrugsFDAToolInput
 
-    def _run(
+    def _query(
         self,
         search_query: Optional[str] = None,
         brand_name: Optional[str] = None,
@@ -95,7 +95,7 @@ class FDADrugsFDATool(BaseTool):
         fields: Optional[List[str]] = None,
         limit: Optional[int] = 100,
         skip: Optional[int] = 0
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Execute FDA Drugs@FDA search.
         
@@ -139,7 +139,7 @@ class FDADrugsFDATool(BaseTool):
         
         try:
             headers = {"User-Agent": "pharma-researcher/1.0"}
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", url, params=params, headers=headers)
 
             response.raise_for_status()
             data = response.json()
@@ -182,6 +182,7 @@ class FDADrugsFDATool(BaseTool):
             # Add metadata
             result = {
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "query": final_query,
                     "fields": fields,
                     "limit": limit,
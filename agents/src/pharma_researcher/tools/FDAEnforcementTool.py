@@ -1,9 +1,9 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import requests
 from datetime import datetime
 from urllib.parse import quote
+from .base import ApiTool, Query
 
 
 
@@ -74,7 +74,7 @@ class FDAEnforcementToolInput(BaseModel):
     )
 
 
-class FDAEnforcementTool(BaseTool):
+class FDAEnforcementTool(ApiTool):
     name: str = "fda_recall_tool"
     description: str = """
     Search FDA Drug Recall & Enforcement Reports database.
@@ -94,7 +94,7 @@ class FDAEnforcementTool(BaseTool):
     """
     args_schema: Type[BaseModel] = FDAEnforcementToolInput
 
-    def _run(
+    def _query(
         self,
         search_query: Optional[str] = None,
         product: Optional[str] = None,
@@ -106,7 +106,7 @@ class FDAEnforcementTool(BaseTool):
         count: Optional[str] = None,
         limit: Optional[int] = 100,
         skip: Optional[int] = 0
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Execute FDA Enforcement/Recall search.
         
@@ -164,7 +164,7 @@ class FDAEnforcementTool(BaseTool):
         
         try:
             headers = {"User-Agent": "pharma-researcher/1.0"}
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", url, params=params, headers=headers)
 
             response.raise_for_status()
             data = response.json()
@@ -172,6 +172,7 @@ class FDAEnforcementTool(BaseTool):
             # Add metadata
             result = {
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "query": final_query,
                     "count_field": count,
                     "limit": limit,
@@ -1,7 +1,8 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import requests
+from urllib.parse import quote
+from .base import ApiTool, Query
 
 
 class FDANDCToolInput(BaseModel):
@@ -82,7 +83,7 @@ class FDANDCToolInput(BaseModel):
     )
 
 
-class FDANDCTool(BaseTool):
+class FDANDCTool(ApiTool):
     name: str = "fda_ndc_tool"
     description: str = """
     Search FDA National Drug Code (NDC) Directory for drug product and package information.
@@ -103,7 +104,7 @@ class FDANDCTool(BaseTool):
     """
     args_schema: Type[BaseModel] = FDANDCToolInput
 
-    def _run(
+    def _query(
         self,
         search_query: Optional[str] = None,
         generic_name: Optional[str] = None,
@@ -116,7 +117,7 @@ class FDANDCTool(BaseTool):
         fields: Optional[List[str]] = None,
         limit: Optional[int] = 100,
         skip: Optional[int] = 0
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Execute FDA NDC Directory search.
         
@@ -169,7 +170,7 @@ class FDANDCTool(BaseTool):
         
         try:
             headers = {"User-Agent": "pharma-researcher/1.0"}
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", url, params=params, headers=headers)
 
             response.raise_for_status()
             data = response.json()
@@ -207,6 +208,7 @@ class FDANDCTool(BaseTool):
             # Add metadata
             result = {
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "query": final_query,
                     "fields": fields,
                     "limit": limit,
@@ -1,8 +1,8 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import requests
 from urllib.parse import quote
+from .base import ApiTool, Query
 
 
 
@@ -86,7 +86,7 @@ class FDAProductLabelToolInput(BaseModel):
     )
 
 
-class FDAProductLabelTool(BaseTool):
+class FDAProductLabelTool(ApiTool):
     name: str = "fda_product_label_tool"
     description: str = """
     Search FDA Drug Product Labels (package inserts, prescribing information).
@@ -108,7 +108,7 @@ class FDAProductLabelTool(BaseTool):
     """
     args_schema: Type[BaseModel] = FDAProductLabelToolInput
 
-    def _run(
+    def _query(
         self,
         search_query: Optional[str] = None,
         brand_name: Optional[str] = None,
@@ -120,7 +120,7 @@ class FDAProductLabelTool(BaseTool):
         fields: Optional[List[str]] = None,
         limit: Optional[int] = 10,
         skip: Optional[int] = 0
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Execute FDA Product Label search.
         
@@ -167,7 +167,7 @@ class FDAProductLabelTool(BaseTool):
         
         try:
             headers = {"User-Agent": "pharma-researcher/1.0"}
-            response = requests.get(url, params=params, headers=headers, timeout=30)
+            response = yield requests.Request("GET", url, params=params, headers=headers)
 
             response.raise_for_status()
             data = response.json()
@@ -205,6 +205,7 @@ class FDAProductLabelTool(BaseTool):
             # Add metadata
             result = {
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "query": final_query,
                     "fields": fields,
                     "limit": limit,
@@ -1,12 +1,10 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, List, Dict, Any
 from pydantic import BaseModel, Field
 import requests
 import xml.etree.ElementTree as ET
 import json
 import os
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from .base import ApiTool, Query
 
 
 class NCBIEntrezToolInput(BaseModel):
@@ -92,7 +90,7 @@ class NCBIEntrezToolInput(BaseModel):
     )
 
 
-class NCBIEntrezTool(BaseTool):
+class NCBIEntrezTool(ApiTool):
     name: str = "ncbi_entrez_tool"
     description: str = """
     Search NCBI databases (PubMed, PMC, Gene, Protein, etc.) using Entrez E-utilities.
@@ -113,7 +111,7 @@ class NCBIEntrezTool(BaseTool):
     """
     args_schema: Type[BaseModel] = NCBIEntrezToolInput
 
-    def _run(
+    def _query(
         self,
         database: str = "pubmed",
         search_term: Optional[str] = None,
@@ -125,7 +123,7 @@ class NCBIEntrezTool(BaseTool):
         utility: Optional[str] = "esearch",
         ids: Optional[List[str]] = None,
         parse_results: Optional[bool] = True
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Execute NCBI Entrez E-utilities query.
         
@@ -189,16 +187,8 @@ class NCBIEntrezTool(BaseTool):
                 params["api_key"] = os.getenv("ENTREZ_API_KEY")
 
             headers = {"User-Agent": f"pharma-researcher/1.0 (+{os.getenv('ENTREZ_EMAIL','no-email')})"}
-            # setup a requests session with retries/backoff
-            session = requests.Session()
-            retries = Retry(total=3, backoff_factor=1,
-                            status_forcelist=[429, 500, 502, 503, 504],
-                            allowed_methods=["GET", "POST"])
-            adapter = HTTPAdapter(max_retries=retries)
-            session.mount("https://", adapter)
-            session.mount("http://", adapter)
-
-            response = requests.get(base_url, params=params, timeout=30)
+            # The shared client retries 429/5xx with backoff
+            response = yield requests.Request("GET", base_url, params=params, headers=headers)
             response.raise_for_status()
             
             # Parse response
@@ -214,6 +204,7 @@ class NCBIEntrezTool(BaseTool):
             
             # Add metadata
             result["_query_metadata"] = {
+                "cache_hit": getattr(response, "from_cache", False),
                 "database": database,
                 "utility": utility,
                 "search_term": search_term,
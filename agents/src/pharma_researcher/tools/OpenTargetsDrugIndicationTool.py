@@ -1,4 +1,3 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, Dict, Any, List
 from pydantic import BaseModel, Field
 import requests
@@ -6,6 +5,7 @@ import json
 import os
 import tempfile
 from pathlib import Path
+from .base import ApiTool, Query
 
 
 class OpenTargetsDrugIndicationToolInput(BaseModel):
@@ -40,7 +40,7 @@ class OpenTargetsDrugIndicationToolInput(BaseModel):
     )
 
 
-class OpenTargetsDrugIndicationTool(BaseTool):
+class OpenTargetsDrugIndicationTool(ApiTool):
     name: str = "open_targets_drug_indication_tool"
     description: str = (
         "Query Open Targets drug indications dataset to find approved and investigational "
@@ -54,14 +54,14 @@ class OpenTargetsDrugIndicationTool(BaseTool):
     )
     args_schema: Type[BaseModel] = OpenTargetsDrugIndicationToolInput
 
-    def _run(
+    def _query(
         self,
         drug_id: Optional[str] = None,
         disease_id: Optional[str] = None,
         min_phase: Optional[int] = None,
         approved_only: Optional[bool] = False,
         limit: Optional[int] = 100
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Query Open Targets drug indications data.
         
@@ -116,7 +116,7 @@ class OpenTargetsDrugIndicationTool(BaseTool):
                 "variables": variables
             }
             
-            response = requests.post(base_url, json=payload, headers=headers, timeout=30)
+            response = yield requests.Request("POST", base_url, json=payload, headers=headers)
             response.raise_for_status()
             
             data = response.json()
@@ -137,6 +137,8 @@ class OpenTargetsDrugIndicationTool(BaseTool):
                 approved_only,
                 limit
             )
+            if "_query_metadata" in results:
+                results["_query_metadata"]["cache_hit"] = getattr(response, "from_cache", False)
             
             return results
             
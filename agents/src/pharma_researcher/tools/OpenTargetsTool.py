@@ -1,8 +1,8 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, Dict, Any, List
 from pydantic import BaseModel, Field
 import requests
 import json
+from .base import ApiTool, Query
 
 
 class OpenTargetsToolInput(BaseModel):
@@ -63,7 +63,7 @@ class OpenTargetsToolInput(BaseModel):
     )
 
 
-class OpenTargetsTool(BaseTool):
+class OpenTargetsTool(ApiTool):
     name: str = "open_targets_graphql_tool"
     description: str = (
         "Query the Open Targets Platform GraphQL API to find potential drug targets, "
@@ -79,7 +79,7 @@ class OpenTargetsTool(BaseTool):
     )
     args_schema: Type[BaseModel] = OpenTargetsToolInput
 
-    def _run(
+    def _query(
         self,
         endpoint: str,
         entity_id: Optional[str] = None,
@@ -88,7 +88,7 @@ class OpenTargetsTool(BaseTool):
         search_query: Optional[str] = None,
         page_size: Optional[int] = 10,
         page_index: Optional[int] = 0
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Query the Open Targets Platform GraphQL API.
         
@@ -167,7 +167,7 @@ class OpenTargetsTool(BaseTool):
                 "variables": variables
             }
             
-            response = requests.post(base_url, json=payload, headers=headers, timeout=30)
+            response = yield requests.Request("POST", base_url, json=payload, headers=headers)
             response.raise_for_status()
             
             data = response.json()
@@ -185,6 +185,7 @@ class OpenTargetsTool(BaseTool):
             result = {
                 "data": data.get("data", {}),
                 "_query_metadata": {
+                    "cache_hit": getattr(response, "from_cache", False),
                     "endpoint": endpoint,
                     "entity_id": entity_id,
                     "query_type": query_type,
@@ -1,9 +1,9 @@
-from crewai.tools import BaseTool
 from typing import Optional, Type, Dict, List, Union, Any
 from pydantic import BaseModel, Field
 import requests
 import json
 import os
+from .base import ApiTool, Query
 
 
 class PatentsViewToolInput(BaseModel):
@@ -53,7 +53,7 @@ class PatentsViewToolInput(BaseModel):
     )
 
 
-class PatentsViewTool(BaseTool):
+class PatentsViewTool(ApiTool):
     name: str = "patents_view_api_tool"
     description: str = (
         "Search patents using the PatentsView API. "
@@ -66,7 +66,7 @@ class PatentsViewTool(BaseTool):
     )
     args_schema: Type[BaseModel] = PatentsViewToolInput
 
-    def _run(
+    def _query(
         self,
         query: Union[str, Dict[str, Any]],
         fields: Optional[List[str]] = None,
@@ -76,7 +76,7 @@ class PatentsViewTool(BaseTool):
         exclude_withdrawn: Optional[bool] = True,
         pad_patent_id: Optional[bool] = False,
         endpoint: Optional[str] = "patent"
-    ) -> Dict[str, Any]:
+    ) -> Query:
         """
         Search patents using PatentsView API with keyword matching.
         
@@ -185,7 +185,7 @@ class PatentsViewTool(BaseTool):
         # 5. Execute request
         # ------------------------------
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = yield requests.Request("GET", url, headers=headers, params=params)
             response.raise_for_status()
             data = response.json()
 
@@ -195,6 +195,7 @@ class PatentsViewTool(BaseTool):
 
             # Add metadata
             data["_query_metadata"] = {
+                "cache_hit": getattr(response, "from_cache", False),
                 "endpoint": endpoint,
                 "query": query_dict,
                 "total_results": data.get("total_patent_count", data.get("count", 0)),
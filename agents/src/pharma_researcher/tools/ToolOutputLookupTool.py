@@ -0,0 +1,48 @@
+from typing import Any, Dict, Optional, Type
+from pydantic import BaseModel, Field
+from pharma_researcher.compaction import handle_store
+from .base import PharmaTool
+
+
+class ToolOutputLookupToolInput(BaseModel):
+    """Input schema for ToolOutputLookupTool."""
+    handle: str = Field(..., description="The full_output_handle from a tool output's _compaction note")
+    path: Optional[str] = Field(
+        None,
+        description="Dotted path into the output, e.g. 'results' or 'studies.3.protocolSection'. Omit for the whole output."
+    )
+    offset: int = Field(0, description="First item to return when the path points to a list")
+    limit: int = Field(10, description="Number of items to return when the path points to a list")
+
+
+class ToolOutputLookupTool(PharmaTool):
+    name: str = "tool_output_lookup"
+    description: str = (
+        "Retrieve data omitted from a compacted tool output. Tool outputs that were too large carry a "
+        "'_compaction' note with a 'full_output_handle'; pass that handle and optionally a dotted path "
+        "and an offset/limit to page through long lists."
+    )
+    args_schema: Type[BaseModel] = ToolOutputLookupToolInput
+    store_full_output: bool = False
+
+    def _run(self, handle: str, path: Optional[str] = None, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
+        value = handle_store.get(handle)
+        if value is None:
+            return {"error": f"Unknown or expired handle '{handle}'. Call the original tool again."}
+
+        for part in filter(None, (path or "").split(".")):
+            if isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                value = value[int(part)]
+            elif isinstance(value, dict) and part in value:
+                value = value[part]
+            else:
+                return {"error": f"Path '{path}' not found in the output", "available_keys": list(value)[:50] if isinstance(value, dict) else None}
+
+        if isinstance(value, list):
+            return {
+                "path": path,
+                "total_items": len(value),
+                "offset": offset,
+                "items": value[offset:offset + limit]
+            }
+        return {"path": path, "value": value}
@@ -0,0 +1,102 @@
+"""
+Base classes of the research tools.
+"""
+import asyncio
+from typing import Any, Generator
+import requests
+from crewai.tools import BaseTool
+from crewai.tools.structured_tool import CrewStructuredTool
+from pharma_researcher.compaction import compact_output
+from .http import arequest, request
+
+# An API tool's query: yields the requests to send, receives their responses and returns the output
+Query = Generator[requests.Request, requests.Response, Any]
+
+class PharmaTool(BaseTool):
+    """
+    Research tool whose outputs are compacted to the tool's token budget
+    before they reach the agent (see pharma_researcher.compaction).
+    Subclasses implement _run as usual, and _arun when they can do better
+    than running _run on a worker thread.
+    """
+
+    # Whether the full output of a compacted call is kept for tool_output_lookup
+    store_full_output: bool = True
+
+    def run(self, *args: Any, **kwargs: Any) -> Any:
+        return self._compact(super().run(*args, **kwargs), kwargs)
+
+    async def arun(self, *args: Any, **kwargs: Any) -> Any:
+        return self._compact(await self._arun(*args, **kwargs), kwargs)
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(self._run, *args, **kwargs)
+
+    def to_structured_tool(self) -> CrewStructuredTool:
+        # Agents call the structured tool's func, which is _run by default
+        structured_tool = super().to_structured_tool()
+        structured_tool.func = self._run_compacted
+        return structured_tool
+
+    def _run_compacted(self, *args: Any, **kwargs: Any) -> Any:
+        return self._compact(self._run(*args, **kwargs), kwargs)
+
+    def _compact(self, output: Any, kwargs: dict) -> Any:
+        fields = kwargs.get("fields")
+        return compact_output(
+            self.name,
+            output,
+            fields=fields if isinstance(fields, list) else None,
+            store=self.store_full_output
+        )
+
+class ApiTool(PharmaTool):
+    """
+    Research tool backed by an upstream HTTP API.
+
+    Subclasses implement _query instead of _run: a generator taking the
+    tool's arguments that yields each requests.Request to send and gets its
+    response back at the yield (or the request's exception raised there),
+    then returns the tool output. _run sends the requests with the blocking
+    client and _arun with the event loop's async client (see tools.http),
+    so building requests and parsing responses is written once.
+    """
+
+    def _query(self, *args: Any, **kwargs: Any) -> Query:
+        raise NotImplementedError
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        query = self._query(*args, **kwargs)
+        try:
+            outgoing = next(query)
+            while True:
+                try:
+                    response = request(outgoing.method, outgoing.url, **_send_kwargs(outgoing))
+                except Exception as e:
+                    outgoing = query.throw(e)
+                else:
+                    outgoing = query.send(response)
+        except StopIteration as stop:
+            return stop.value
+
+    async def _arun(self, *args: Any, **kwargs: Any) -> Any:
+        query = self._query(*args, **kwargs)
+        try:
+            outgoing = next(query)
+            while True:
+                try:
+                    response = await arequest(outgoing.method, outgoing.url, **_send_kwargs(outgoing))
+                except Exception as e:
+                    outgoing = query.throw(e)
+                else:
+                    outgoing = query.send(response)
+        except StopIteration as stop:
+            return stop.value
+
+def _send_kwargs(outgoing: requests.Request) -> dict:
+    kwargs = {}
+    for name in ("params", "headers", "json", "data"):
+        value = getattr(outgoing, name)
+        if value:
+            kwargs[name] = value
+    return kwargs
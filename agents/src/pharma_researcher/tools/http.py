@@ -0,0 +1,334 @@
+"""
+HTTP client used by every tool to call its upstream API.
+
+All tools share one requests Session, so connections (and their TLS
+sessions) to each host are kept alive and reused across calls, agents and
+crews of the process. Connection pools are per host and thread-safe.
+
+arequest() is the async counterpart used by the tools' _arun: requests go
+through one httpx AsyncClient per event loop, so many tool calls and crews
+can be in flight on a loop without a thread each. It returns the same
+requests.Response objects as request(), so tools parse responses and
+handle errors identically on both paths. Synchronous code (agents calling
+tools in worker threads) can fan calls out onto the process's shared tool
+I/O loop with run_on_io_loop().
+
+Every attempt waits for the shared per-host rate limiter (see
+pharma_researcher.rate_limit) before it is sent, so concurrent crews stay
+within each API's limits together. Responses with a retryable status (429
+and 5xx) and connection errors are retried with exponential backoff,
+honouring Retry-After. The tools only send read-only queries, so POSTs
+(GraphQL) are retried like GETs.
+
+Successful responses are kept in the tool response cache (see
+pharma_researcher.response_cache) and repeated requests are answered from
+it without a network call. Responses carry from_cache, which tools report
+as cache_hit in their _query_metadata.
+
+Both paths can record their traffic to cassettes, or replay it offline
+instead of calling the APIs (see pharma_researcher.cassettes).
+
+Settings (environment):
+    HTTP_TIMEOUT: read timeout in seconds (default 30)
+    HTTP_CONNECT_TIMEOUT: connect timeout in seconds (default 10)
+    HTTP_RETRIES: retries after the first attempt (default 3)
+    HTTP_BACKOFF_SECONDS: first retry delay, doubled for every retry (default 1)
+    HTTP_MAX_RETRY_WAIT_SECONDS: longest delay before a retry; responses
+        asking to wait longer are returned as they are (default 30)
+    HTTP_POOL_SIZE: connections kept alive per host (default 10)
+"""
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from typing import Any, Coroutine, Optional, Tuple, TypeVar
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from pharma_researcher.cassettes import CassetteMiss, get_cassettes
+from pharma_researcher.rate_limit import get_rate_limiter
+from pharma_researcher.response_cache import get_response_cache, is_tool_cache_enabled
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+USER_AGENT = "pharma-researcher/1.0"
+DEFAULT_HEADERS = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip, deflate"}
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+POOL_HOSTS = 16  # hosts with their own connection pool
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_io_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _setting(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+def get_session() -> requests.Session:
+    """
+    The Session shared by all tools of the process.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = int(_setting("HTTP_POOL_SIZE", 10))
+            # Retries are done by request() so every attempt goes through the rate limiter
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size, max_retries=0)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+def close_session() -> None:
+    """
+    Close the pooled connections; the next request opens a new Session.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    The AsyncClient shared by all tools on the running event loop.
+    httpx connections belong to the loop that opened them, so each loop has its own client.
+    """
+    loop = asyncio.get_running_loop()
+    with _session_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            pool_size = int(_setting("HTTP_POOL_SIZE", 10))
+            # httpx pools are not per host, so keep as many idle connections as the Session's pools together
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=POOL_HOSTS * pool_size)
+            client = httpx.AsyncClient(headers=DEFAULT_HEADERS, limits=limits, follow_redirects=True)
+            _async_clients[loop] = client
+        return client
+
+async def close_async_client() -> None:
+    """
+    Close the running loop's AsyncClient; the next async request opens a new one.
+    """
+    with _session_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+def get_io_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop of the process's tool I/O thread, started on first use.
+    Async tool calls made from synchronous code run there and share its AsyncClient.
+    """
+    global _io_loop
+    with _session_lock:
+        if _io_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tool-io", daemon=True).start()
+            _io_loop = loop
+        return _io_loop
+
+def run_on_io_loop(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine on the tool I/O loop and block until it is done.
+    Must not be called from that loop.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_io_loop()).result()
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """
+    Seconds the server asked to wait, from a Retry-After header in seconds or as an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared Session with rate limiting and retries,
+    or answer it from the response cache or the cassettes.
+    Returns the last response; raises the last connection error if every attempt failed.
+    """
+    cassettes = get_cassettes()
+    cache, key, cached = _lookup(method, url, kwargs) if cassettes is None else (None, None, None)
+    if cached is not None:
+        return cached
+
+    kwargs.setdefault("timeout", _timeout())
+    retries, backoff, max_wait = _retry_settings()
+    session = get_session()
+
+    for attempt in range(retries + 1):
+        delay = _backoff(backoff, attempt)
+        try:
+            if cassettes is not None and cassettes.replaying:
+                wait, outcome = cassettes.replay(method, url, **kwargs)
+                time.sleep(wait)
+                response = _replayed(outcome)
+            else:
+                get_rate_limiter().acquire(url)
+                response = session.request(method, url, **kwargs)
+        except CassetteMiss:
+            raise
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        else:
+            response.from_cache = False
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                _keep(cassettes, cache, key, method, url, kwargs, response)
+                return response
+            delay = retry_after(response) or delay
+            if delay > max_wait:
+                return response
+            response.close()
+        time.sleep(min(delay, max_wait))
+
+async def arequest(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    request() for coroutines, sent through the event loop's AsyncClient.
+    Takes the same keyword arguments (params, headers, json, data, timeout)
+    and raises the same requests exceptions.
+    """
+    # The cache and cassettes are local files, quick enough to use on the loop
+    cassettes = get_cassettes()
+    cache, key, cached = _lookup(method, url, kwargs) if cassettes is None else (None, None, None)
+    if cached is not None:
+        return cached
+
+    connect_timeout, read_timeout = _split_timeout(kwargs.pop("timeout", None) or _timeout())
+    timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+    retries, backoff, max_wait = _retry_settings()
+    client = get_async_client()
+
+    for attempt in range(retries + 1):
+        delay = _backoff(backoff, attempt)
+        try:
+            if cassettes is not None and cassettes.replaying:
+                wait, outcome = cassettes.replay(method, url, **kwargs)
+                await asyncio.sleep(wait)
+                response = _replayed(outcome)
+            else:
+                await get_rate_limiter().acquire_async(url)
+                response = _from_httpx(await client.request(method, url, timeout=timeout, **kwargs))
+        except CassetteMiss:
+            raise
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == retries:
+                raise
+        except httpx.TimeoutException as e:
+            if attempt == retries:
+                raise requests.exceptions.Timeout(str(e) or type(e).__name__) from e
+        except httpx.TransportError as e:
+            if attempt == retries:
+                raise requests.exceptions.ConnectionError(str(e) or type(e).__name__) from e
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                _keep(cassettes, cache, key, method, url, kwargs, response)
+                return response
+            delay = retry_after(response) or delay
+            if delay > max_wait:
+                return response
+        await asyncio.sleep(min(delay, max_wait))
+
+def _lookup(method: str, url: str, kwargs: dict) -> Tuple[Any, Optional[str], Optional[requests.Response]]:
+    """
+    The response cache, the request's cache key and its cached response, if any.
+    """
+    if not is_tool_cache_enabled():
+        return None, None, None
+    cache = get_response_cache()
+    try:
+        key, cached = cache.lookup(method, url, **kwargs)
+    except sqlite3.Error as e:
+        logger.warning(f"Tool response cache lookup failed: {e}")
+        return cache, None, None
+    return cache, key, cached
+
+def _keep(cassettes, cache, key: Optional[str], method: str, url: str, kwargs: dict, response: requests.Response) -> None:
+    """
+    Keep a final live response in the response cache, or record it on the cassettes.
+    """
+    if cassettes is not None:
+        if not cassettes.replaying:
+            cassettes.record(method, url, kwargs, response)
+    elif key is not None:
+        try:
+            cache.store(key, response)
+        except sqlite3.Error as e:
+            logger.warning(f"Tool response cache store failed: {e}")
+
+def _replayed(outcome):
+    if isinstance(outcome, Exception):
+        raise outcome
+    return outcome
+
+def _timeout() -> Tuple[float, float]:
+    return _setting("HTTP_CONNECT_TIMEOUT", 10), _setting("HTTP_TIMEOUT", 30)
+
+def _split_timeout(timeout) -> Tuple[float, float]:
+    if isinstance(timeout, (tuple, list)):
+        return timeout[0], timeout[1]
+    return timeout, timeout
+
+def _retry_settings() -> Tuple[int, float, float]:
+    return (
+        int(_setting("HTTP_RETRIES", 3)),
+        _setting("HTTP_BACKOFF_SECONDS", 1),
+        _setting("HTTP_MAX_RETRY_WAIT_SECONDS", 30)
+    )
+
+def _backoff(backoff: float, attempt: int) -> float:
+    # Jitter keeps concurrent crews from retrying in lockstep
+    return backoff * (2 ** attempt) * random.uniform(0.8, 1.2)
+
+def _from_httpx(response: httpx.Response) -> requests.Response:
+    """
+    Wrap a read httpx response as a requests.Response.
+    """
+    prepared = requests.PreparedRequest()
+    prepared.method = response.request.method
+    prepared.url = str(response.request.url)
+    prepared.headers = CaseInsensitiveDict(response.request.headers.items())
+    prepared.body = response.request.content or None
+
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.reason = response.reason_phrase
+    converted.headers = CaseInsensitiveDict(response.headers.items())
+    converted.url = str(response.url)
+    converted.encoding = response.charset_encoding
+    converted.elapsed = response.elapsed
+    converted.request = prepared
+    converted._content = response.content
+    converted.from_cache = False
+    return converted
+
+def http_get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+def http_post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+async def async_http_get(url: str, **kwargs) -> requests.Response:
+    return await arequest("GET", url, **kwargs)
+
+async def async_http_post(url: str, **kwargs) -> requests.Response:
+    return await arequest("POST", url, **kwargs)
@@ -0,0 +1,12 @@
+"""
+Shared setup of the crew's offline tests. Run from agents/ with: python -m pytest tests
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+# No telemetry threads left behind at interpreter exit
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
@@ -0,0 +1,52 @@
+"""
+Research tools replaying recorded API traffic (pharma_researcher.cassettes).
+
+tests/cassettes holds a small PatentsView cassette in the recorded format,
+so the tools' request building, sending and parsing run without network
+access or API keys.
+"""
+import asyncio
+from pathlib import Path
+import pytest
+from pharma_researcher.cassettes import CassetteLibrary, use_cassettes
+from pharma_researcher.tools.PatentsViewTool import PatentsViewTool
+
+CASSETTES = Path(__file__).resolve().parent / "cassettes"
+
+RECORDED = {
+    "query": {"_text_any": {"patent_abstract": "metformin"}},
+    "fields": ["patent_id", "patent_title", "patent_date"],
+    "size": 2,
+}
+
+@pytest.fixture(autouse=True)
+def replay(monkeypatch):
+    # Sent as a header, so not part of the recording
+    monkeypatch.setenv("PATENTS_VIEW_API_KEY", "test")
+    use_cassettes(CassetteLibrary(CASSETTES, "replay"))
+    yield
+    use_cassettes(None)
+
+def check_recorded_output(output):
+    assert output["error"] is False  # PatentsView's own flag, not a tool error
+    assert [patent["patent_id"] for patent in output["patents"]] == ["11324718", "10987654"]
+    metadata = output["_query_metadata"]
+    assert metadata["results_returned"] == 2
+    assert metadata["cache_hit"] is False
+
+def test_run_replays_recording():
+    check_recorded_output(PatentsViewTool()._run(**RECORDED))
+
+def test_arun_replays_recording():
+    check_recorded_output(asyncio.run(PatentsViewTool()._arun(**RECORDED)))
+
+def test_unrecorded_request_fails_offline():
+    output = PatentsViewTool()._run(**{**RECORDED, "size": 3})
+
+    assert "No recorded response" in output["error"]
+    assert "patentsview.json" in output["error"]
+
+def test_unrecorded_request_fails_offline_async():
+    output = asyncio.run(PatentsViewTool()._arun(**{**RECORDED, "size": 3}))
+
+    assert "No recorded response" in output["error"]
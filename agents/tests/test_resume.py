@@ -0,0 +1,49 @@
+"""
+Resuming a run after the tasks an earlier run completed (crew.resume_tasks).
+"""
+import gc
+import pytest
+from crewai.utilities.constants import NOT_SPECIFIED
+from crewai.utilities.rpm_controller import RPMController
+
+RESEARCH_TASKS = 8
+
+@pytest.fixture(scope="module")
+def template():
+    # Building the crew needs provider keys but never calls the providers
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        for name in ("OPENAI_API_KEY", "GEMINI_API_KEY", "GOOGLE_API_KEY", "SERPER_API_KEY"):
+            monkeypatch.setenv(name, "test")
+        from pharma_researcher.crew import PharmaResearcher
+        yield PharmaResearcher().crew()
+
+    # Agents with max_rpm, including those a resumed run drops, keep a timer
+    # thread that would hold up the exit
+    for controller in (obj for obj in gc.get_objects() if isinstance(obj, RPMController)):
+        controller.stop_rpm_counter()
+
+@pytest.fixture
+def resume(template):
+    from pharma_researcher.crew import new_run
+
+    def resume(completed_research: int):
+        research = [task.name for task in template.tasks[:RESEARCH_TASKS]]
+        crew = new_run(template, None, {name: "stored output" for name in research[:completed_research]})
+        return research, {task.name: task for task in crew.tasks}
+    return resume
+
+def test_remaining_research_tasks_stay_parallel(resume):
+    research, tasks = resume(3)
+
+    assert not any(name in tasks for name in research[:3])
+    for name in research[3:]:
+        assert tasks[name].async_execution, name
+        assert tasks[name].context is NOT_SPECIFIED, name
+
+def test_sync_task_reads_restored_outputs(resume):
+    research, tasks = resume(3)
+    title = tasks["generate_report_title_task"]
+
+    assert not title.async_execution
+    assert [task.name for task in title.context] == research
+    assert all(task.output.raw == "stored output" for task in title.context[:3])
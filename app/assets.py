@@ -0,0 +1,161 @@
+"""
+Fingerprinted, precompressed static assets.
+
+At startup every file under static/ is read once, given a content-hashed
+URL (js/query.js -> /static/js/query.<hash>.js) and compressed with gzip
+and, when the brotli package is installed, brotli. Hashed URLs never
+change content, so they are served from memory with a one-year immutable
+cache lifetime. Templates get the hashed URLs through asset_url().
+"""
+import gzip
+import hashlib
+import logging
+import mimetypes
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = "/static"
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+@dataclass
+class Asset:
+    path: str  # original path relative to the static directory
+    hashed_path: str
+    media_type: str
+    etag: str
+    body: bytes
+    encodings: Dict[str, bytes] = field(default_factory=dict)  # content-coding -> compressed body
+
+class AssetStore:
+    """
+    In-memory store of the static directory, served as an ASGI app.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._by_path: Dict[str, Asset] = {}
+        self._by_hashed_path: Dict[str, Asset] = {}
+
+    def build(self):
+        """
+        Fingerprint and precompress every file in the static directory.
+        """
+        by_path, by_hashed_path = {}, {}
+
+        for file_path in sorted(self.directory.rglob("*")):
+            if not file_path.is_file():
+                continue
+            asset = self._load(file_path)
+            by_path[asset.path] = asset
+            by_hashed_path[asset.hashed_path] = asset
+
+        self._by_path, self._by_hashed_path = by_path, by_hashed_path
+        logger.info(f"Prepared {len(by_path)} static assets (brotli {'enabled' if brotli else 'unavailable'})")
+
+    def url(self, path: str) -> str:
+        """
+        URL of an asset, fingerprinted when the asset is known.
+        """
+        path = path.lstrip("/")
+        asset = self._by_path.get(path)
+        return f"{URL_PREFIX}/{asset.hashed_path if asset else path}"
+
+    def _load(self, file_path: Path) -> Asset:
+        relative = file_path.relative_to(self.directory).as_posix()
+        body = file_path.read_bytes()
+        digest = hashlib.sha256(body).hexdigest()
+
+        stem, dot, suffix = relative.rpartition(".")
+        hashed_path = f"{stem}.{digest[:12]}.{suffix}" if dot and stem else f"{relative}.{digest[:12]}"
+
+        media_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type += "; charset=utf-8"
+
+        asset = Asset(
+            path=relative,
+            hashed_path=hashed_path,
+            media_type=media_type,
+            etag=f'"{digest[:32]}"',
+            body=body
+        )
+
+        if media_type.startswith(COMPRESSIBLE_TYPES):
+            candidates = {"gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli:
+                candidates["br"] = brotli.compress(body, quality=11)
+            # Keep only encodings that actually save bytes
+            asset.encodings = {coding: data for coding, data in candidates.items() if len(data) < len(body)}
+
+        return asset
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        path = scope["path"]
+        # Mounted apps see their prefix in root_path (Starlette) or stripped from path
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        path = path.lstrip("/")
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        response = self.response_for(path, headers, head=scope["method"] == "HEAD")
+        await response(scope, receive, send)
+
+    def response_for(self, path: str, headers: Dict[str, str], head: bool = False) -> Response:
+        asset = self._by_hashed_path.get(path)
+        immutable = asset is not None
+        if asset is None:
+            # Unhashed URLs still work but must be revalidated
+            asset = self._by_path.get(path)
+        if asset is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+
+        response_headers = {
+            "Cache-Control": IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding"
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and asset.etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=response_headers)
+
+        body = asset.body
+        coding = self._negotiate(asset, headers.get("accept-encoding"))
+        if coding:
+            body = asset.encodings[coding]
+            response_headers["Content-Encoding"] = coding
+
+        response = Response(b"" if head else body, media_type=asset.media_type, headers=response_headers)
+        if head:
+            response.headers["Content-Length"] = str(len(body))
+        return response
+
+    @staticmethod
+    def _negotiate(asset: Asset, accept_encoding: Optional[str]) -> Optional[str]:
+        accepted = set()
+        for part in (accept_encoding or "").lower().split(","):
+            coding, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip())
+
+        for coding in ("br", "gzip"):
+            if coding in asset.encodings and coding in accepted:
+                return coding
+        return None
+
+# Shared asset store for the API process
+static_assets = AssetStore("static")
@@ -1,4 +1,25 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import bcrypt
+from app.config import settings
+
+# bcrypt releases the GIL while hashing, so a small thread pool keeps the
+# work off the event loop and caps how many CPUs hashing can occupy.
+_hashing_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_hashing_pool() -> ThreadPoolExecutor:
+    global _hashing_pool
+    with _pool_lock:
+        if _hashing_pool is None:
+            _hashing_pool = ThreadPoolExecutor(
+                max_workers=settings.HASHING_POOL_SIZE or min(4, os.cpu_count() or 1),
+                thread_name_prefix="password-hashing"
+            )
+        return _hashing_pool
 
 def hash_password(password: str) -> str:
     """
@@ -6,7 +27,7 @@ def hash_password(password: str) -> str:
     Returns the hashed password as a string.
     """
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -18,3 +39,35 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     password_bytes = plain_password.encode('utf-8')
     hashed_bytes = hashed_password.encode('utf-8')
     return bcrypt.checkpw(password_bytes, hashed_bytes)
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash was made with a different work factor than configured.
+    bcrypt hashes look like $2b$<rounds>$<salt+hash>.
+    """
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return True
+    return rounds != settings.BCRYPT_ROUNDS
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hashing_pool(), hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hashing_pool(), verify_password, plain_password, hashed_password)
+
+def shutdown_hashing_pool():
+    global _hashing_pool
+    with _pool_lock:
+        if _hashing_pool is not None:
+            _hashing_pool.shutdown(wait=False, cancel_futures=True)
+            _hashing_pool = None
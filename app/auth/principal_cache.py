@@ -0,0 +1,118 @@
+"""
+In-process cache of authenticated principals.
+
+Tokens carry the user's id, username and email, so most requests are
+authenticated from the token alone. Tokens without those claims (issued
+before they were added) or issued before the user was invalidated fall
+back to a database lookup, cached here with a TTL and an LRU bound.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from app.config import settings
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    The authenticated user as seen by request handlers.
+    Exposes the same identity attributes as the User model.
+    """
+    id: int
+    username: str
+    email: str
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(id=user.id, username=user.username, email=user.email)
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["Principal"]:
+        """
+        Build a principal from token claims, or None if any are missing.
+        """
+        user_id = payload.get("user_id")
+        username = payload.get("username")
+        email = payload.get("email")
+        if user_id is None or not username or not email:
+            return None
+        return cls(id=user_id, username=username, email=email)
+
+class PrincipalCache:
+    """
+    TTL + LRU cache of principals keyed by user id.
+
+    invalidate() drops the cached entry and marks every token issued
+    before that moment as stale, so stale tokens are re-checked against
+    the database instead of being trusted from their claims.
+    """
+
+    def __init__(self, ttl_seconds: int, max_size: int, token_lifetime_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self._entries: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+        self._stale_before: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, principal: Principal):
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_stale(self, user_id: int, issued_at: Optional[float]) -> bool:
+        """
+        Whether a token issued at `issued_at` predates an invalidation.
+        Tokens without an iat claim are always treated as stale.
+        """
+        if issued_at is None:
+            return True
+        with self._lock:
+            stale_before = self._stale_before.get(user_id)
+        return stale_before is not None and issued_at < stale_before
+
+    def invalidate(self, user_id: int):
+        """
+        Forget the cached principal after logout or a profile change.
+        """
+        now = time.time()
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._stale_before[user_id] = now
+            self._stale_before.move_to_end(user_id)
+            # Markers only matter while tokens issued before them can still be valid
+            cutoff = now - self.token_lifetime_seconds
+            while self._stale_before:
+                oldest_user, marked_at = next(iter(self._stale_before.items()))
+                if marked_at >= cutoff:
+                    break
+                del self._stale_before[oldest_user]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stale_before.clear()
+
+# Shared cache for the API process
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    token_lifetime_seconds=settings.PRINCIPAL_STALE_MARKER_SECONDS
+)
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr
-from app.database import get_db
+from app.database import get_async_db
 from app.users.models import User
-from app.auth.hashing import hash_password, verify_password
+from app.auth.hashing import hash_password_async, needs_rehash, verify_password_async
 from app.auth.jwt_handler import create_access_token, decode_access_token
+from app.auth.principal_cache import Principal, principal_cache
 
 router = APIRouter()
 
@@ -19,8 +21,15 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+def token_claims(user: User) -> dict:
+    """
+    Claims embedded in the access token.
+    They carry enough of the user to authenticate requests without a lookup.
+    """
+    return {"user_id": user.id, "username": user.username, "email": user.email}
+
 @router.post("/register")
-async def register(user_data: UserCreate, response: Response, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user.
     Validates input and creates a new user account.
@@ -31,9 +40,10 @@ async def register(user_data: UserCreate, response: Response, db: Session = Depe
             detail="Passwords do not match"
         )
     
-    existing_user = db.query(User).filter(
-        (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    result = await db.execute(
+        select(User).where(or_(User.email == user_data.email, User.username == user_data.username))
+    )
+    existing_user = result.scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -41,7 +51,7 @@ async def register(user_data: UserCreate, response: Response, db: Session = Depe
             detail="User with this email or username already exists"
         )
     
-    hashed_pw = hash_password(user_data.password)
+    hashed_pw = await hash_password_async(user_data.password)
     
     new_user = User(
         username=user_data.username,
@@ -50,10 +60,10 @@ async def register(user_data: UserCreate, response: Response, db: Session = Depe
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
-    access_token = create_access_token(data={"user_id": new_user.id, "email": new_user.email})
+    access_token = create_access_token(data=token_claims(new_user))
     
     response.set_cookie(
         key="access_token",
@@ -66,11 +76,12 @@ async def register(user_data: UserCreate, response: Response, db: Session = Depe
     return {"message": "User registered successfully", "redirect": "/query"}
 
 @router.post("/login")
-async def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and create session.
     """
-    user = db.query(User).filter(User.email == user_data.email).first()
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    user = result.scalars().first()
     
     if not user:
         raise HTTPException(
@@ -78,10 +89,8 @@ async def login(user_data: UserLogin, response: Response, db: Session = Depends(
             detail="Invalid email or password"
         )
     
-    db.refresh(user)
-    
     try:
-        if not user.hashed_password or not verify_password(user_data.password, user.hashed_password):
+        if not user.hashed_password or not await verify_password_async(user_data.password, user.hashed_password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
@@ -92,7 +101,12 @@ async def login(user_data: UserLogin, response: Response, db: Session = Depends(
             detail="Invalid email or password"
         )
     
-    access_token = create_access_token(data={"user_id": user.id, "email": user.email})
+    # Upgrade hashes made with an old work factor while we have the password
+    if needs_rehash(user.hashed_password):
+        user.hashed_password = await hash_password_async(user_data.password)
+        await db.commit()
+    
+    access_token = create_access_token(data=token_claims(user))
     
     response.set_cookie(
         key="access_token",
@@ -105,16 +119,22 @@ async def login(user_data: UserLogin, response: Response, db: Session = Depends(
     return {"message": "Login successful", "redirect": "/query"}
 
 @router.post("/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
     """
     Logout user by clearing the access token cookie.
     """
+    token = request.cookies.get("access_token")
+    payload = decode_access_token(token) if token else None
+    if payload and payload.get("user_id") is not None:
+        principal_cache.invalidate(payload["user_id"])
+    
     response.delete_cookie("access_token")
     return {"message": "Logout successful", "redirect": "/"}
 
-def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_db)) -> Principal:
     """
     Dependency to get current authenticated user from JWT token.
+    Served from the token claims or the principal cache when possible.
     """
     token = request.cookies.get("access_token")
     
@@ -132,8 +152,27 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
             detail="Invalid or expired token"
         )
     
+    return await resolve_principal(payload, db)
+
+async def resolve_principal(payload: dict, db: AsyncSession) -> Principal:
+    """
+    Turn a verified token payload into a principal.
+    Only tokens without full claims, or issued before the user was
+    invalidated, need the principal cache or the database.
+    """
     user_id = payload.get("user_id")
-    user = db.query(User).filter(User.id == user_id).first()
+    
+    if not principal_cache.is_stale(user_id, payload.get("iat")):
+        principal = Principal.from_claims(payload)
+        if principal:
+            return principal
+    
+    principal = principal_cache.get(user_id)
+    if principal:
+        return principal
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalars().first()
     
     if not user:
         raise HTTPException(
@@ -141,4 +180,6 @@ def get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
             detail="User not found"
         )
     
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(principal)
+    return principal
@@ -11,19 +11,46 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100  # set to 0 behind pgbouncer in transaction mode
     
     # JWT
-    JWT_SECRET_KEY: str
+    JWT_SECRET_KEY: Optional[str] = None
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60  # how long a looked-up user is trusted without the database
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_STALE_MARKER_SECONDS: int = 86400  # keep invalidation markers for the token lifetime
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # existing hashes are upgraded on the next successful login
+    HASHING_POOL_SIZE: int = 0  # threads used for bcrypt, 0 = min(4, CPU count)
     
     # API Keys for agents
     OPENAI_API_KEY: Optional[str] = None
     SERPER_API_KEY: Optional[str] = None
     
     # Agent processing
-    AGENT_TIMEOUT: int = 300  # 5 minutes default
+    AGENT_TIMEOUT: int = 300  # seconds each crew task may run, 0 = no limit
+    RUN_TIMEOUT: int = 1800  # seconds a whole crew run may take, 0 = no limit
     ENABLE_AGENT_PROCESSING: bool = True
+    REPORT_CACHE_TTL_HOURS: int = 24  # reuse reports for equivalent questions this recent, 0 disables
+    QUERY_ROUTING_ENABLED: bool = True  # run only the research agents relevant to each question
+    STORE_TASK_OUTPUTS: bool = True  # keep each task's output in query_task_runs
+    ARTIFACTS_DIR: Optional[str] = None  # also write task outputs to <dir>/<query id>/<task>.md
+    RESUME_FAILED_RUNS: bool = True  # retries reuse the stored outputs of tasks that already completed
+    
+    # Job queue / worker
+    WORKER_CONCURRENCY: int = 2  # crews run in parallel per worker process
+    WORKER_POLL_INTERVAL: float = 2.0  # seconds between empty-queue polls
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF_SECONDS: int = 30  # doubled after every failed attempt
+    JOB_HEARTBEAT_SECONDS: int = 15
+    JOB_LEASE_SECONDS: int = 120  # running jobs without a heartbeat for this long are re-queued
     
     # Paths
     @property
@@ -34,6 +61,7 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = True
+        extra = "ignore"
 
 # Global settings instance
 settings = Settings()
@@ -1,9 +1,12 @@
 import os
 import logging
 from sqlalchemy import create_engine
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import dotenv
+from app.config import settings
 
 dotenv.load_dotenv(override=True)
 
@@ -15,9 +18,54 @@ if not DATABASE_URL:
     logger.error("DATABASE_URL environment variable is not set")
     raise ValueError("DATABASE_URL environment variable is not set. Please configure your database connection.")
 
+def get_pool_options(database_url: str) -> dict:
+    """
+    Connection pool options shared by the sync and async engines.
+    """
+    options = {
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    # SQLite engines don't use a sized connection pool
+    if make_url(database_url).get_backend_name() != "sqlite":
+        options.update({
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+        })
+    return options
+
+def get_async_database_url(database_url: str) -> tuple[URL, dict]:
+    """
+    Translate the configured database URL for the async driver.
+
+    Returns:
+        tuple: (async URL, connect_args for the driver)
+    """
+    url = make_url(database_url)
+    connect_args = {}
+
+    if url.get_backend_name() == "postgresql":
+        query = dict(url.query)
+        # asyncpg takes the libpq sslmode as its own "ssl" argument
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            connect_args["ssl"] = sslmode
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        query["prepared_statement_cache_size"] = str(settings.DB_STATEMENT_CACHE_SIZE)
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+
+    return url, connect_args
+
 try:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(DATABASE_URL, **get_pool_options(DATABASE_URL))
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    async_url, async_connect_args = get_async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(async_url, connect_args=async_connect_args, **get_pool_options(DATABASE_URL))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 except Exception as e:
     logger.error(f"Failed to create database engine: {e}")
     raise
@@ -35,6 +83,14 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    Dependency function to get an async database session.
+    Queries run on the event loop without blocking other requests.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     """
     Create all database tables defined in models.
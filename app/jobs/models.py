@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.database import Base
+
+class Job(Base):
+    """
+    Job model for durable agent runs.
+    Each job drives the processing of one query and is claimed by a worker.
+    """
+    __tablename__ = "agent_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    query_id = Column(Integer, ForeignKey("queries.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = Column(String, default="queued", nullable=False)  # queued, running, succeeded, failed, cancelled
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    cancel_requested_at = Column(DateTime, nullable=True)  # set when the user cancels the query
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    query = relationship("Query")
+
+    __table_args__ = (
+        Index("ix_agent_jobs_status_run_after", "status", "run_after"),
+    )
@@ -0,0 +1,216 @@
+"""
+Postgres-backed job queue for agent runs.
+
+Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED so any number of
+worker processes (on any number of hosts) can pull from the same table
+without handing the same job to two workers.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.jobs.models import Job
+from app.queries.models import Query
+from app.services.status_events import publish_query_status
+
+logger = logging.getLogger(__name__)
+
+def enqueue_job(db: Session, query_id: int) -> Job:
+    """
+    Add a job for the given query to the queue.
+    The caller is responsible for committing the session.
+    """
+    job = Job(
+        query_id=query_id,
+        status="queued",
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow()
+    )
+    db.add(job)
+    return job
+
+def requeue_job(job: Job) -> None:
+    """
+    Queue a finished job again with a fresh set of attempts.
+    The caller is responsible for committing the session.
+    """
+    job.status = "queued"
+    job.attempts = 0
+    job.max_attempts = settings.JOB_MAX_ATTEMPTS
+    job.run_after = datetime.utcnow()
+    job.locked_by = None
+    job.last_error = None
+    job.cancel_requested_at = None
+
+def request_cancel(job: Job) -> None:
+    """
+    Ask for a job to stop. Queued jobs are cancelled right away, running
+    jobs are stopped by their worker (see cancel_requested_jobs).
+    The caller is responsible for committing the session.
+    """
+    job.cancel_requested_at = datetime.utcnow()
+    if job.status == "queued":
+        job.status = "cancelled"
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[Job]:
+    """
+    Claim the next runnable job for this worker.
+    Returns the claimed job, or None if the queue is empty.
+    """
+    now = datetime.utcnow()
+
+    job = db.query(Job).filter(
+        Job.status == "queued",
+        Job.run_after <= now
+    ).order_by(Job.run_after, Job.id).with_for_update(skip_locked=True).first()
+
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = "running"
+    job.attempts += 1
+    job.locked_by = worker_id
+    job.locked_at = now
+    job.heartbeat_at = now
+    db.commit()
+    db.refresh(job)
+
+    return job
+
+def heartbeat_jobs(db: Session, job_ids: List[int], worker_id: str) -> None:
+    """
+    Refresh the lease on jobs this worker is still running.
+    """
+    if not job_ids:
+        return
+
+    db.query(Job).filter(
+        Job.id.in_(job_ids),
+        Job.locked_by == worker_id,
+        Job.status == "running"
+    ).update({Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+def complete_job(db: Session, job_id: int) -> None:
+    """
+    Mark a job as succeeded and release its lock.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job:
+        job.status = "succeeded"
+        job.locked_by = None
+        job.last_error = None
+        db.commit()
+
+def cancel_requested_jobs(db: Session, job_ids: List[int]) -> List[int]:
+    """
+    Those of the given jobs whose query was cancelled while they run.
+    """
+    if not job_ids:
+        return []
+
+    rows = db.query(Job.id).filter(
+        Job.id.in_(job_ids),
+        Job.cancel_requested_at.isnot(None)
+    ).all()
+    return [row[0] for row in rows]
+
+def finish_cancelled_job(db: Session, job_id: int) -> None:
+    """
+    Mark a job whose run was cancelled and release its lock.
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if job:
+        job.status = "cancelled"
+        job.locked_by = None
+        db.commit()
+
+def fail_job(db: Session, job_id: int, error: str) -> bool:
+    """
+    Record a failed attempt.
+    Schedules a retry with exponential backoff while attempts remain.
+
+    Returns:
+        bool: True if the job will be retried, False if it failed permanently
+    """
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        return False
+
+    job.last_error = error
+    job.locked_by = None
+
+    # A run that fails before its worker sees the cancellation is not retried
+    if job.cancel_requested_at is not None:
+        job.status = "cancelled"
+        _cancel_query(db, job.query_id)
+        db.commit()
+        logger.info(f"Job {job_id} failed after it was cancelled, not retrying")
+        return False
+
+    if job.attempts < job.max_attempts:
+        delay = settings.JOB_RETRY_BACKOFF_SECONDS * (2 ** (job.attempts - 1))
+        job.status = "queued"
+        job.run_after = datetime.utcnow() + timedelta(seconds=delay)
+        db.commit()
+        logger.info(f"Job {job_id} will be retried in {delay}s (attempt {job.attempts}/{job.max_attempts})")
+        return True
+
+    job.status = "failed"
+    db.commit()
+    return False
+
+def requeue_orphaned_jobs(db: Session) -> int:
+    """
+    Re-queue running jobs whose worker stopped sending heartbeats.
+    Jobs that have used up their attempts are failed instead.
+
+    Returns:
+        int: Number of orphaned jobs found
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_LEASE_SECONDS)
+
+    orphans = db.query(Job).filter(
+        Job.status == "running",
+        Job.heartbeat_at < cutoff
+    ).with_for_update(skip_locked=True).all()
+
+    for job in orphans:
+        logger.warning(f"Job {job.id} lost its worker ({job.locked_by}), reclaiming")
+        job.locked_by = None
+        query = db.query(Query).filter(Query.id == job.query_id).first()
+
+        if job.cancel_requested_at is not None:
+            job.status = "cancelled"
+            _cancel_query(db, job.query_id)
+        elif job.attempts < job.max_attempts:
+            job.status = "queued"
+            job.run_after = datetime.utcnow()
+            if query:
+                query.status = "pending"
+                publish_query_status(db, query.id, query.status)
+        else:
+            job.status = "failed"
+            job.last_error = "Worker stopped responding"
+            if query:
+                query.status = "failed"
+                query.error_message = "Processing was interrupted too many times"
+                query.completed_at = datetime.utcnow()
+                publish_query_status(db, query.id, query.status, error_message=query.error_message)
+
+    db.commit()
+    return len(orphans)
+
+def _cancel_query(db: Session, query_id: int) -> None:
+    """
+    Mark the query of a cancelled job as cancelled, as cancel_query does
+    for a queued one. The caller is responsible for committing the session.
+    """
+    query = db.query(Query).filter(Query.id == query_id).first()
+    if query and query.status not in ("cancelled", "timed_out", "completed"):
+        query.status = "cancelled"
+        query.error_message = "Cancelled by user"
+        query.completed_at = datetime.utcnow()
+        publish_query_status(db, query.id, query.status, error_message=query.error_message)
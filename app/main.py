@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Request, Depends
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, RedirectResponse
 from contextlib import asynccontextmanager
 import logging
@@ -9,7 +8,10 @@ from app.auth.routes import router as auth_router, get_current_user
 from app.users.routes import router as users_router
 from app.queries.routes import router as queries_router
 from app.results.routes import router as results_router
-from app.users.models import User
+from app.auth.principal_cache import Principal
+from app.services.status_events import status_broker
+from app.auth.hashing import shutdown_hashing_pool
+from app.assets import static_assets
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +24,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
+    static_assets.build()
+    status_broker.start()
     yield
     logger.info("Shutting down application...")
+    status_broker.stop()
+    shutdown_hashing_pool()
 
 app = FastAPI(title="Drug Repurposing Platform", lifespan=lifespan)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", static_assets, name="static")
 
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["asset_url"] = static_assets.url
 
 app.include_router(auth_router, prefix="/auth", tags=["Authentication"])
 app.include_router(users_router, prefix="/users", tags=["Users"])
@@ -58,7 +65,7 @@ async def login_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request})
 
 @app.get("/query", response_class=HTMLResponse)
-async def query_page(request: Request, current_user: User = Depends(get_current_user)):
+async def query_page(request: Request, current_user: Principal = Depends(get_current_user)):
     """
     Query/chat page for authenticated users.
     """
@@ -68,7 +75,7 @@ async def query_page(request: Request, current_user: User = Depends(get_current_
     })
 
 @app.get("/results/{report_id}", response_class=HTMLResponse)
-async def results_page(request: Request, report_id: int, current_user: User = Depends(get_current_user)):
+async def results_page(request: Request, report_id: int, current_user: Principal = Depends(get_current_user)):
     """
     Results page showing generated report.
     """
@@ -79,7 +86,7 @@ async def results_page(request: Request, report_id: int, current_user: User = De
     })
 
 @app.get("/history", response_class=HTMLResponse)
-async def history_page(request: Request, current_user: User = Depends(get_current_user)):
+async def history_page(request: Request, current_user: Principal = Depends(get_current_user)):
     """
     History page showing all past reports.
     """
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -13,7 +13,9 @@ class Query(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     question = Column(Text, nullable=False)
-    status = Column(String, default="pending", nullable=False)  # pending, processing, completed, failed
+    question_fingerprint = Column(String(64), nullable=True, index=True)  # hash of the normalized question
+    full_report = Column(Boolean, default=False, nullable=False)  # run every research agent, skipping routing
+    status = Column(String, default="pending", nullable=False)  # pending, processing, completed, failed, cancelled, timed_out
     created_at = Column(DateTime, default=datetime.utcnow)
     started_at = Column(DateTime, nullable=True)
     completed_at = Column(DateTime, nullable=True)
@@ -21,3 +23,75 @@ class Query(Base):
     
     user = relationship("User", back_populates="queries")
     report = relationship("Report", back_populates="query", uselist=False, cascade="all, delete-orphan")
+    task_runs = relationship(
+        "QueryTaskRun",
+        back_populates="query",
+        order_by="QueryTaskRun.position",
+        cascade="all, delete-orphan"
+    )
+    spans = relationship(
+        "QuerySpan",
+        back_populates="query",
+        order_by="QuerySpan.started_at",
+        cascade="all, delete-orphan"
+    )
+
+    __table_args__ = (
+        Index("ix_queries_user_id_created_at", "user_id", "created_at"),
+    )
+
+class QueryTaskRun(Base):
+    """
+    Progress of a single crew task while a query is processed.
+    Stores timing and the task's output so finished sections can be shown early.
+    """
+    __tablename__ = "query_task_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    query_id = Column(Integer, ForeignKey("queries.id", ondelete="CASCADE"), nullable=False)
+    task_name = Column(String, nullable=False)
+    agent_role = Column(String, nullable=True)
+    position = Column(Integer, nullable=False)  # order of the task in the crew
+    status = Column(String, default="pending", nullable=False)  # pending, running, completed, failed
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+    step_count = Column(Integer, default=0, nullable=False)  # agent reasoning/tool steps taken
+    output_size = Column(Integer, nullable=True)  # characters in the task output
+    output_text = Column(Text, nullable=True)
+    error_message = Column(Text, nullable=True)
+
+    query = relationship("Query", back_populates="task_runs")
+
+    __table_args__ = (
+        UniqueConstraint("query_id", "task_name", name="uq_query_task_runs_query_task"),
+    )
+
+class QuerySpan(Base):
+    """
+    Timing of a single LLM or tool call made while a query was processed,
+    with token counts and estimated cost for LLM calls.
+    """
+    __tablename__ = "query_spans"
+
+    id = Column(Integer, primary_key=True, index=True)
+    query_id = Column(Integer, ForeignKey("queries.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String, nullable=False)  # llm, tool
+    name = Column(String, nullable=False)  # model or tool name
+    task_name = Column(String, nullable=True)
+    agent = Column(String, nullable=True)
+    started_at = Column(DateTime, nullable=False)
+    duration_ms = Column(Float, nullable=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    cost_usd = Column(Float, nullable=True)
+    attempts = Column(Integer, default=1, nullable=False)
+    response_size = Column(Integer, nullable=True)  # characters returned
+    cached = Column(Boolean, default=False, nullable=False)
+    error = Column(Text, nullable=True)
+
+    query = relationship("Query", back_populates="spans")
+
+    __table_args__ = (
+        Index("ix_query_spans_query_id", "query_id"),
+        Index("ix_query_spans_started_at", "started_at"),
+    )
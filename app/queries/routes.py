@@ -1,15 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query as QueryParam, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
-from app.database import get_db
+from datetime import datetime, timedelta
+from app.database import get_async_db
 from app.auth.routes import get_current_user
-from app.users.models import User
-from app.queries.models import Query
+from app.auth.principal_cache import Principal
+from app.queries.models import Query, QueryTaskRun
 from app.results.models import Report
 from app.services.agent_service import validate_query, AgentExecutionError
-from app.services.background_tasks import process_query_with_agents
+from app.jobs.models import Job
+from app.jobs.queue import enqueue_job, request_cancel, requeue_job
+from app.services.query_metrics import build_query_metrics, load_span_stats
+from app.services.result_cache import copy_report, find_reusable_report, question_fingerprint
+from app.services.status_events import publish_query_status_async, status_broker, TERMINAL_STATUSES
+from app.services.task_progress import build_task_summary, section_title
+import asyncio
+import json
 import logging
 import random
 
@@ -17,12 +27,20 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+STREAM_KEEPALIVE_SECONDS = 15
+MAX_STATS_DAYS = 90
+RETRYABLE_STATUSES = ("failed", "cancelled", "timed_out")
+CANCELLABLE_STATUSES = ("pending", "processing")
+
 class QueryCreate(BaseModel):
     question: str
+    force_refresh: bool = False  # always run the agents, even if a recent report exists
+    full_report: bool = False  # run every research agent instead of only the relevant ones
 
 class QueryResponse(BaseModel):
     report_id: int
     message: str
+    reused: bool = False
 
 def generate_dummy_report(question: str) -> tuple[str, str]:
     """
@@ -114,13 +132,12 @@ Binding affinity scores indicate strong target engagement with IC50 values in th
 @router.post("/submit", response_model=QueryResponse)
 async def submit_query(
     query_data: QueryCreate,
-    background_tasks: BackgroundTasks,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit a pharmaceutical research query.
-    Creates a query record and starts agent processing in the background.
+    Creates a query record and queues it for processing by a worker.
     """
     # Validate query
     if not validate_query(query_data.question):
@@ -131,67 +148,371 @@ async def submit_query(
     
     logger.info(f"User {current_user.id} submitted query: {query_data.question[:100]}...")
     
+    fingerprint = question_fingerprint(query_data.question, query_data.full_report)
+    
+    reusable = None if query_data.force_refresh else await find_reusable_report(db, fingerprint)
+    if reusable:
+        return await reuse_report(db, current_user.id, query_data, fingerprint, reusable)
+    
     # Create query record with pending status
     new_query = Query(
         user_id=current_user.id,
         question=query_data.question,
+        question_fingerprint=fingerprint,
+        full_report=query_data.full_report,
         status="pending"
     )
     
     db.add(new_query)
-    db.commit()
-    db.refresh(new_query)
-    
-    # Start background task to process with agents
-    background_tasks.add_task(
-        process_query_with_agents,
-        query_id=new_query.id,
-        query_text=query_data.question,
-        user_id=current_user.id
-    )
+    await db.flush()
     
-    logger.info(f"Query {new_query.id} created, background processing started")
+    # Queue the agent run in the same transaction as the query
+    enqueue_job(db, new_query.id)
+    
+    await db.commit()
+    
+    logger.info(f"Query {new_query.id} created and queued for processing")
     
     return QueryResponse(
         report_id=new_query.id,  # Return query ID for status checking
         message="Query submitted successfully. Processing with AI agents..."
     )
 
-@router.get("/status/{query_id}")
-async def get_query_status(
-    query_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
+async def reuse_report(
+    db: AsyncSession,
+    user_id: int,
+    query_data: QueryCreate,
+    fingerprint: str,
+    source: Report
+) -> QueryResponse:
     """
-    Check the status of a query.
-    Returns the current processing status and report if completed.
+    Complete a query immediately with a copy of a recent equivalent report.
     """
-    query = db.query(Query).filter(
-        Query.id == query_id,
-        Query.user_id == current_user.id
-    ).first()
+    now = datetime.utcnow()
+    new_query = Query(
+        user_id=user_id,
+        question=query_data.question,
+        question_fingerprint=fingerprint,
+        full_report=query_data.full_report,
+        status="completed",
+        started_at=now,
+        completed_at=now
+    )
     
-    if not query:
-        raise HTTPException(status_code=404, detail="Query not found")
+    db.add(new_query)
+    await db.flush()
+    db.add(copy_report(source, new_query.id, user_id))
+    await db.commit()
     
+    logger.info(f"Query {new_query.id} answered with report {source.id} from {source.created_at}")
+    
+    return QueryResponse(
+        report_id=new_query.id,  # Return query ID for status checking
+        message="A recent report answers this question. Opening it now...",
+        reused=True
+    )
+
+def status_query(query_id: int, user_id: int):
+    """
+    Select a query with what its status payload needs.
+    Task outputs and the report body are left unloaded.
+    """
+    return select(Query).options(
+        selectinload(Query.report).load_only(Report.id, Report.title),
+        selectinload(Query.task_runs).defer(QueryTaskRun.output_text)
+    ).where(
+        Query.id == query_id,
+        Query.user_id == user_id
+    )
+
+def build_status_response(query: Query) -> dict:
+    """
+    Build the status payload for a query.
+    """
     response = {
         "query_id": query.id,
         "status": query.status,
         "question": query.question,
         "created_at": query.created_at,
         "started_at": query.started_at,
-        "completed_at": query.completed_at
+        "completed_at": query.completed_at,
+        "tasks": [build_task_summary(task_run) for task_run in query.task_runs]
     }
     
-    # If completed, include report ID
-    if query.status == "completed" and query.report:
+    # If completed, include report ID (cancelled and timed out runs may have a partial report)
+    if query.status in ("completed", "cancelled", "timed_out") and query.report:
         response["report_id"] = query.report.id
         response["title"] = query.report.title
     
-    # If failed, include error message
-    if query.status == "failed":
+    # If failed or stopped, include error message
+    if query.status in ("failed", "cancelled", "timed_out"):
         response["error_message"] = query.error_message
     
     return response
 
+def format_sse(event: dict) -> str:
+    """
+    Format a status event as a server-sent event message.
+    """
+    return f"event: status\ndata: {json.dumps(event, default=str)}\n\n"
+
+@router.get("/status/{query_id}")
+async def get_query_status(
+    query_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Check the status of a query.
+    Returns the current processing status and report if completed.
+    """
+    result = await db.execute(status_query(query_id, current_user.id))
+    query = result.scalars().first()
+    
+    if not query:
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    return build_status_response(query)
+
+@router.post("/retry/{query_id}", response_model=QueryResponse)
+async def retry_query(
+    query_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Queue a failed, cancelled or timed out query again.
+    The new run resumes after the tasks the last run completed, reusing their stored outputs.
+    """
+    result = await db.execute(
+        select(Query).where(
+            Query.id == query_id,
+            Query.user_id == current_user.id
+        )
+    )
+    query = result.scalars().first()
+    
+    if not query:
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    if query.status not in RETRYABLE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Only failed, cancelled or timed out queries can be retried, this one is {query.status}")
+    
+    # A partial report of the last run is replaced by the new run's report
+    await db.execute(delete(Report).where(Report.query_id == query_id))
+    
+    query.status = "pending"
+    query.error_message = None
+    query.completed_at = None
+    
+    job = (await db.execute(select(Job).where(Job.query_id == query_id))).scalars().first()
+    if job:
+        requeue_job(job)
+    else:
+        enqueue_job(db, query_id)
+    
+    await db.commit()
+    
+    logger.info(f"Query {query_id} queued for a retry by user {current_user.id}")
+    
+    return QueryResponse(
+        report_id=query_id,  # Return query ID for status checking
+        message="Query queued again. Completed sections will be reused..."
+    )
+
+@router.post("/{query_id}/cancel")
+async def cancel_query(
+    query_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Cancel a pending or processing query.
+    Queued queries are cancelled right away. A running crew is stopped by its
+    worker, and the sections it completed are kept as a partial report.
+    """
+    result = await db.execute(
+        select(Query).where(
+            Query.id == query_id,
+            Query.user_id == current_user.id
+        )
+    )
+    query = result.scalars().first()
+    
+    if not query:
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    if query.status not in CANCELLABLE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Only pending or processing queries can be cancelled, this one is {query.status}")
+    
+    # Locked so a worker cannot claim the job while it is being cancelled
+    job = (await db.execute(
+        select(Job).where(Job.query_id == query_id).with_for_update()
+    )).scalars().first()
+    if job:
+        request_cancel(job)
+    
+    if job is None or job.status == "cancelled":
+        query.status = "cancelled"
+        query.error_message = "Cancelled by user"
+        query.completed_at = datetime.utcnow()
+        # Delivered on commit to every client streaming this query
+        await publish_query_status_async(db, query_id, query.status, error_message=query.error_message)
+        message = "Query cancelled."
+    else:
+        message = "Cancelling... Completed sections will be kept as a partial report."
+    
+    await db.commit()
+    
+    logger.info(f"User {current_user.id} cancelled query {query_id}")
+    
+    return {"query_id": query_id, "status": query.status, "message": message}
+
+@router.get("/sections/{query_id}")
+async def get_query_sections(
+    query_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the output of every task that has finished so far.
+    Lets clients show sections such as clinical trials or patents before the report is ready.
+    """
+    owner = await db.execute(
+        select(Query.id).where(
+            Query.id == query_id,
+            Query.user_id == current_user.id
+        )
+    )
+    if owner.first() is None:
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    result = await db.execute(
+        select(QueryTaskRun).where(
+            QueryTaskRun.query_id == query_id,
+            QueryTaskRun.status == "completed"
+        ).order_by(QueryTaskRun.position)
+    )
+    
+    return [
+        {
+            "name": task_run.task_name,
+            "title": section_title(task_run.task_name),
+            "completed_at": task_run.completed_at,
+            "content": task_run.output_text
+        }
+        for task_run in result.scalars().all()
+    ]
+
+@router.get("/metrics/{query_id}")
+async def get_query_metrics(
+    query_id: int,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the instrumentation of a query's run: wall time per task and the
+    latency, tokens, retries and estimated cost of its LLM and tool calls.
+    """
+    result = await db.execute(
+        select(Query).options(
+            selectinload(Query.task_runs).defer(QueryTaskRun.output_text),
+            selectinload(Query.spans)
+        ).where(
+            Query.id == query_id,
+            Query.user_id == current_user.id
+        )
+    )
+    query = result.scalars().first()
+    
+    if not query:
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    metrics = build_query_metrics(query.task_runs, query.spans)
+    metrics["query_id"] = query.id
+    metrics["status"] = query.status
+    metrics["spans"] = [
+        {
+            "kind": span.kind,
+            "name": span.name,
+            "task": span.task_name,
+            "agent": span.agent,
+            "started_at": span.started_at,
+            "duration_ms": span.duration_ms,
+            "prompt_tokens": span.prompt_tokens,
+            "completion_tokens": span.completion_tokens,
+            "cost_usd": span.cost_usd,
+            "attempts": span.attempts,
+            "response_size": span.response_size,
+            "cached": span.cached,
+            "error": span.error
+        }
+        for span in query.spans
+    ]
+    return metrics
+
+@router.get("/stats")
+async def get_query_stats(
+    days: int = QueryParam(7, ge=1, le=MAX_STATS_DAYS),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get p50/p95 latency and totals of LLM calls per agent and of calls per
+    tool over the current user's queries of the last `days` days.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    stats = await load_span_stats(db, current_user.id, cutoff)
+    stats["days"] = days
+    return stats
+
+@router.get("/stream/{query_id}")
+async def stream_query_status(
+    query_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Stream status transitions for a query as server-sent events.
+    Sends the current status first, then every change until the query finishes.
+    """
+    # Subscribe before reading the snapshot so no transition is missed
+    events = status_broker.subscribe(query_id)
+
+    result = await db.execute(status_query(query_id, current_user.id))
+    query = result.scalars().first()
+    
+    if not query:
+        status_broker.unsubscribe(query_id, events)
+        raise HTTPException(status_code=404, detail="Query not found")
+    
+    snapshot = build_status_response(query)
+    await db.close()
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            yield format_sse(snapshot)
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(events.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                yield format_sse(event)
+                if event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            status_broker.unsubscribe(query_id, events)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -14,8 +14,16 @@ class Report(Base):
     query_id = Column(Integer, ForeignKey("queries.id"), unique=True, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
-    report_text = Column(Text, nullable=False)
+    report_text = Column(Text, nullable=True)  # legacy uncompressed reports only
+    report_gzip = Column(LargeBinary, nullable=True)
+    content_sha256 = Column(String(64), nullable=True)
+    content_length = Column(Integer, nullable=True)  # uncompressed size in bytes
+    source_report_id = Column(Integer, ForeignKey("reports.id", ondelete="SET NULL"), nullable=True)  # set when reused
     created_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="reports")
     query = relationship("Query", back_populates="report")
+
+    __table_args__ = (
+        Index("ix_reports_user_id_created_at", "user_id", "created_at"),
+    )
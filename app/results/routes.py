@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+import binascii
+from fastapi import APIRouter, Depends, HTTPException, Query as QueryParam, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List
-from datetime import datetime
-from app.database import get_db
+from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+from app.database import get_async_db
 from app.auth.routes import get_current_user
-from app.users.models import User
+from app.auth.principal_cache import Principal
 from app.results.models import Report
+from app.results.storage import (
+    accepts_gzip,
+    compress_report,
+    etag_matches,
+    iter_chunks,
+    iter_decompressed,
+    make_etag,
+)
 from app.queries.models import Query
 
 router = APIRouter()
@@ -14,9 +26,10 @@ router = APIRouter()
 class ReportDetail(BaseModel):
     id: int
     title: str
-    report_text: str
     question: str
     created_at: datetime
+    content_url: str
+    content_length: Optional[int] = None
     
     class Config:
         from_attributes = True
@@ -31,56 +44,210 @@ class ReportSummary(BaseModel):
     class Config:
         from_attributes = True
 
+class ReportSummaryPage(BaseModel):
+    items: List[ReportSummary]
+    next_cursor: Optional[str] = None
+
+MAX_PAGE_SIZE = 100
+
+def to_naive_utc(value: datetime) -> datetime:
+    """
+    Report.created_at holds naive UTC timestamps; aware values are converted to match.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def encode_cursor(created_at: datetime, report_id: int) -> str:
+    """
+    Encode the position of the last report on a page as an opaque cursor.
+    """
+    raw = f"{created_at.isoformat()}|{report_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, report_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return to_naive_utc(datetime.fromisoformat(created_at)), int(report_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def summary_select(user_id: int):
+    """
+    Single joined projection of a user's reports, without the report body.
+    Ordered newest first so it walks the (user_id, created_at) index.
+    """
+    return (
+        select(
+            Report.id,
+            Report.query_id,
+            Report.title,
+            Query.question,
+            Report.created_at
+        )
+        .outerjoin(Query, Query.id == Report.query_id)
+        .where(Report.user_id == user_id)
+        .order_by(Report.created_at.desc(), Report.id.desc())
+    )
+
+def build_summary(row) -> ReportSummary:
+    return ReportSummary(
+        id=row.id,
+        query_id=row.query_id,
+        title=row.title,
+        question=row.question or "",
+        created_at=row.created_at
+    )
+
+@router.get("/summary", response_model=ReportSummaryPage)
+async def get_report_summaries(
+    limit: int = QueryParam(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get one page of report summaries for the current user.
+    Pass the returned next_cursor to fetch the following page; it is null
+    on the last page. `since` limits results to reports created after it.
+    """
+    stmt = summary_select(current_user.id)
+
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Report.created_at, Report.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    if since:
+        stmt = stmt.where(Report.created_at > to_naive_utc(since))
+
+    # Fetch one extra row to know whether another page exists
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return ReportSummaryPage(
+        items=[build_summary(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
 @router.get("/{report_id}", response_model=ReportDetail)
 async def get_report(
     report_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get a specific report by ID.
+    Get a specific report's metadata by ID.
     Only allows users to access their own reports.
+    The report body is served separately by /{report_id}/content.
     """
-    report = db.query(Report).filter(
-        Report.id == report_id,
-        Report.user_id == current_user.id
-    ).first()
+    result = await db.execute(
+        select(
+            Report.id,
+            Report.title,
+            Report.created_at,
+            Report.content_length,
+            Query.question
+        )
+        .outerjoin(Query, Query.id == Report.query_id)
+        .where(
+            Report.id == report_id,
+            Report.user_id == current_user.id
+        )
+    )
+    row = result.first()
     
-    if not report:
+    if not row:
         raise HTTPException(status_code=404, detail="Report not found")
     
-    query = db.query(Query).filter(Query.id == report.query_id).first()
-    
     return ReportDetail(
-        id=report.id,
-        title=report.title,
-        report_text=report.report_text,
-        question=query.question if query else "",
-        created_at=report.created_at
+        id=row.id,
+        title=row.title,
+        question=row.question or "",
+        created_at=row.created_at,
+        content_url=f"/api/results/{row.id}/content",
+        content_length=row.content_length
     )
 
+@router.get("/{report_id}/content")
+async def get_report_content(
+    report_id: int,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get the markdown body of a report.
+    Answers 304 when If-None-Match carries the report's ETag, sends the
+    stored gzip bytes untouched when the client accepts gzip and streams
+    the decompressed text otherwise. The gzip body has an ETag of its own.
+    """
+    owned = (Report.id == report_id, Report.user_id == current_user.id)
+    result = await db.execute(select(Report.content_sha256).where(*owned))
+    row = result.first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Report not found")
+    
+    headers = {
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding, Cookie"
+    }
+    
+    gzipped = accepts_gzip(request.headers.get("accept-encoding"))
+    if_none_match = request.headers.get("if-none-match")
+    
+    if row.content_sha256:
+        headers["ETag"] = make_etag(row.content_sha256, gzipped)
+        matched = etag_matches(if_none_match, row.content_sha256, gzipped)
+        if matched:
+            headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+    
+    result = await db.execute(select(Report.report_gzip, Report.report_text).where(*owned))
+    blob, legacy_text = result.first()
+    await db.close()
+    
+    if blob is None:
+        # Reports stored before compression was introduced
+        blob, content_sha256 = compress_report(legacy_text or "")
+        headers["ETag"] = make_etag(content_sha256, gzipped)
+        matched = etag_matches(if_none_match, content_sha256, gzipped)
+        if matched:
+            headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+    
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        headers["Content-Length"] = str(len(blob))
+        return StreamingResponse(iter_chunks(blob), media_type="text/markdown; charset=utf-8", headers=headers)
+    
+    return StreamingResponse(iter_decompressed(blob), media_type="text/markdown; charset=utf-8", headers=headers)
+
 @router.get("/", response_model=List[ReportSummary])
 async def get_all_reports(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get all reports for the current user.
     Returns a list of report summaries ordered by creation date.
+    Prefer /summary for paginated access.
     """
-    reports = db.query(Report).filter(
-        Report.user_id == current_user.id
-    ).order_by(Report.created_at.desc()).all()
-    
-    result = []
-    for report in reports:
-        query = db.query(Query).filter(Query.id == report.query_id).first()
-        result.append(ReportSummary(
-            id=report.id,
-            query_id=report.query_id,
-            title=report.title,
-            question=query.question if query else "",
-            created_at=report.created_at
-        ))
+    rows = (await db.execute(summary_select(current_user.id))).all()
     
-    return result
+    return [build_summary(row) for row in rows]
@@ -0,0 +1,85 @@
+"""
+Compressed report storage.
+
+Reports are stored gzip-compressed alongside the SHA-256 of their text.
+The hash doubles as the ETag (see make_etag), and the gzip bytes can be sent as-is to any
+client that accepts gzip, so serving a report rarely touches the text.
+"""
+import gzip
+import hashlib
+import zlib
+from typing import Iterator, Optional, Tuple
+
+CHUNK_SIZE = 64 * 1024
+
+def compress_report(report_text: str) -> Tuple[bytes, str]:
+    """
+    Compress a report for storage.
+
+    Returns:
+        tuple: (gzip bytes, hex SHA-256 of the UTF-8 text)
+    """
+    raw = report_text.encode("utf-8")
+    # mtime=0 keeps the output deterministic for identical reports
+    return gzip.compress(raw, compresslevel=6, mtime=0), hashlib.sha256(raw).hexdigest()
+
+def set_report_content(report, report_text: str):
+    """
+    Store report_text on a Report in compressed form.
+    """
+    report.report_gzip, report.content_sha256 = compress_report(report_text)
+    report.content_length = len(report_text.encode("utf-8"))
+    report.report_text = None
+
+def make_etag(content_sha256: str, gzipped: bool = False) -> str:
+    """
+    Strong ETag of a report representation. The gzip-encoded body gets a
+    tag of its own, as a strong validator must differ per content-coding.
+    """
+    return f'"{content_sha256}-gzip"' if gzipped else f'"{content_sha256}"'
+
+def etag_matches(if_none_match: Optional[str], content_sha256: str, gzipped: bool) -> Optional[str]:
+    """
+    Evaluate an If-None-Match header against the ETags of a report,
+    accepting the tag of either representation.
+
+    Returns:
+        The matched ETag, to send with the 304, or None
+    """
+    if not if_none_match:
+        return None
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    current = make_etag(content_sha256, gzipped)
+    if "*" in candidates:
+        return current
+    etags = (current, make_etag(content_sha256, not gzipped))
+    # Weak comparison: W/"x" matches "x"
+    return next((tag.removeprefix("W/") for tag in candidates if tag.removeprefix("W/") in etags), None)
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether the client accepts gzip, honouring an explicit q=0.
+    """
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+def iter_chunks(data: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+def iter_decompressed(data: bytes, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Stream the text of a gzip blob without inflating it all at once.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in iter_chunks(data, chunk_size):
+        output = decompressor.decompress(chunk)
+        if output:
+            yield output
+    tail = decompressor.flush()
+    if tail:
+        yield tail
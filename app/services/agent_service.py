@@ -6,13 +6,31 @@ import os
 import logging
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Optional
+from app.config import settings
+from app.services.query_metrics import QueryMetricsRecorder
+from app.services.task_progress import TaskProgressRecorder, section_title
 
 logger = logging.getLogger(__name__)
 
+# Task whose output is the report title, left out of partial reports
+TITLE_TASK = "generate_report_title_task"
+
 class AgentExecutionError(Exception):
     """Custom exception for agent execution failures."""
     pass
 
+class AgentRunStopped(AgentExecutionError):
+    """
+    Raised when a run was cancelled or passed a deadline.
+    Carries the (title, report_text) assembled from the sections completed before it stopped, if any.
+    """
+
+    def __init__(self, message: str, cancelled: bool, report: Optional[tuple[str, str]] = None):
+        super().__init__(message)
+        self.cancelled = cancelled
+        self.report = report
+
 def get_agents_path():
     """Get the path to the agents module."""
     # Get the project root (parent of app directory)
@@ -27,28 +45,55 @@ def get_agents_path():
     
     return agents_src_path
 
-def run_pharma_research(query: str, user_id: int) -> tuple[str, str]:
+def create_run_control():
+    """
+    Deadlines and cancellation for one crew run, from AGENT_TIMEOUT (per task) and RUN_TIMEOUT.
+    """
+    get_agents_path()
+    from pharma_researcher.run_control import RunControl
+
+    return RunControl(run_timeout=settings.RUN_TIMEOUT, task_timeout=settings.AGENT_TIMEOUT)
+
+def run_pharma_research(
+    query: str,
+    user_id: int,
+    progress: Optional[TaskProgressRecorder] = None,
+    full_report: bool = False,
+    metrics: Optional[QueryMetricsRecorder] = None,
+    completed: Optional[Dict[str, str]] = None,
+    control=None
+) -> tuple[str, str]:
     """
     Execute the CrewAI pharmaceutical research agents with the given query.
     
     Args:
         query: The research question from the user
         user_id: The ID of the user making the request
+        progress: Optional recorder that tracks each task of the run
+        full_report: Run every research agent instead of only those relevant to the query
+        metrics: Optional recorder for the timing, tokens and cost of every LLM and tool call
+        completed: Outputs of tasks completed by an earlier run of the query, by task name.
+            The run resumes after them instead of starting over.
+        control: Optional RunControl enforcing the run's deadlines and cancellation
         
     Returns:
         tuple: (title, report_text) - The generated report title and content
         
     Raises:
+        AgentRunStopped: If the run was cancelled or passed a deadline
         AgentExecutionError: If agent execution fails
     """
     logger.info(f"Starting pharma research for user {user_id}: {query[:100]}...")
+    crew = None
     
     try:
         # Ensure agents module is in path
         get_agents_path()
         
-        # Import CrewAI components
-        from pharma_researcher.crew import PharmaResearcher
+        # Imported here, crew_factory imports this module
+        from app.services.crew_factory import crew_factory
+        from pharma_researcher.routing import route_query
+        from pharma_researcher.run_control import control_crew
         
         # Prepare inputs for the crew
         inputs = {
@@ -57,10 +102,20 @@ def run_pharma_research(query: str, user_id: int) -> tuple[str, str]:
         }
         
         logger.info("Initializing PharmaResearcher crew...")
-        crew_instance = PharmaResearcher()
+        routing = route_query(query, full_report=full_report or not settings.QUERY_ROUTING_ENABLED)
+        logger.info(f"Running {len(routing.research_tasks)} research tasks: {routing.reason}")
+        crew = crew_factory.create(routing, completed)
+        if completed:
+            logger.info(f"Resuming with {len(crew.tasks)} remaining tasks, reusing {len(completed)} completed task outputs")
+        if progress:
+            progress.attach(crew)
+        if metrics:
+            metrics.attach(crew)
+        if control:
+            control_crew(crew, control)
         
         logger.info("Executing crew with query...")
-        result = crew_instance.crew().kickoff(inputs=inputs)
+        result = crew.kickoff(inputs=inputs)
         
         # Extract the report content
         if hasattr(result, 'raw'):
@@ -83,8 +138,54 @@ def run_pharma_research(query: str, user_id: int) -> tuple[str, str]:
             f"Agent module not found. Please ensure the agents package is properly installed. Error: {e}"
         )
     except Exception as e:
+        stopped = control.stopped if control else None
+        if stopped is not None:
+            logger.warning(f"Research run stopped: {stopped}")
+            if progress:
+                progress.task_failed(str(stopped))
+            sections = dict(completed or {})
+            for task in crew.tasks if crew else []:
+                if task.output is not None:
+                    sections[task.name] = task.output.raw
+            raise AgentRunStopped(
+                str(stopped),
+                cancelled=control.cancelled,
+                report=assemble_partial_report(query, sections, str(stopped))
+            )
+
         logger.error(f"Agent execution failed: {e}", exc_info=True)
+        if progress:
+            progress.task_failed(str(e))
         raise AgentExecutionError(f"Failed to execute research agents: {str(e)}")
+    finally:
+        if metrics:
+            metrics.close()
+
+def assemble_partial_report(query: str, sections: Dict[str, str], reason: str) -> Optional[tuple[str, str]]:
+    """
+    Build a report from the task outputs of a run that stopped early.
+    
+    Args:
+        query: The user's research question
+        sections: Output of every completed task, by task name, in task order
+        reason: Why the run stopped
+        
+    Returns:
+        tuple: (title, report_text), or None if no section completed
+    """
+    sections = {name: text for name, text in sections.items() if name != TITLE_TASK and text}
+    if not sections:
+        return None
+    
+    title = generate_title_from_query(query)
+    parts = [
+        f"# {title}",
+        f"> **Partial report.** {reason}. Only the sections that completed before the run stopped are included."
+    ]
+    for name, text in sections.items():
+        parts.append(f"## {section_title(name)}\n\n{text.strip()}")
+    
+    return title, "\n\n".join(parts)
 
 def generate_title_from_query(query: str, max_length: int = 100) -> str:
     """
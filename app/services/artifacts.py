@@ -0,0 +1,42 @@
+"""
+Optional per-query artifact store for task outputs.
+
+Task outputs are always kept in memory by the crew and, unless
+STORE_TASK_OUTPUTS is disabled, in the query_task_runs table. Setting
+ARTIFACTS_DIR additionally writes each output to
+<ARTIFACTS_DIR>/<query id>/<task name>.md, so concurrent queries never
+share files.
+"""
+import logging
+import re
+from pathlib import Path
+from typing import Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+def artifact_path(query_id: int, task_name: str) -> Optional[Path]:
+    """
+    Where a task output for a query is written, or None if no store is configured.
+    """
+    if not settings.ARTIFACTS_DIR:
+        return None
+    safe_name = _UNSAFE_NAME.sub("_", task_name)
+    return Path(settings.ARTIFACTS_DIR) / str(query_id) / f"{safe_name}.md"
+
+def save_task_artifact(query_id: int, task_name: str, text: str) -> None:
+    """
+    Write a task output to the artifact store, if one is configured.
+    Failures are logged, never raised.
+    """
+    path = artifact_path(query_id, task_name)
+    if path is None:
+        return
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+    except OSError as e:
+        logger.warning(f"Failed to write artifact {path}: {e}")
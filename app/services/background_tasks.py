@@ -2,80 +2,166 @@
 Background task processing for long-running agent executions.
 """
 import logging
+from datetime import datetime
 from sqlalchemy.orm import Session
+from app.config import settings
 from app.database import SessionLocal
-from app.services.agent_service import run_pharma_research, AgentExecutionError
+from app.services.agent_service import run_pharma_research, create_run_control, AgentExecutionError, AgentRunStopped
+from app.services.status_events import publish_query_status
+from app.services.query_metrics import QueryMetricsRecorder
+from app.services.task_progress import TaskProgressRecorder, load_task_outputs
 from app.queries.models import Query
 from app.results.models import Report
+from app.results.storage import set_report_content
 
 logger = logging.getLogger(__name__)
 
 def process_query_with_agents(
     query_id: int,
     query_text: str,
-    user_id: int
+    user_id: int,
+    final_attempt: bool = True,
+    full_report: bool = False,
+    control=None
 ):
     """
-    Background task to process a query using CrewAI agents.
-    
+    Process a query using CrewAI agents.
+
     Args:
         query_id: Database ID of the query
         query_text: The research question
         user_id: ID of the user who submitted the query
+        final_attempt: Whether a failure should be recorded as final.
+            When False the query is put back to pending for a retry.
+        full_report: Run every research agent, skipping query routing
+        control: RunControl the caller can cancel the run with.
+            A new one with the configured deadlines is used when omitted.
+            A run that is cancelled or passes a deadline ends the query with a
+            partial report and is not retried.
+
+    Raises:
+        AgentExecutionError: If the run fails, after the query has been updated
     """
     logger.info(f"Background task started for query {query_id}")
-    
+
     # Create a new database session for this background task
     db = SessionLocal()
-    
+
     try:
         # Update query status to processing
         query = db.query(Query).filter(Query.id == query_id).first()
         if query:
             query.status = "processing"
+            query.started_at = datetime.utcnow()
+            query.error_message = None
+            publish_query_status(db, query_id, "processing", started_at=query.started_at)
             db.commit()
-        
+
+        # A retried query picks up after the tasks its failed run completed
+        completed = load_task_outputs(query_id) if settings.RESUME_FAILED_RUNS else None
+
         # Execute the agents
-        title, report_text = run_pharma_research(query_text, user_id)
-        
+        title, report_text = run_pharma_research(
+            query_text,
+            user_id,
+            progress=TaskProgressRecorder(query_id),
+            full_report=full_report,
+            metrics=QueryMetricsRecorder(query_id),
+            completed=completed,
+            control=control or create_run_control()
+        )
+
         # Create the report
         new_report = Report(
             query_id=query_id,
             user_id=user_id,
-            title=title,
-            report_text=report_text
+            title=title
         )
-        
+        set_report_content(new_report, report_text)
+
         db.add(new_report)
-        
+        db.flush()
+
         # Update query status to completed
         if query:
             query.status = "completed"
-        
+            query.completed_at = datetime.utcnow()
+
+        publish_query_status(
+            db, query_id, "completed",
+            report_id=new_report.id,
+            title=new_report.title
+        )
         db.commit()
-        
+
         logger.info(f"Background task completed successfully for query {query_id}")
-        
+
+    except AgentRunStopped as e:
+        logger.warning(f"Agent run stopped for query {query_id}: {e}")
+        db.rollback()
+        _record_stop(db, query_id, user_id, e)
+
     except AgentExecutionError as e:
         logger.error(f"Agent execution failed for query {query_id}: {e}")
-        
-        # Update query status to failed
-        query = db.query(Query).filter(Query.id == query_id).first()
-        if query:
-            query.status = "failed"
-            query.error_message = str(e)
-            db.commit()
-            
+        db.rollback()
+        _record_failure(db, query_id, str(e), final_attempt)
+        raise
+
     except Exception as e:
         logger.error(f"Unexpected error in background task for query {query_id}: {e}", exc_info=True)
-        
-        # Update query status to failed
-        query = db.query(Query).filter(Query.id == query_id).first()
-        if query:
-            query.status = "failed"
-            query.error_message = f"Unexpected error: {str(e)}"
-            db.commit()
-    
+        db.rollback()
+        _record_failure(db, query_id, f"Unexpected error: {str(e)}", final_attempt)
+        raise AgentExecutionError(f"Unexpected error: {str(e)}") from e
+
     finally:
         # Always close the database session
         db.close()
+
+def _record_stop(db: Session, query_id: int, user_id: int, stop: AgentRunStopped):
+    """
+    Update the query after a run that was cancelled or passed a deadline,
+    keeping the sections it completed as a partial report.
+    """
+    query = db.query(Query).filter(Query.id == query_id).first()
+    if not query:
+        return
+
+    report = None
+    if stop.report:
+        title, report_text = stop.report
+        report = Report(query_id=query_id, user_id=user_id, title=title)
+        set_report_content(report, report_text)
+        db.add(report)
+        db.flush()
+
+    query.status = "cancelled" if stop.cancelled else "timed_out"
+    query.error_message = str(stop)
+    query.completed_at = datetime.utcnow()
+
+    publish_query_status(
+        db, query_id, query.status,
+        error_message=query.error_message,
+        report_id=report.id if report else None,
+        title=report.title if report else None
+    )
+    db.commit()
+
+def _record_failure(db: Session, query_id: int, error_message: str, final_attempt: bool):
+    """
+    Update the query after a failed run.
+    Final failures are marked failed, otherwise the query waits for a retry.
+    """
+    query = db.query(Query).filter(Query.id == query_id).first()
+    if not query:
+        return
+
+    if final_attempt:
+        query.status = "failed"
+        query.error_message = error_message
+        query.completed_at = datetime.utcnow()
+    else:
+        query.status = "pending"
+        query.error_message = f"Retrying after error: {error_message}"
+
+    publish_query_status(db, query_id, query.status, error_message=query.error_message)
+    db.commit()
@@ -0,0 +1,72 @@
+"""
+Warm, reusable construction of the PharmaResearcher crew.
+
+Building the crew imports CrewAI and every tool module, parses the YAML
+agent and task configs and instantiates 13 agents and their tools. The
+factory does that once per process and hands every run a copy of the
+resulting template: fresh agents and tasks (so runs never share state),
+shared stateless tool instances and a per-run concurrency limit and
+output directory.
+"""
+import logging
+import threading
+import time
+from app.services.agent_service import get_agents_path
+
+logger = logging.getLogger(__name__)
+
+class CrewFactory:
+    """
+    Builds the crew template once and copies it for every run.
+    Safe to use from several worker threads.
+    """
+
+    def __init__(self):
+        self._template = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_warm(self) -> bool:
+        return self._template is not None
+
+    def warm(self) -> None:
+        """
+        Import the agents package and build the crew template, if not done yet.
+        """
+        if self._template is not None:
+            return
+
+        with self._lock:
+            if self._template is not None:
+                return
+
+            started = time.perf_counter()
+            get_agents_path()
+            from pharma_researcher.crew import PharmaResearcher
+
+            self._template = PharmaResearcher().crew()
+            logger.info(
+                f"Crew template ready with {len(self._template.agents)} agents and "
+                f"{len(self._template.tasks)} tasks in {time.perf_counter() - started:.2f}s"
+            )
+
+    def create(self, routing=None, completed=None):
+        """
+        A crew for a single run, copied from the warm template and
+        limited to the research tasks of the routing decision, if any.
+        Tasks with an output in completed (task name -> output) are not run again.
+        """
+        self.warm()
+        from pharma_researcher.crew import new_run
+
+        return new_run(self._template, routing, completed)
+
+    def reset(self) -> None:
+        """
+        Drop the template so the next run rebuilds it (e.g. after a config change).
+        """
+        with self._lock:
+            self._template = None
+
+# Shared factory for the worker process
+crew_factory = CrewFactory()
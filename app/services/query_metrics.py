@@ -0,0 +1,237 @@
+"""
+Per-query instrumentation of crew runs.
+
+A QueryMetricsRecorder is attached to a crew before kickoff. It receives a
+span for every LLM and tool call of the run (see
+pharma_researcher.instrumentation) and stores them in query_spans in
+batches. The helpers below turn stored spans into the per-query metrics
+and the aggregated stats served by the queries API.
+"""
+import logging
+import statistics
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import case, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import SessionLocal
+from app.queries.models import Query, QuerySpan, QueryTaskRun
+
+logger = logging.getLogger(__name__)
+
+FLUSH_EVERY = 25  # spans buffered before they are written
+LATENCY_PERCENTILES = (("p50_ms", 0.50), ("p95_ms", 0.95))
+
+class QueryMetricsRecorder:
+    """
+    Collects the spans of one crew run for a query.
+    Failures to record are logged and never interrupt the run.
+    """
+
+    def __init__(self, query_id: int):
+        self.query_id = query_id
+        self._buffer: List[Any] = []
+        self._lock = threading.Lock()
+        self._crew = None
+
+    def attach(self, crew) -> None:
+        from pharma_researcher.instrumentation import instrument_crew
+
+        self._crew = crew
+        instrument_crew(crew, self.record)
+
+    def record(self, span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= FLUSH_EVERY
+        if full:
+            self.flush()
+
+    def close(self) -> None:
+        """
+        Stop recording and write what is left. Called once the run ended.
+        """
+        if self._crew is not None:
+            from pharma_researcher.instrumentation import release_crew
+
+            release_crew(self._crew)
+            self._crew = None
+        self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+
+        db = SessionLocal()
+        try:
+            db.add_all([
+                QuerySpan(
+                    query_id=self.query_id,
+                    kind=span.kind,
+                    name=span.name,
+                    task_name=span.task_name,
+                    agent=span.agent,
+                    started_at=span.started_at,
+                    duration_ms=span.duration_ms,
+                    prompt_tokens=span.prompt_tokens,
+                    completion_tokens=span.completion_tokens,
+                    cost_usd=span.cost_usd,
+                    attempts=span.attempts,
+                    response_size=span.response_size,
+                    cached=span.cached,
+                    error=span.error
+                )
+                for span in spans
+            ])
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to record {len(spans)} spans for query {self.query_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+def _sum(values: Iterable[Optional[float]]) -> Optional[float]:
+    present = [value for value in values if value is not None]
+    return sum(present) if present else None
+
+def summarize_spans(spans: List[QuerySpan]) -> Dict[str, Any]:
+    """
+    Totals for a group of spans.
+    """
+    return {
+        "calls": len(spans),
+        "errors": sum(1 for span in spans if span.error),
+        "cached": sum(1 for span in spans if span.cached),
+        "retries": sum(max(span.attempts - 1, 0) for span in spans),
+        "total_ms": round(sum(span.duration_ms for span in spans), 1),
+        "prompt_tokens": _sum(span.prompt_tokens for span in spans),
+        "completion_tokens": _sum(span.completion_tokens for span in spans),
+        "cost_usd": _sum(span.cost_usd for span in spans),
+        "response_size": _sum(span.response_size for span in spans)
+    }
+
+def build_query_metrics(task_runs: List[QueryTaskRun], spans: List[QuerySpan]) -> Dict[str, Any]:
+    """
+    Metrics of a single query: wall time per task, and LLM and tool call
+    totals per task, agent and tool.
+    """
+    by_task, by_agent, by_tool = defaultdict(list), defaultdict(list), defaultdict(list)
+    for span in spans:
+        by_task[span.task_name].append(span)
+        by_agent[span.agent].append(span)
+        if span.kind == "tool":
+            by_tool[span.name].append(span)
+
+    tasks = []
+    for task_run in task_runs:
+        duration = None
+        if task_run.started_at and task_run.completed_at:
+            duration = (task_run.completed_at - task_run.started_at).total_seconds() * 1000
+        task_spans = by_task.get(task_run.task_name, [])
+        tasks.append({
+            "name": task_run.task_name,
+            "agent": task_run.agent_role,
+            "status": task_run.status,
+            "wall_ms": duration,
+            "llm": summarize_spans([span for span in task_spans if span.kind == "llm"]),
+            "tools": summarize_spans([span for span in task_spans if span.kind == "tool"])
+        })
+
+    return {
+        "totals": {
+            "llm": summarize_spans([span for span in spans if span.kind == "llm"]),
+            "tools": summarize_spans([span for span in spans if span.kind == "tool"])
+        },
+        "tasks": tasks,
+        "agents": {
+            agent: {
+                "llm": summarize_spans([span for span in agent_spans if span.kind == "llm"]),
+                "tools": summarize_spans([span for span in agent_spans if span.kind == "tool"])
+            }
+            for agent, agent_spans in by_agent.items()
+        },
+        "tools": {tool: summarize_spans(tool_spans) for tool, tool_spans in by_tool.items()}
+    }
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    # Inclusive method keeps results within the observed range
+    return statistics.quantiles(values, n=100, method="inclusive")[round(fraction * 100) - 1]
+
+async def load_span_stats(db: AsyncSession, user_id: int, since: datetime) -> Dict[str, Any]:
+    """
+    Latency percentiles and totals of LLM calls per agent and of calls per
+    tool, over the spans of a user's queries started since the given time.
+    Aggregated by the database, so the cost does not grow with the spans.
+    """
+    postgres = db.get_bind().dialect.name == "postgresql"
+    is_llm = (QuerySpan.kind == "llm").label("is_llm")
+    group = case((QuerySpan.kind == "llm", QuerySpan.agent), else_=QuerySpan.name).label("group_name")
+    scope = (Query.user_id == user_id, QuerySpan.started_at >= since)
+
+    columns = [
+        is_llm,
+        group,
+        func.count().label("calls"),
+        func.sum(case((func.coalesce(QuerySpan.error, "") != "", 1), else_=0)).label("errors"),
+        func.sum(case((QuerySpan.cached, 1), else_=0)).label("cached"),
+        func.sum(case((QuerySpan.attempts > 1, QuerySpan.attempts - 1), else_=0)).label("retries"),
+        func.sum(QuerySpan.duration_ms).label("total_ms"),
+        func.sum(QuerySpan.prompt_tokens).label("prompt_tokens"),
+        func.sum(QuerySpan.completion_tokens).label("completion_tokens"),
+        func.sum(QuerySpan.cost_usd).label("cost_usd"),
+        func.sum(QuerySpan.response_size).label("response_size")
+    ]
+    if postgres:
+        # Same linear interpolation as percentile()
+        columns += [
+            func.percentile_cont(fraction).within_group(QuerySpan.duration_ms).label(name)
+            for name, fraction in LATENCY_PERCENTILES
+        ]
+    rows = (await db.execute(
+        select(*columns)
+        .join(Query, Query.id == QuerySpan.query_id)
+        .where(*scope)
+        # By output name: repeating the expressions would repeat their parameters
+        .group_by(literal_column(is_llm.name), literal_column(group.name))
+    )).all()
+
+    durations = defaultdict(list)
+    if not postgres:
+        # Without percentile_cont only the durations are loaded
+        result = await db.execute(
+            select(is_llm, group, QuerySpan.duration_ms)
+            .join(Query, Query.id == QuerySpan.query_id)
+            .where(*scope)
+        )
+        for row in result:
+            durations[(row.is_llm, row.group_name)].append(row.duration_ms)
+
+    agents, tools = {}, {}
+    for row in rows:
+        stats = {
+            "calls": row.calls,
+            "errors": row.errors,
+            "cached": row.cached,
+            "retries": row.retries,
+            "total_ms": round(row.total_ms, 1),
+            "prompt_tokens": row.prompt_tokens,
+            "completion_tokens": row.completion_tokens,
+            "cost_usd": row.cost_usd,
+            "response_size": row.response_size
+        }
+        for name, fraction in LATENCY_PERCENTILES:
+            value = getattr(row, name) if postgres else percentile(durations[(row.is_llm, row.group_name)], fraction)
+            stats[name] = round(value, 1) if value is not None else None
+        (agents if row.is_llm else tools)[row.group_name] = stats
+
+    return {
+        "agents": dict(sorted(agents.items(), key=lambda item: str(item[0]))),
+        "tools": dict(sorted(tools.items()))
+    }
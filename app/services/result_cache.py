@@ -0,0 +1,83 @@
+"""
+Reuse of recent reports for equivalent research questions.
+
+Questions are reduced to a canonical form (case, whitespace, punctuation
+and the current year normalized) and fingerprinted. A submission whose
+fingerprint matches a report completed within REPORT_CACHE_TTL_HOURS is
+answered with a copy of that report instead of a new crew run.
+"""
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.queries.models import Query
+from app.results.models import Report
+
+CURRENT_YEAR_TOKEN = "current_year"
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_question(question: str, current_year: Optional[int] = None) -> str:
+    """
+    Canonical form of a question used for matching.
+    The current year is replaced by a token, matching the crew's current_year input.
+    """
+    year = str(current_year or datetime.now().year)
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = re.sub(rf"\b{year}\b", CURRENT_YEAR_TOKEN, text)
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+def question_fingerprint(question: str, full_report: bool = False) -> str:
+    """
+    Fingerprint of a question. Full reports cover more ground than routed
+    runs, so they are only matched with each other.
+    """
+    canonical = normalize_question(question)
+    if full_report:
+        canonical += "|full_report"
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+async def find_reusable_report(db: AsyncSession, fingerprint: str) -> Optional[Report]:
+    """
+    Most recent report for an equivalent question within the freshness window.
+    Returns None when reuse is disabled or nothing fresh enough exists.
+    """
+    if settings.REPORT_CACHE_TTL_HOURS <= 0:
+        return None
+
+    cutoff = datetime.utcnow() - timedelta(hours=settings.REPORT_CACHE_TTL_HOURS)
+    result = await db.execute(
+        select(Report)
+        .join(Query, Query.id == Report.query_id)
+        .where(
+            Query.question_fingerprint == fingerprint,
+            Query.status == "completed",
+            # Only original runs count, so copies never extend freshness
+            Report.source_report_id.is_(None),
+            Report.created_at >= cutoff
+        )
+        .order_by(Report.created_at.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+def copy_report(source: Report, query_id: int, user_id: int) -> Report:
+    """
+    Copy a report for another query. The compressed body is shared as-is.
+    """
+    return Report(
+        query_id=query_id,
+        user_id=user_id,
+        title=source.title,
+        report_text=source.report_text,
+        report_gzip=source.report_gzip,
+        content_sha256=source.content_sha256,
+        content_length=source.content_length,
+        source_report_id=source.id
+    )
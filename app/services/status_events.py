@@ -0,0 +1,139 @@
+"""
+Query status events delivered through Postgres LISTEN/NOTIFY.
+
+Workers publish a notification whenever a query changes state. Each API
+process holds a single LISTEN connection and fans the events out to the
+clients streaming that query, so waiting clients cost no database work.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Set
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "query_status"
+TERMINAL_STATUSES = {"completed", "failed", "cancelled", "timed_out"}
+NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+
+def _notify_params(query_id: int, status: str, fields: Dict[str, Any]) -> Dict[str, str]:
+    payload = {"query_id": query_id, "status": status}
+    payload.update({key: value for key, value in fields.items() if value is not None})
+    return {"channel": CHANNEL, "payload": json.dumps(payload, default=str)}
+
+def publish_query_status(db: Session, query_id: int, status: str, **fields: Any) -> None:
+    """
+    Queue a status notification for a query on the given session.
+    Postgres delivers it when the surrounding transaction commits.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(NOTIFY, _notify_params(query_id, status, fields))
+
+async def publish_query_status_async(db: AsyncSession, query_id: int, status: str, **fields: Any) -> None:
+    """
+    publish_query_status() for the API's async sessions.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    await db.execute(NOTIFY, _notify_params(query_id, status, fields))
+
+class QueryStatusBroker:
+    """
+    In-process pub/sub for query status events.
+    One background thread LISTENs on Postgres and dispatches to asyncio queues.
+    """
+
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def available(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start listening. Must be called from the application's event loop.
+        """
+        if engine.dialect.name != "postgresql":
+            logger.warning("Query status streaming requires PostgreSQL, broker not started")
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="query-status-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def subscribe(self, query_id: int) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers[query_id].add(queue)
+        return queue
+
+    def unsubscribe(self, query_id: int, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(query_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[query_id]
+
+    def _dispatch(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring malformed status event: {payload[:200]}")
+            return
+
+        for queue in list(self._subscribers.get(event.get("query_id"), ())):
+            queue.put_nowait(event)
+
+    def _listen(self):
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        backoff = 1
+
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = psycopg2.connect(dsn)
+                conn.set_session(autocommit=True)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                logger.info(f"Listening for query status events on '{self.channel}'")
+                backoff = 1
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notify = conn.notifies.pop(0)
+                        self._loop.call_soon_threadsafe(self._dispatch, notify.payload)
+
+            except Exception as e:
+                logger.error(f"Query status listener error: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+# Shared broker for the API process
+status_broker = QueryStatusBroker()
@@ -0,0 +1,233 @@
+"""
+Per-task progress recording for crew runs.
+
+A TaskProgressRecorder is attached to a crew before kickoff. It creates a
+query_task_runs row for every task and keeps them current from the crew's
+task and step callbacks, publishing a status event whenever a task starts,
+finishes or fails.
+
+Tasks that report their own start (ScheduledTask, used by the DAG
+scheduler) are marked running when they begin. For plain tasks the crew is
+assumed to be sequential, so a task is considered started as soon as the
+one before it completes.
+
+A run that resumes an earlier, failed run of the query keeps the rows of
+the tasks restored from it (see load_task_outputs).
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from app.config import settings
+from app.database import SessionLocal
+from app.queries.models import QueryTaskRun
+from app.services.artifacts import save_task_artifact
+from app.services.status_events import publish_query_status
+
+logger = logging.getLogger(__name__)
+
+def section_title(task_name: str) -> str:
+    """
+    Human readable title for a task, e.g. clinical_trials_pipeline_task -> Clinical Trials Pipeline.
+    """
+    name = task_name[:-len("_task")] if task_name.endswith("_task") else task_name
+    return name.replace("_", " ").title()
+
+class TaskProgressRecorder:
+    """
+    Records the progress of each task of one crew run for a query.
+    Failures to record are logged and never interrupt the run.
+    """
+
+    def __init__(self, query_id: int):
+        self.query_id = query_id
+        self._task_names: List[str] = []
+        self._restored: List[str] = []
+        self._running: List[str] = []
+        self._steps: Dict[str, int] = {}
+        self._infer_starts = True
+        self._lock = threading.Lock()
+
+    def attach(self, crew) -> None:
+        """
+        Create the task rows for this run and hook the crew's callbacks.
+        Completed rows of tasks the crew no longer runs were restored from an
+        earlier run and are kept; every other row starts over.
+        """
+        self._task_names = [task.name for task in crew.tasks]
+        roles = {task.name: task.agent.role if task.agent else None for task in crew.tasks}
+
+        db = SessionLocal()
+        try:
+            positions = {}
+            for task_run in db.query(QueryTaskRun).filter(QueryTaskRun.query_id == self.query_id).all():
+                positions[task_run.task_name] = task_run.position
+                if task_run.status == "completed" and task_run.task_name not in self._task_names:
+                    self._restored.append(task_run.task_name)
+                else:
+                    db.delete(task_run)
+            db.flush()
+
+            next_position = max(positions.values(), default=-1) + 1
+            for name in self._task_names:
+                if name not in positions:
+                    positions[name] = next_position
+                    next_position += 1
+                db.add(QueryTaskRun(
+                    query_id=self.query_id,
+                    task_name=name,
+                    agent_role=roles[name],
+                    position=positions[name],
+                    status="pending"
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+        crew.task_callback = self.task_completed
+
+        self._infer_starts = not all(hasattr(task, "set_start_callback") for task in crew.tasks)
+        for task in crew.tasks:
+            if not self._infer_starts:
+                task.set_start_callback(lambda started: self._start(started.name))
+            # Each agent works on a single task, so its steps belong to that task
+            if task.agent is not None:
+                task.agent.step_callback = lambda step, name=task.name: self.step_taken(name)
+
+        if self._infer_starts and self._task_names:
+            self._start(self._task_names[0])
+
+    def step_taken(self, task_name: str) -> None:
+        """
+        Agent step callback for the given task.
+        """
+        with self._lock:
+            self._steps[task_name] = self._steps.get(task_name, 0) + 1
+
+    def task_completed(self, output: Any) -> None:
+        """
+        Crew task callback. Stores the output and starts the next task.
+        """
+        name = getattr(output, "name", None)
+        if name not in self._task_names:
+            with self._lock:
+                name = self._running[0] if self._running else None
+        raw = getattr(output, "raw", None)
+        text = raw if isinstance(raw, str) else str(output)
+
+        self._finish(name)
+        self._update(
+            name,
+            "completed",
+            completed_at=datetime.utcnow(),
+            step_count=self._steps.get(name, 0),
+            output_text=text if settings.STORE_TASK_OUTPUTS else None,
+            output_size=len(text)
+        )
+        if name:
+            save_task_artifact(self.query_id, name, text)
+
+        if self._infer_starts and name in self._task_names:
+            position = self._task_names.index(name)
+            if position + 1 < len(self._task_names):
+                self._start(self._task_names[position + 1])
+
+    def task_failed(self, error: str) -> None:
+        """
+        Mark the running tasks as failed after the crew raised.
+        """
+        with self._lock:
+            running, self._running = self._running, []
+        for name in running:
+            self._update(
+                name,
+                "failed",
+                completed_at=datetime.utcnow(),
+                step_count=self._steps.get(name, 0),
+                error_message=error
+            )
+
+    def _start(self, name: str) -> None:
+        with self._lock:
+            if name not in self._running:
+                self._running.append(name)
+            self._steps[name] = 0
+        self._update(name, "running", started_at=datetime.utcnow())
+
+    def _finish(self, name: Optional[str]) -> None:
+        with self._lock:
+            if name in self._running:
+                self._running.remove(name)
+
+    def _update(self, name: Optional[str], status: str, **fields: Any) -> None:
+        if not name:
+            return
+
+        db = SessionLocal()
+        try:
+            task_run = db.query(QueryTaskRun).filter(
+                QueryTaskRun.query_id == self.query_id,
+                QueryTaskRun.task_name == name
+            ).first()
+            if not task_run:
+                return
+
+            task_run.status = status
+            for key, value in fields.items():
+                setattr(task_run, key, value)
+
+            publish_query_status(
+                db, self.query_id, "processing",
+                task=build_task_event(task_run, self._restored + self._task_names)
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Failed to record progress of task {name} for query {self.query_id}: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+def load_task_outputs(query_id: int) -> Dict[str, str]:
+    """
+    Stored outputs of the tasks completed by earlier runs of a query, by task name.
+    Tasks whose output was not stored (STORE_TASK_OUTPUTS off) are left out.
+    """
+    db = SessionLocal()
+    try:
+        rows = db.query(QueryTaskRun.task_name, QueryTaskRun.output_text).filter(
+            QueryTaskRun.query_id == query_id,
+            QueryTaskRun.status == "completed",
+            QueryTaskRun.output_text.isnot(None)
+        ).order_by(QueryTaskRun.position).all()
+        return {name: output for name, output in rows}
+    finally:
+        db.close()
+
+def build_task_event(task_run: QueryTaskRun, task_names: List[str]) -> Dict[str, Any]:
+    return {
+        "name": task_run.task_name,
+        "title": section_title(task_run.task_name),
+        "status": task_run.status,
+        "position": task_run.position,
+        "total": len(task_names)
+    }
+
+def build_task_summary(task_run: QueryTaskRun) -> Dict[str, Any]:
+    """
+    Task progress as exposed by the status API, without the output text.
+    """
+    duration = None
+    if task_run.started_at and task_run.completed_at:
+        duration = (task_run.completed_at - task_run.started_at).total_seconds()
+
+    return {
+        "name": task_run.task_name,
+        "title": section_title(task_run.task_name),
+        "agent": task_run.agent_role,
+        "status": task_run.status,
+        "started_at": task_run.started_at,
+        "completed_at": task_run.completed_at,
+        "duration_seconds": duration,
+        "step_count": task_run.step_count,
+        "output_size": task_run.output_size
+    }
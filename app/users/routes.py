@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.auth.routes import get_current_user
-from app.users.models import User
+from app.auth.principal_cache import Principal
 
 router = APIRouter()
 
@@ -16,7 +16,7 @@ class UserProfile(BaseModel):
         from_attributes = True
 
 @router.get("/profile", response_model=UserProfile)
-async def get_profile(current_user: User = Depends(get_current_user)):
+async def get_profile(current_user: Principal = Depends(get_current_user)):
     """
     Get current user's profile information.
     """
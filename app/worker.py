@@ -0,0 +1,207 @@
+"""
+Standalone worker process that executes queued agent jobs.
+
+Run with: python -m app.worker [--concurrency N]
+
+Each worker runs up to WORKER_CONCURRENCY crews at a time. Start more
+worker processes (on this host or others pointing at the same database)
+to scale agent throughput; the API process never runs crews itself.
+
+Cancelled queries are picked up by the maintenance loop, which stops their
+runs within JOB_HEARTBEAT_SECONDS.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Dict
+from app.config import settings
+from app.database import SessionLocal, create_tables
+from app.jobs.queue import (
+    cancel_requested_jobs,
+    claim_next_job,
+    complete_job,
+    fail_job,
+    finish_cancelled_job,
+    heartbeat_jobs,
+    requeue_orphaned_jobs,
+)
+from app.services.agent_service import AgentExecutionError, create_run_control
+from app.services.background_tasks import process_query_with_agents
+from app.services.crew_factory import crew_factory
+
+# Register every model referenced by jobs
+import app.users.models  # noqa: F401
+import app.queries.models  # noqa: F401
+import app.results.models  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+class Worker:
+    """
+    Pulls jobs from the queue and runs them on a fixed number of slots.
+    A maintenance loop keeps leases alive and reclaims orphaned jobs.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running: Dict[int, int] = {}  # job id -> query id
+        self._controls: Dict[int, Any] = {}  # job id -> RunControl of its run
+
+    def run(self):
+        """
+        Start the worker slots and block until shutdown.
+        """
+        logger.info(f"Worker {self.worker_id} starting with {self.concurrency} slot(s)")
+
+        slots = [
+            threading.Thread(target=self._slot_loop, name=f"worker-slot-{i}")
+            for i in range(self.concurrency)
+        ]
+        for slot in slots:
+            slot.start()
+
+        self._maintenance_loop()
+
+        logger.info("Waiting for running jobs to finish...")
+        for slot in slots:
+            slot.join()
+        logger.info(f"Worker {self.worker_id} stopped")
+
+    def stop(self, *_):
+        """
+        Stop claiming new jobs. Running jobs are allowed to finish.
+        """
+        if not self._stop.is_set():
+            logger.info("Shutdown requested")
+        self._stop.set()
+
+    def _slot_loop(self):
+        while not self._stop.is_set():
+            try:
+                ran = self._run_next_job()
+            except Exception as e:
+                logger.error(f"Worker slot error: {e}", exc_info=True)
+                ran = False
+
+            if not ran:
+                self._stop.wait(self.poll_interval)
+
+    def _run_next_job(self) -> bool:
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, self.worker_id)
+            if not job:
+                return False
+            job_id = job.id
+            query_id = job.query_id
+            final_attempt = job.attempts >= job.max_attempts
+            query_text = job.query.question
+            user_id = job.query.user_id
+            full_report = job.query.full_report
+        finally:
+            db.close()
+
+        logger.info(f"Claimed job {job_id} for query {query_id} (final attempt: {final_attempt})")
+
+        control = create_run_control()
+        with self._lock:
+            self._running[job_id] = query_id
+            self._controls[job_id] = control
+
+        try:
+            process_query_with_agents(
+                query_id=query_id,
+                query_text=query_text,
+                user_id=user_id,
+                final_attempt=final_attempt,
+                full_report=full_report,
+                control=control
+            )
+            self._finish(job_id, error=None, cancelled=control.cancelled)
+        except AgentExecutionError as e:
+            self._finish(job_id, error=str(e))
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+                self._controls.pop(job_id, None)
+
+        return True
+
+    def _finish(self, job_id: int, error, cancelled: bool = False):
+        db = SessionLocal()
+        try:
+            if cancelled:
+                finish_cancelled_job(db, job_id)
+            elif error is None:
+                complete_job(db, job_id)
+            else:
+                fail_job(db, job_id, error)
+        finally:
+            db.close()
+
+    def _maintenance_loop(self):
+        while not self._stop.wait(settings.JOB_HEARTBEAT_SECONDS):
+            self._maintain()
+        # Keep the leases alive while the remaining jobs drain
+        while self._running:
+            self._maintain(reclaim=False)
+            time.sleep(min(settings.JOB_HEARTBEAT_SECONDS, 5))
+
+    def _maintain(self, reclaim: bool = True):
+        db = SessionLocal()
+        try:
+            with self._lock:
+                job_ids = list(self._running)
+            heartbeat_jobs(db, job_ids, self.worker_id)
+
+            for job_id in cancel_requested_jobs(db, job_ids):
+                with self._lock:
+                    control = self._controls.get(job_id)
+                if control is not None and not control.cancelled:
+                    logger.info(f"Cancelling job {job_id}")
+                    control.cancel()
+
+            if reclaim:
+                reclaimed = requeue_orphaned_jobs(db)
+                if reclaimed:
+                    logger.warning(f"Reclaimed {reclaimed} orphaned job(s)")
+        except Exception as e:
+            logger.error(f"Worker maintenance failed: {e}", exc_info=True)
+            db.rollback()
+        finally:
+            db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the agent job worker")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=settings.WORKER_POLL_INTERVAL)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s [%(threadName)s] %(name)s: %(message)s"
+    )
+
+    create_tables()
+
+    # Pay the crew import and construction cost before the first job
+    try:
+        crew_factory.warm()
+    except Exception as e:
+        logger.error(f"Failed to prepare the research crew, jobs will retry on demand: {e}", exc_info=True)
+
+    worker = Worker(concurrency=args.concurrency, poll_interval=args.poll_interval)
+    signal.signal(signal.SIGINT, worker.stop)
+    signal.signal(signal.SIGTERM, worker.stop)
+    worker.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark the per-request cost of authenticating a user.
+
+Compares the original lookup (decode the token, then SELECT the user on
+every request) with the principal cache: tokens carrying full claims skip
+the database entirely, older tokens hit the cache after the first lookup.
+
+Run with: python -m benchmarks.auth_overhead [--requests N]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/auth_bench.db"
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from starlette.requests import Request
+from app.database import AsyncSessionLocal, SessionLocal, create_tables
+from app.auth.hashing import hash_password
+from app.auth.jwt_handler import create_access_token, decode_access_token
+from app.auth.principal_cache import principal_cache
+from app.auth.routes import get_current_user, token_claims
+from app.users.models import User
+
+# Register every model so create_tables() builds the full schema
+import app.queries.models  # noqa: F401
+import app.results.models  # noqa: F401
+import app.jobs.models  # noqa: F401
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/users/profile",
+        "headers": [(b"cookie", f"access_token={token}".encode())],
+    })
+
+async def baseline_current_user(request: Request, db):
+    """
+    The lookup as it was before the principal cache.
+    """
+    payload = decode_access_token(request.cookies.get("access_token"))
+    if not payload:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    result = await db.execute(select(User).where(User.id == payload.get("user_id")))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
+
+def ensure_user() -> User:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == "auth-bench").first()
+        if not user:
+            user = User(
+                username="auth-bench",
+                email="auth-bench@example.com",
+                hashed_password=hash_password("auth-bench")
+            )
+            db.add(user)
+            db.commit()
+            db.refresh(user)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+async def measure(label: str, dependency, token: str, requests: int):
+    request = make_request(token)
+    timings = []
+
+    for _ in range(requests):
+        # A fresh session per request, as FastAPI's dependency would give
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            await dependency(request, db)
+            timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<32} mean {statistics.mean(timings) * 1e6:8.1f} us"
+        f"   p50 {statistics.median(timings) * 1e6:8.1f} us"
+        f"   p95 {p95 * 1e6:8.1f} us"
+    )
+
+async def main(requests: int):
+    create_tables()
+    user = ensure_user()
+
+    full_token = create_access_token(data=token_claims(user))
+    legacy_token = create_access_token(data={"user_id": user.id, "email": user.email})
+
+    principal_cache.clear()
+    print(f"{requests} authenticated requests per scenario\n")
+    await measure("before: SELECT per request", baseline_current_user, legacy_token, requests)
+    await measure("after: legacy token, cached", get_current_user, legacy_token, requests)
+    await measure("after: token claims", get_current_user, full_token, requests)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark authentication overhead")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
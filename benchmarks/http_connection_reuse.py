@@ -0,0 +1,108 @@
+"""
+Benchmark connection reuse of the research tools' HTTP client.
+
+Serves a small JSON payload from a local keep-alive HTTP server and sends
+the same requests twice: with module-level requests.get, which opens a new
+connection for every call (as the tools used to), and with the shared
+pooled client in pharma_researcher.tools.http. The server counts the TCP
+connections it accepts. Against the real APIs every new connection also
+pays DNS, TLS and a network round trip, so the gap is far larger than on
+localhost.
+
+Run with: python -m benchmarks.http_connection_reuse [--requests N] [--threads T] [--latency MS]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# The local server must not be throttled by the tools' rate limiter
+os.environ.setdefault("RATE_LIMITS", "127.0.0.1=0")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "agents" / "src"))
+
+import requests
+from pharma_researcher.tools import http
+
+PAYLOAD = json.dumps({"results": [{"id": i, "name": f"record {i}"} for i in range(50)]}).encode()
+
+class CountingServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float):
+        super().__init__(address, Handler)
+        self.latency = latency
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are written separately
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+def run(label: str, get, url: str, count: int, threads: int, server: CountingServer):
+    server.connections = 0
+    latencies = []
+
+    def call(_):
+        started = time.perf_counter()
+        response = get(url)
+        response.raise_for_status()
+        response.json()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(count)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{label:<22} {elapsed:7.2f}s  {count / elapsed:8.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:6.2f}ms  "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.2f}ms  "
+        f"connections {server.connections}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP connection reuse of the research tools")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.0, help="server think time per request in ms")
+    args = parser.parse_args()
+
+    server = CountingServer(("127.0.0.1", 0), args.latency / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/records"
+
+    print(f"{args.requests} requests from {args.threads} threads")
+    try:
+        run("new connection/call", lambda u: requests.get(u, timeout=30), url, args.requests, args.threads, server)
+        run("shared pooled client", http.http_get, url, args.requests, args.threads, server)
+    finally:
+        http.close_session()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
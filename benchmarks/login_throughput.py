@@ -0,0 +1,113 @@
+"""
+Benchmark concurrent logins and their effect on the event loop.
+
+Fires a burst of concurrent logins at the real /auth/login handler while a
+probe coroutine measures how late the event loop wakes it up. With bcrypt
+running inline every login stalls the loop; with the hashing pool the
+probe keeps ticking and logins overlap across threads.
+
+Run with: python -m benchmarks.login_throughput [--logins N] [--concurrency C]
+
+Uses DATABASE_URL if set, otherwise a throwaway SQLite database.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/login_bench.db"
+
+import httpx
+from app.main import app
+from app.database import SessionLocal, create_tables
+from app.auth import hashing, routes
+from app.users.models import User
+
+EMAIL = "login-bench@example.com"
+PASSWORD = "login-bench-password"
+
+def ensure_user():
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.email == EMAIL).first():
+            db.add(User(
+                username="login-bench",
+                email=EMAIL,
+                hashed_password=hashing.hash_password(PASSWORD)
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+async def inline_verify(plain_password: str, hashed_password: str) -> bool:
+    """
+    bcrypt on the event loop thread, as the login handler used to do it.
+    """
+    return hashing.verify_password(plain_password, hashed_password)
+
+async def probe_loop_lag(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+async def run_burst(client: httpx.AsyncClient, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def login():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    stop = asyncio.Event()
+    lags = []
+    probe = asyncio.create_task(probe_loop_lag(stop, lags))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe
+    return elapsed, latencies, lags
+
+def report(label: str, logins: int, elapsed: float, latencies: list, lags: list):
+    latencies.sort()
+    print(
+        f"{label:<14} {logins / elapsed:7.1f} logins/s"
+        f"   login p50 {statistics.median(latencies) * 1000:7.1f} ms"
+        f"   p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:7.1f} ms"
+        f"   loop lag max {max(lags, default=0) * 1000:7.1f} ms"
+    )
+
+async def main(logins: int, concurrency: int):
+    create_tables()
+    ensure_user()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{logins} logins, {concurrency} in flight, bcrypt rounds {hashing.settings.BCRYPT_ROUNDS}\n")
+
+        pooled_verify = routes.verify_password_async
+        routes.verify_password_async = inline_verify
+        try:
+            report("inline bcrypt", logins, *await run_burst(client, logins, concurrency))
+        finally:
+            routes.verify_password_async = pooled_verify
+
+        report("hashing pool", logins, *await run_burst(client, logins, concurrency))
+
+    hashing.shutdown_hashing_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent login throughput")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
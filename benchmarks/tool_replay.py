@@ -0,0 +1,147 @@
+"""
+Benchmark the research tools offline against recorded API cassettes.
+
+Runs a fixed workload of tool calls covering openFDA, ClinicalTrials.gov,
+NCBI, ChEMBL, Open Targets, PatentsView and Comtrade with the tools' HTTP
+client replaying cassettes (see pharma_researcher.cassettes):
+
+1. Per tool, with no injected latency: time of the tool's own work, i.e.
+   request building and response parsing/projection (_run), and of
+   compacting the result to its token budget (as agents call it), with output sizes.
+2. The whole workload under a latency/error profile, called one after
+   another through _run and concurrently through _arun on one event loop.
+
+Record the cassettes once, with network access and the usual API keys:
+    python -m benchmarks.tool_replay --record
+
+Run with: python -m benchmarks.tool_replay [--iterations N] [--profile NAME|SPEC] [--cassettes DIR]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "agents" / "src"))
+
+from pharma_researcher.cassettes import DEFAULT_CASSETTE_DIR, CassetteLibrary, parse_profile, use_cassettes
+from pharma_researcher.compaction import estimate_tokens
+from pharma_researcher.tools.ChEMBLTool import ChEMBLTool
+from pharma_researcher.tools.ClinicalTrialsTool import ClinicalTrialsTool
+from pharma_researcher.tools.EXIMTool import EXIMTool
+from pharma_researcher.tools.FDAAdverseEventsTool import FDAAdverseEventsTool
+from pharma_researcher.tools.FDADrugsFDATool import FDADrugsFDATool
+from pharma_researcher.tools.FDAEnforcementTool import FDAEnforcementTool
+from pharma_researcher.tools.FDANDCTool import FDANDCTool
+from pharma_researcher.tools.FDAProductLabelTool import FDAProductLabelTool
+from pharma_researcher.tools.NCBIEntrezTool import NCBIEntrezTool
+from pharma_researcher.tools.OpenTargetsDrugIndicationTool import OpenTargetsDrugIndicationTool
+from pharma_researcher.tools.OpenTargetsTool import OpenTargetsTool
+from pharma_researcher.tools.PatentsViewTool import PatentsViewTool
+
+# One drug followed across every source, as a repurposing query would
+WORKLOAD = [
+    (FDAAdverseEventsTool, {"search_query": 'patient.drug.openfda.generic_name:"metformin"', "limit": 50}),
+    (FDADrugsFDATool, {"generic_name": "metformin", "limit": 20}),
+    (FDAEnforcementTool, {"product": "metformin", "limit": 20}),
+    (FDANDCTool, {"generic_name": "metformin", "limit": 20}),
+    (FDAProductLabelTool, {"generic_name": "metformin", "limit": 3}),
+    (ClinicalTrialsTool, {"intervention": "metformin", "condition": "cancer", "page_size": 50}),
+    (NCBIEntrezTool, {"search_term": "metformin drug repurposing cancer", "retmax": 20}),
+    (ChEMBLTool, {"resource": "molecule", "chembl_id": "CHEMBL1431"}),
+    (ChEMBLTool, {"resource": "activity", "filters": {"molecule_chembl_id": "CHEMBL1431"}, "limit": 50}),
+    (OpenTargetsTool, {"endpoint": "drug", "entity_id": "CHEMBL1431"}),
+    (OpenTargetsDrugIndicationTool, {"drug_id": "CHEMBL1431"}),
+    (PatentsViewTool, {"query": {"_text_any": {"patent_abstract": "metformin"}}, "size": 50}),
+    (EXIMTool, {"hs_code": "300490", "year": 2023}),
+]
+
+def workload_calls():
+    tools = {}
+    for tool_class, args in WORKLOAD:
+        tool = tools.setdefault(tool_class, tool_class())
+        # Validated and defaulted as the agents' calls are
+        yield tool, tool.args_schema.model_validate(args).model_dump()
+
+def is_replayed(output) -> bool:
+    return not (isinstance(output, dict) and "error" in output)
+
+def record(directory: Path):
+    use_cassettes(CassetteLibrary(directory, "record"))
+    for tool, args in workload_calls():
+        output = tool._run(**args)
+        status = "recorded" if is_replayed(output) else f"error: {output['error']}"
+        print(f"{tool.name:<36} {status}")
+    print(f"\nCassettes written to {directory}")
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[max(0, int(len(values) * share) - 1)]
+
+def bench_tools(directory: Path, iterations: int):
+    use_cassettes(CassetteLibrary(directory, "replay"))
+    calls = []
+    for tool, args in workload_calls():
+        output = tool._run(**args)
+        if is_replayed(output):
+            calls.append((tool, args))
+        else:
+            print(f"skipped {tool.name}: {output['error']}")
+    if not calls:
+        sys.exit("No replayable calls; record the cassettes first with --record")
+
+    print(f"\nPer call, {iterations} iterations, no injected latency")
+    print(f"{'tool':<36} {'_run p50':>9} {'p95':>8} {'+compact':>9} {'calls/s':>8} {'tokens':>8} {'compacted':>10}")
+    for tool, args in calls:
+        parse_times, run_times = [], []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            raw = tool._run(**args)
+            parse_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            compacted = tool._run_compacted(**args)
+            run_times.append(time.perf_counter() - started)
+
+        print(
+            f"{tool.name:<36} {statistics.median(parse_times) * 1000:7.2f}ms {percentile(parse_times, 0.95) * 1000:6.2f}ms "
+            f"{statistics.median(run_times) * 1000:7.2f}ms {iterations / sum(run_times):8.0f} "
+            f"{estimate_tokens(raw):8} {estimate_tokens(compacted):10}"
+        )
+    return calls
+
+def bench_workload(directory: Path, calls, profile_spec: str):
+    use_cassettes(CassetteLibrary(directory, "replay", profile=parse_profile(profile_spec), seed=1))
+    print(f"\nWhole workload ({len(calls)} calls), profile '{profile_spec}'")
+
+    started = time.perf_counter()
+    failed = sum(not is_replayed(tool._run(**args)) for tool, args in calls)
+    elapsed = time.perf_counter() - started
+    print(f"{'sequential _run':<22} {elapsed:7.2f}s  {len(calls) / elapsed:6.1f} calls/s  failed {failed}")
+
+    async def concurrent():
+        outputs = await asyncio.gather(*(tool._arun(**args) for tool, args in calls))
+        return sum(not is_replayed(output) for output in outputs)
+
+    started = time.perf_counter()
+    failed = asyncio.run(concurrent())
+    elapsed = time.perf_counter() - started
+    print(f"{'concurrent _arun':<22} {elapsed:7.2f}s  {len(calls) / elapsed:6.1f} calls/s  failed {failed}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the research tools against recorded API cassettes")
+    parser.add_argument("--record", action="store_true", help="record the workload's cassettes from the live APIs")
+    parser.add_argument("--cassettes", type=Path, default=DEFAULT_CASSETTE_DIR)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--profile", default="typical", help="replay profile of the whole-workload run")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.cassettes)
+        return
+    calls = bench_tools(args.cassettes, args.iterations)
+    bench_workload(args.cassettes, calls, args.profile)
+
+if __name__ == "__main__":
+    main()
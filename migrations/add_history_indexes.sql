@@ -0,0 +1,15 @@
+-- Migration script to add composite indexes used by the report history API
+-- Run this on existing databases; new databases get them from create_tables()
+
+-- Reports listed per user, newest first (keyset pagination on created_at)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_reports_user_id_created_at
+    ON reports (user_id, created_at);
+
+-- Queries listed per user, newest first
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_queries_user_id_created_at
+    ON queries (user_id, created_at);
+
+-- Verify the indexes
+SELECT tablename, indexname, indexdef
+FROM pg_indexes
+WHERE indexname IN ('ix_reports_user_id_created_at', 'ix_queries_user_id_created_at');
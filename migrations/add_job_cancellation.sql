@@ -0,0 +1,10 @@
+-- Migration script to support cancelling queries
+-- Queries may now also end as 'cancelled' or 'timed_out' (queries.status is a free-form VARCHAR)
+
+-- When the user asked for the job's query to stop
+ALTER TABLE agent_jobs ADD COLUMN IF NOT EXISTS cancel_requested_at TIMESTAMP;
+
+-- Verify the changes
+SELECT table_name, column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'agent_jobs' AND column_name = 'cancel_requested_at';
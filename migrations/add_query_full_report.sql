@@ -0,0 +1,10 @@
+-- Migration script to support query-aware routing of the research agents
+-- Existing queries were run with every research agent
+
+-- Whether the user asked for every research agent to run
+ALTER TABLE queries ADD COLUMN IF NOT EXISTS full_report BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- Verify the changes
+SELECT table_name, column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'queries' AND column_name = 'full_report';
@@ -0,0 +1,30 @@
+-- Migration script to record LLM and tool call timings for queries
+-- New databases get this table from create_tables()
+
+CREATE TABLE IF NOT EXISTS query_spans (
+    id SERIAL PRIMARY KEY,
+    query_id INTEGER NOT NULL REFERENCES queries (id) ON DELETE CASCADE,
+    kind VARCHAR NOT NULL,
+    name VARCHAR NOT NULL,
+    task_name VARCHAR,
+    agent VARCHAR,
+    started_at TIMESTAMP NOT NULL,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    prompt_tokens INTEGER,
+    completion_tokens INTEGER,
+    cost_usd DOUBLE PRECISION,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    response_size INTEGER,
+    cached BOOLEAN NOT NULL DEFAULT FALSE,
+    error TEXT
+);
+
+CREATE INDEX IF NOT EXISTS ix_query_spans_id ON query_spans (id);
+CREATE INDEX IF NOT EXISTS ix_query_spans_query_id ON query_spans (query_id);
+CREATE INDEX IF NOT EXISTS ix_query_spans_started_at ON query_spans (started_at);
+
+-- Verify the table
+SELECT column_name, data_type, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_name = 'query_spans'
+ORDER BY ordinal_position;
@@ -0,0 +1,26 @@
+-- Migration script to add per-task progress tracking for queries
+-- New databases get this table from create_tables()
+
+CREATE TABLE IF NOT EXISTS query_task_runs (
+    id SERIAL PRIMARY KEY,
+    query_id INTEGER NOT NULL REFERENCES queries (id) ON DELETE CASCADE,
+    task_name VARCHAR NOT NULL,
+    agent_role VARCHAR,
+    position INTEGER NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'pending',
+    started_at TIMESTAMP,
+    completed_at TIMESTAMP,
+    step_count INTEGER NOT NULL DEFAULT 0,
+    output_size INTEGER,
+    output_text TEXT,
+    error_message TEXT,
+    CONSTRAINT uq_query_task_runs_query_task UNIQUE (query_id, task_name)
+);
+
+CREATE INDEX IF NOT EXISTS ix_query_task_runs_id ON query_task_runs (id);
+
+-- Verify the table
+SELECT column_name, data_type, is_nullable, column_default
+FROM information_schema.columns
+WHERE table_name = 'query_task_runs'
+ORDER BY ordinal_position;
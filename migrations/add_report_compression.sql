@@ -0,0 +1,22 @@
+-- Migration script to store reports gzip-compressed with a content hash
+-- Existing reports keep report_text and are still served; new reports use report_gzip
+
+-- Compressed report body and its SHA-256 (used as the ETag)
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS report_gzip BYTEA;
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64);
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS content_length INTEGER;
+
+-- New reports no longer fill the uncompressed column
+ALTER TABLE reports ALTER COLUMN report_text DROP NOT NULL;
+
+-- Hash legacy reports so they get stable ETags too
+UPDATE reports
+SET content_sha256 = encode(sha256(convert_to(report_text, 'UTF8')), 'hex'),
+    content_length = octet_length(convert_to(report_text, 'UTF8'))
+WHERE content_sha256 IS NULL AND report_text IS NOT NULL;
+
+-- Verify the changes
+SELECT column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE table_name = 'reports'
+ORDER BY ordinal_position;
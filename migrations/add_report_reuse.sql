@@ -0,0 +1,16 @@
+-- Migration script to support reusing reports for equivalent questions
+-- Queries submitted before this change have no fingerprint and are never reused
+
+-- Hash of the normalized question
+ALTER TABLE queries ADD COLUMN IF NOT EXISTS question_fingerprint VARCHAR(64);
+CREATE INDEX IF NOT EXISTS ix_queries_question_fingerprint ON queries (question_fingerprint);
+
+-- Original report a reused copy was taken from
+ALTER TABLE reports ADD COLUMN IF NOT EXISTS source_report_id INTEGER
+    REFERENCES reports (id) ON DELETE SET NULL;
+
+-- Verify the changes
+SELECT table_name, column_name, data_type, is_nullable
+FROM information_schema.columns
+WHERE (table_name = 'queries' AND column_name = 'question_fingerprint')
+   OR (table_name = 'reports' AND column_name = 'source_report_id');
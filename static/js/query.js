@@ -1,17 +1,62 @@
+function describeProgress(statusData) {
+    const task = statusData.task
+        || (statusData.tasks || []).find(t => t.status === 'running');
+    if (!task) {
+        return `Status: ${statusData.status}... Please wait.`;
+    }
+    const total = task.total || (statusData.tasks || []).length;
+    const position = task.position !== undefined
+        ? task.position
+        : statusData.tasks.indexOf(task);
+    return `Step ${position + 1} of ${total}: ${task.title} (${task.status})... Please wait.`;
+}
+
+async function loadSections(queryId) {
+    const sectionsDiv = document.getElementById('sections');
+    const response = await fetch(`/api/query/sections/${queryId}`);
+    if (!response.ok) {
+        return;
+    }
+    
+    const sections = await response.json();
+    sectionsDiv.innerHTML = '';
+    sections.forEach(section => {
+        const details = document.createElement('details');
+        details.className = 'bg-gray-50 rounded-lg p-4';
+        
+        const summary = document.createElement('summary');
+        summary.className = 'font-semibold cursor-pointer';
+        summary.textContent = `${section.title} ✓`;
+        
+        const content = document.createElement('div');
+        content.className = 'mt-2 text-sm text-gray-700 whitespace-pre-wrap';
+        content.textContent = section.content || '';
+        
+        details.append(summary, content);
+        sectionsDiv.appendChild(details);
+    });
+    sectionsDiv.classList.toggle('hidden', sections.length === 0);
+}
+
 document.getElementById('queryForm')?.addEventListener('submit', async function(e) {
     e.preventDefault();
     
     const formData = new FormData(e.target);
     const question = formData.get('question');
+    const forceRefresh = formData.get('force_refresh') === 'on';
+    const fullReport = formData.get('full_report') === 'on';
     
     const loadingDiv = document.getElementById('loading');
     const errorDiv = document.getElementById('errorMessage');
     const submitBtn = e.target.querySelector('button[type="submit"]');
     const loadingText = loadingDiv.querySelector('p');
+    const cancelBtn = document.getElementById('cancelQuery');
     
     loadingDiv.classList.remove('hidden');
     errorDiv.classList.add('hidden');
     submitBtn.disabled = true;
+    cancelBtn.disabled = false;
+    cancelBtn.onclick = null;
     
     try {
         // Submit the query
@@ -20,7 +65,7 @@ document.getElementById('queryForm')?.addEventListener('submit', async function(
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ question })
+            body: JSON.stringify({ question, force_refresh: forceRefresh, full_report: fullReport })
         });
         
         const data = await response.json();
@@ -38,45 +83,78 @@ document.getElementById('queryForm')?.addEventListener('submit', async function(
             }
         }
         
-        // Query submitted successfully, now poll for status
+        // Query submitted successfully, now follow its status stream
         const queryId = data.report_id; // This is actually the query ID
         loadingText.textContent = 'Processing your query with AI agents... This may take a few minutes.';
         
-        // Poll every 3 seconds
-        const pollInterval = setInterval(async () => {
-            try {
-                const statusResponse = await fetch(`/api/query/status/${queryId}`);
-                const statusData = await statusResponse.json();
+        const statusStream = new EventSource(`/api/query/stream/${queryId}`);
+        
+        cancelBtn.onclick = async () => {
+            cancelBtn.disabled = true;
+            const cancelResponse = await fetch(`/api/query/${queryId}/cancel`, { method: 'POST' });
+            const cancelData = await cancelResponse.json();
+            if (cancelData.status === 'cancelled') {
+                statusStream.close();
+                errorDiv.textContent = 'Query cancelled.';
+                errorDiv.classList.remove('hidden');
+                loadingDiv.classList.add('hidden');
+                submitBtn.disabled = false;
+            } else {
+                // A running crew stops shortly, the stream reports when it has
+                loadingText.textContent = cancelData.message || cancelData.detail;
+            }
+        };
+        
+        statusStream.addEventListener('status', (event) => {
+            const statusData = JSON.parse(event.data);
+            
+            if (statusData.status === 'completed') {
+                statusStream.close();
                 
-                if (statusData.status === 'completed') {
-                    clearInterval(pollInterval);
-                    // Find the report ID from the query
-                    const reportsResponse = await fetch('/api/results/');
-                    const reports = await reportsResponse.json();
-                    const report = reports.find(r => r.query_id === queryId);
-                    
-                    if (report) {
-                        window.location.href = `/results/${report.id}`;
-                    } else {
-                        errorDiv.textContent = 'Report generated but could not be loaded. Please check your reports list.';
-                        errorDiv.classList.remove('hidden');
-                        loadingDiv.classList.add('hidden');
-                        submitBtn.disabled = false;
-                    }
-                } else if (statusData.status === 'failed') {
-                    clearInterval(pollInterval);
-                    errorDiv.textContent = `Query processing failed: ${statusData.error_message || 'Unknown error'}`;
+                if (statusData.report_id) {
+                    window.location.href = `/results/${statusData.report_id}`;
+                } else {
+                    errorDiv.textContent = 'Report generated but could not be loaded. Please check your reports list.';
                     errorDiv.classList.remove('hidden');
                     loadingDiv.classList.add('hidden');
                     submitBtn.disabled = false;
+                }
+            } else if (statusData.status === 'cancelled' || statusData.status === 'timed_out') {
+                statusStream.close();
+                
+                if (statusData.report_id) {
+                    // Sections completed before the run stopped form a partial report
+                    window.location.href = `/results/${statusData.report_id}`;
                 } else {
-                    // Still processing, update status message
-                    loadingText.textContent = `Status: ${statusData.status}... Please wait.`;
+                    errorDiv.textContent = statusData.error_message || 'Query was stopped before any section completed.';
+                    errorDiv.classList.remove('hidden');
+                    loadingDiv.classList.add('hidden');
+                    submitBtn.disabled = false;
+                }
+            } else if (statusData.status === 'failed') {
+                statusStream.close();
+                errorDiv.textContent = `Query processing failed: ${statusData.error_message || 'Unknown error'}`;
+                errorDiv.classList.remove('hidden');
+                loadingDiv.classList.add('hidden');
+                submitBtn.disabled = false;
+            } else {
+                // Still processing, update status message
+                loadingText.textContent = describeProgress(statusData);
+                
+                // Show finished sections as soon as they are available
+                const finished = statusData.task
+                    ? statusData.task.status === 'completed'
+                    : (statusData.tasks || []).some(t => t.status === 'completed');
+                if (finished) {
+                    loadSections(queryId).catch(error => console.error('Failed to load sections:', error));
                 }
-            } catch (pollError) {
-                console.error('Status polling error:', pollError);
             }
-        }, 3000); // Poll every 3 seconds
+        });
+        
+        statusStream.onerror = () => {
+            // The browser reconnects on its own and the server resends the current status
+            console.error('Status stream interrupted, reconnecting...');
+        };
         
     } catch (error) {
         errorDiv.textContent = 'An error occurred. Please try again.';
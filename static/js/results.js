@@ -19,8 +19,16 @@ async function loadReport() {
             document.getElementById('reportQuestion').textContent = `Query: ${data.question}`;
             document.getElementById('reportDate').textContent = `Generated: ${new Date(data.created_at).toLocaleString()}`;
             
+            // The body is fetched separately so the browser can revalidate it
+            // with its ETag and reuse the cached copy on a 304
+            const contentResponse = await fetch(data.content_url, { cache: 'no-cache' });
+            if (!contentResponse.ok) {
+                throw new Error(`Failed to load report content: ${contentResponse.status}`);
+            }
+            const reportText = await contentResponse.text();
+            
             const reportTextDiv = document.getElementById('reportText');
-            reportTextDiv.innerHTML = marked.parse ? marked.parse(data.report_text) : data.report_text;
+            reportTextDiv.innerHTML = marked.parse ? marked.parse(reportText) : reportText;
             
             loadingDiv.classList.add('hidden');
             contentDiv.classList.remove('hidden');
@@ -0,0 +1,28 @@
+"""
+Shared setup of the app's tests, against a throwaway SQLite database.
+Run from the repository root with: python -m pytest tests
+"""
+import os
+import tempfile
+from pathlib import Path
+import pytest
+
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'test.db'}"
+os.environ.setdefault("SESSION_SECRET", "test")
+
+from app.database import Base, SessionLocal, engine
+# Registers every table
+import app.jobs.models  # noqa: E402,F401
+import app.queries.models  # noqa: E402,F401
+import app.results.models  # noqa: E402,F401
+import app.users.models  # noqa: E402,F401
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
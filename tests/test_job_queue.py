@@ -0,0 +1,37 @@
+"""
+Job queue behaviour around cancellation (app.jobs.queue).
+"""
+from app.jobs.models import Job
+from app.jobs.queue import claim_next_job, enqueue_job, fail_job, request_cancel
+from app.queries.models import Query
+from app.users.models import User
+
+def running_job(db) -> Job:
+    user = User(username="researcher", email="researcher@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    query = Query(user_id=user.id, question="Can metformin be repurposed for cancer?")
+    db.add(query)
+    db.flush()
+    enqueue_job(db, query.id)
+    db.commit()
+    return claim_next_job(db, "worker-1")
+
+def test_failed_attempt_is_retried(db):
+    job = running_job(db)
+
+    assert fail_job(db, job.id, "LLM error")
+    db.refresh(job)
+    assert job.status == "queued"
+
+def test_cancelled_job_is_not_retried_after_failure(db):
+    job = running_job(db)
+    request_cancel(job)
+    job.query.status = "pending"  # as the failed run leaves it for a retry
+    db.commit()
+
+    assert not fail_job(db, job.id, "LLM error")
+    db.refresh(job)
+    assert job.status == "cancelled"
+    assert job.query.status == "cancelled"
+    assert claim_next_job(db, "worker-2") is None
@@ -0,0 +1,26 @@
+"""
+Report ETags per content-coding (app.results.storage).
+"""
+from app.results.storage import compress_report, etag_matches, make_etag
+
+def test_gzip_body_has_its_own_etag():
+    _, content_sha256 = compress_report("# Report")
+
+    assert make_etag(content_sha256) == f'"{content_sha256}"'
+    assert make_etag(content_sha256, gzipped=True) == f'"{content_sha256}-gzip"'
+
+def test_either_representation_revalidates():
+    _, content_sha256 = compress_report("# Report")
+    identity, gzipped = make_etag(content_sha256), make_etag(content_sha256, gzipped=True)
+
+    assert etag_matches(gzipped, content_sha256, gzipped=True) == gzipped
+    assert etag_matches(f"W/{identity}", content_sha256, gzipped=True) == identity
+    assert etag_matches('"other", ' + gzipped, content_sha256, gzipped=False) == gzipped
+    assert etag_matches("*", content_sha256, gzipped=True) == gzipped
+
+def test_other_content_does_not_match():
+    _, content_sha256 = compress_report("# Report")
+    _, other_sha256 = compress_report("# Other report")
+
+    assert etag_matches(make_etag(other_sha256), content_sha256, gzipped=False) is None
+    assert etag_matches(None, content_sha256, gzipped=False) is None
@@ -0,0 +1,55 @@
+"""
+Aggregated LLM and tool call stats served by /api/query/stats
+(app.services.query_metrics.load_span_stats).
+"""
+import asyncio
+from datetime import datetime, timedelta
+from app.database import AsyncSessionLocal
+from app.queries.models import Query, QuerySpan
+from app.services.query_metrics import load_span_stats
+from app.users.models import User
+
+def add_spans(db, username: str, spans):
+    user = User(username=username, email=f"{username}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    query = Query(user_id=user.id, question="Can metformin be repurposed for cancer?")
+    db.add(query)
+    db.flush()
+    now = datetime.utcnow()
+    db.add_all([QuerySpan(query_id=query.id, started_at=now, **span) for span in spans])
+    db.commit()
+    return user.id
+
+def load(user_id: int, since: datetime):
+    async def run():
+        async with AsyncSessionLocal() as session:
+            return await load_span_stats(session, user_id, since)
+    return asyncio.run(run())
+
+def test_stats_per_agent_and_tool(db):
+    llm = {"kind": "llm", "name": "gpt-4o-mini", "agent": "Market Analyst"}
+    user_id = add_spans(db, "researcher", [
+        {**llm, "duration_ms": 100.0, "prompt_tokens": 10, "completion_tokens": 5, "cost_usd": 0.01},
+        {**llm, "duration_ms": 200.0, "prompt_tokens": 20, "attempts": 3},
+        {**llm, "duration_ms": 400.0, "error": "rate limited"},
+        {"kind": "tool", "name": "patents_view_api_tool", "agent": "Market Analyst", "duration_ms": 50.0, "cached": True, "response_size": 1200},
+    ])
+    add_spans(db, "other", [{**llm, "duration_ms": 9000.0}])
+
+    stats = load(user_id, datetime.utcnow() - timedelta(days=1))
+
+    assert list(stats["agents"]) == ["Market Analyst"]
+    agent = stats["agents"]["Market Analyst"]
+    assert (agent["calls"], agent["errors"], agent["retries"], agent["cached"]) == (3, 1, 2, 0)
+    assert (agent["total_ms"], agent["p50_ms"], agent["p95_ms"]) == (700.0, 200.0, 380.0)
+    assert (agent["prompt_tokens"], agent["completion_tokens"], agent["cost_usd"]) == (30, 5, 0.01)
+
+    tool = stats["tools"]["patents_view_api_tool"]
+    assert (tool["calls"], tool["cached"], tool["p50_ms"], tool["response_size"]) == (1, 1, 50.0, 1200)
+    assert tool["prompt_tokens"] is None
+
+def test_stats_leave_out_older_spans(db):
+    user_id = add_spans(db, "researcher", [{"kind": "tool", "name": "fda_drugsfda_tool", "duration_ms": 10.0}])
+
+    assert load(user_id, datetime.utcnow() + timedelta(minutes=1)) == {"agents": {}, "tools": {}}